@@ -1,7 +1,7 @@
 import math
 from Shapes import *
 from Coordinate import Coordinate
-from decimal import Decimal
+import NumericBackend
 
 
 def deathly_hallows(size_mm=5, center=Coordinate(5, 5), stiffness=0.1):
@@ -138,9 +138,9 @@ def rounded_square(length_mm=5, center=Coordinate(5, 5), stiffness=0.1):
     """
     shapes = []
 
-    mid_mm = Decimal(float(length_mm) / 2)
+    mid_mm = NumericBackend.number(float(length_mm) / 2)
     cut_length = length_mm * 0.6
-    cut_length_mid = Decimal(float(length_mm - cut_length) / 2)
+    cut_length_mid = NumericBackend.number(float(length_mm - cut_length) / 2)
     upper_center = Coordinate(center.x - cut_length_mid, center.y + mid_mm)
     shapes.append(Line(length_mm=cut_length, stiffness=stiffness, center=upper_center, rotation_angle_degrees=90))
     lower_center = Coordinate(center.x, center.y - mid_mm)
@@ -7,6 +7,9 @@ BEAM_DIAMETER = 0.45 # mm
 # This is the physical bounds that the motor actuators can travel
 MOTOR_MAX_TRAVEL = 25 # mm
 
+# The documented minimum step size of the KDC101 motor controller
+MOTOR_MINIMUM_STEP_SIZE = 0.001 # mm
+
 # The wavelength of light outputted by the lamp
 LIGHT_WAVELENGTH = 445 # nm
 
@@ -31,4 +34,46 @@ import math
 MINIMUM_DISTANCE_BETWEEN_TWO_LIGHT_BEAMS = (BEAM_DIAMETER / 2) * (1 - math.cos(2)) # mm
 
 # Change this value to increase the quality of the canvas drawings. Enter a value between 0.1 and 10. A higher quality will increase the time it takes to render the canvas.
-CANVAS_QUALITY = 1
\ No newline at end of file
+CANVAS_QUALITY = 1
+
+# The resolution of the simulated canvas in pixels per mm. Memory grows with its square.
+CANVAS_PIXELS_PER_MM = 100
+
+# The number type of the dose of each pixel of the simulated canvas, "float64" or "float32" (half the memory)
+CANVAS_DTYPE = "float64"
+
+# How the simulated canvas is stored. "dense" allocates the whole canvas, "tiled" allocates square tiles of it only
+# where the beam cures, so a canvas that is mostly empty takes little memory.
+CANVAS_STORAGE = "dense"
+
+# The profile of the simulated beam. "disk" cures every pixel whose center is within the beam by the full amount,
+# "top_hat" cures each pixel by the part of it the beam covers, and "gaussian" cures by a Gaussian beam whose 1/e^2
+# diameter is the beam diameter and whose total dose is that of the disk. "top_hat" and "gaussian" place the beam
+# with sub-pixel precision.
+BEAM_PROFILE = "disk"
+
+# The number type used for coordinate math. "decimal" uses Decimal with 15 significant digits, "float" uses float64,
+# and "micrometre" uses float64 with positions snapped to MOTOR_MINIMUM_STEP_SIZE. See sandbox/numeric_backend_regression.py.
+NUMERIC_BACKEND = "decimal"
+
+# How shapes generated in worker processes are returned. "pickle" sends Coordinates objects, "shared_memory" writes
+# each toolpath into a shared memory segment that the parent maps without copying (returned as a CoordinateArray).
+# Texture still copies every mapped cell once to join them into one toolpath.
+PARALLEL_TRANSPORT = "pickle"
+
+# Where the simulator saves the canvas instead of showing it, as a .png, .tif/.tiff image or a .npy dose map, with a
+# downsampled .preview.png next to it. None shows the canvas in an image viewer.
+SIMULATION_OUTPUT_FILE = None
+
+# How the simulator cures the canvas. "stepping" cures the beam at every time step of each move (Simulator/VirtualManager.py),
+# "analytic" cures each move at once from the time the beam spends over each pixel (Simulator/AnalyticVirtualManager.py).
+# See sandbox/benchmark_analytic_simulator.py.
+SIMULATION_ENGINE = "stepping"
+
+# Whether Controller simulates each job before running it and reports, per shape, how the simulated stiffness compares
+# with the intended stiffness. See DoseVerification.py.
+VERIFY_DOSE = False
+
+# Where a dry run of Controller saves the trace of the commands it sent, with their predicted start and end in
+# milliseconds, as a .csv file. None only prints its summary. See Simulator/DryRunManager.py.
+DRY_RUN_TRACE_FILE = None
@@ -5,20 +5,23 @@ from tqdm import tqdm
 
 import CommonPatterns
 from Shapes import *
-from Coordinate import Coordinate, Coordinates
+from Coordinate import Coordinate, CoordinateArray
 from Constants import *
 from Multiprocessor import Multiprocessor
 from EstimatedCompletionTime import EstimatedCompletionTime
+from ShapeOrderOptimizer import ShapeOrderOptimizer
 
 ### INSTRUCTIONS
 ### STEP 1: Connect the motors and LED to the computer using USB cables.
 ### STEP 2: Change the IS_SIMULATOR value to True if you want to run the motors in a virtual simulation. Change the IS_SIMULATOR value to False if you want to run the motors in real life.
 ###         It is recommended to run the motors in a virtual simulation first to see how the motors will move before running the motors in real life.
+###         Change the IS_DRY_RUN value to True to only time the commands the motors and LED would be sent, without the hardware and without drawing the simulation.
 ### STEP 3: Change the center_coordinate value in the main function. The center coordinate will be used to determine the center of each shape, texture, or pattern.
 ### STEP 4: Choose which shapes, textures, or patterns to draw and uncomment the desired shape, texture, or pattern from the list in the main function.
 ### STEP 5: Run the program. The motors will move to draw the shapes, textures, or patterns.
 
 IS_SIMULATOR = True
+IS_DRY_RUN = False
 
 X_MOTOR_SERIAL_NUMBER = "27602218"
 Y_MOTOR_SERIAL_NUMBER = "27264864"
@@ -27,34 +30,12 @@ LAMP_SERIAL_NUMBER = b"USB0::0x1313::0x80C8::M00607903::INSTR"
 class Controller:
 
     @staticmethod
-    def optimize_shape_order(coordinate_sets):
-        """Reorders coordinate sets by nearest-neighbor to minimize inter-shape travel."""
-        non_empty = [cs for cs in coordinate_sets if len(cs) > 0]
-        if len(non_empty) <= 1:
-            return non_empty
-
-        remaining = list(range(len(non_empty)))
-        ordered = []
-        current_x, current_y = 0.0, 0.0
-
-        while remaining:
-            best_idx = None
-            best_dist_sq = float('inf')
-            for idx in remaining:
-                first = non_empty[idx][0]
-                dx = float(first.x) - current_x
-                dy = float(first.y) - current_y
-                dist_sq = dx * dx + dy * dy
-                if dist_sq < best_dist_sq:
-                    best_dist_sq = dist_sq
-                    best_idx = idx
-
-            remaining.remove(best_idx)
-            ordered.append(non_empty[best_idx])
-            last = non_empty[best_idx][-1]
-            current_x = float(last.x)
-            current_y = float(last.y)
-
+    def optimize_shape_order(coordinate_sets, allow_reversal=True, improvement_time_budget_s=1.0):
+        """Reorders coordinate sets (reversing them if allowed) to minimize inter-shape travel."""
+        optimizer = ShapeOrderOptimizer(allow_reversal=allow_reversal, improvement_time_budget_s=improvement_time_budget_s)
+        ordered = optimizer.optimize(coordinate_sets)
+        if optimizer.saved_seconds > 0:
+            print(f"Shape ordering saved an estimated {optimizer.saved_seconds:.1f} seconds of lamp-off travel")
         return ordered
 
     def main(self):
@@ -104,10 +85,18 @@ class Controller:
         # shapes.extend(CommonPatterns.deathly_hallows(size_mm=5, center=center_coordinate, stiffness=10000))
         # shapes.extend(CommonPatterns.rounded_square(length_mm=5, center=center_coordinate, stiffness=50000))
 
-        coordinate_sets = Multiprocessor().get_coordinate_sets(shapes)
+        with Multiprocessor() as multiprocessor:
+            coordinate_sets = multiprocessor.get_coordinate_sets(shapes)
+
+        if VERIFY_DOSE:
+            from DoseVerification import DoseVerification
+            # Shapes that failed to generate are left out of the coordinate sets, which are then only numbered
+            verification = DoseVerification(coordinate_sets, shapes if len(shapes) == len(coordinate_sets) else None)
+            verification.print_report(verification.verify(DoseVerification.simulate(coordinate_sets)))
+
         coordinate_sets = Controller.optimize_shape_order(coordinate_sets)
 
-        coordinates = Coordinates()
+        coordinates = CoordinateArray()
         for i in coordinate_sets:
             coordinates += i
 
@@ -115,8 +104,17 @@ class Controller:
         completion_time = EstimatedCompletionTime(coordinates).get_completion_time()
         print(f"Estimated Completion Time: {int(completion_time // 3600)} hours {int((completion_time % 3600) // 60)} minutes {int(completion_time % 60)} seconds")
 
-        if IS_SIMULATOR:
-            from Simulator.VirtualManager import VirtualManager
+        if IS_DRY_RUN:
+            from Simulator.DryRunManager import DryRunManager
+            # Sets up motors and an LED that only keep time
+            self.manager = DryRunManager(acceleration=ACCELERATION, max_velocity=MAXIMUM_VELOCITY)
+        elif IS_SIMULATOR:
+            if SIMULATION_ENGINE == "stepping":
+                from Simulator.VirtualManager import VirtualManager
+            elif SIMULATION_ENGINE == "analytic":
+                from Simulator.AnalyticVirtualManager import AnalyticVirtualManager as VirtualManager
+            else:
+                raise ValueError(f"Unknown simulation engine '{SIMULATION_ENGINE}'. Choose one of ['stepping', 'analytic'].")
             # Sets up a virtual simulation of the motors and LED
             self.manager = VirtualManager(canvas_dimensions_mm=MOTOR_MAX_TRAVEL, acceleration=ACCELERATION, max_velocity=MAXIMUM_VELOCITY, beam_diameter=BEAM_DIAMETER)
         else:
@@ -124,7 +122,7 @@ class Controller:
             # Sets up the actual motors and LED
             self.manager = Manager(serial_number_x=X_MOTOR_SERIAL_NUMBER, serial_number_y=Y_MOTOR_SERIAL_NUMBER, lamp_serial_number=LAMP_SERIAL_NUMBER, acceleration=ACCELERATION, max_velocity=MAXIMUM_VELOCITY)
         
-        if not IS_SIMULATOR:
+        if not IS_SIMULATOR and not IS_DRY_RUN:
             print("Going to Centroid of aggregated shapes.")
             center_of_shapes = coordinates.get_centroid()
             center_of_shapes.lp = False
@@ -141,7 +139,17 @@ class Controller:
         for coordinate in tqdm(coordinates, desc="Moving Motors", unit="coordinate"):
             self.manager.move(coordinate)
 
-        if IS_SIMULATOR:
+        if IS_DRY_RUN:
+            self.manager.print_summary()
+            if DRY_RUN_TRACE_FILE:
+                self.manager.save_trace(DRY_RUN_TRACE_FILE)
+                print(f"Saved the command trace to {DRY_RUN_TRACE_FILE}")
+        elif IS_SIMULATOR and SIMULATION_OUTPUT_FILE:
+            canvas = self.manager.lamp.canvas
+            canvas.save(SIMULATION_OUTPUT_FILE)
+            canvas.save_preview(os.path.splitext(SIMULATION_OUTPUT_FILE)[0] + ".preview.png")
+            print(f"Saved the simulated canvas to {SIMULATION_OUTPUT_FILE}")
+        elif IS_SIMULATOR:
             self.manager.lamp.canvas.draw()
     
     def __del__(self):
@@ -1,17 +1,114 @@
 import math
+import numpy as np
 import matplotlib.pyplot as plt
 from tqdm import tqdm
 from shapely.geometry import Polygon
 from shapely.geometry.polygon import orient
-from Constants import MOTOR_MAX_TRAVEL, MINIMUM_VELOCITY, MAXIMUM_VELOCITY, ACCELERATION, MINIMUM_DISTANCE_BETWEEN_TWO_LIGHT_BEAMS
-from CuringCalculations import curing_calculations, Configuration
-from decimal import Decimal, getcontext, InvalidOperation
+from Constants import MOTOR_MAX_TRAVEL, MOTOR_MINIMUM_STEP_SIZE, MINIMUM_VELOCITY, MAXIMUM_VELOCITY, ACCELERATION, MINIMUM_DISTANCE_BETWEEN_TWO_LIGHT_BEAMS
+from CuringCalculations import curing_calculations
+import NumericBackend
 
-getcontext().prec = 15
 
-# Pre-computed squared thresholds to avoid sqrt in distance comparisons
-_MIN_BEAM_DIST_SQ = Decimal(MINIMUM_DISTANCE_BETWEEN_TWO_LIGHT_BEAMS) ** 2
-_HALF_MIN_BEAM_DIST_SQ = (Decimal(MINIMUM_DISTANCE_BETWEEN_TWO_LIGHT_BEAMS) / 2) ** 2
+# Relative distance from zero within which float64 and the numeric backend may round a velocity radicand to
+# different signs
+_RADICAND_TOLERANCE = 1e-9
+
+
+def _movement_times(v, d):
+    """
+    Calculates the times required to move distances with a given velocity, as Coordinate.__calculate_movement_time__.
+
+    Args:
+        v (float): The velocity.
+        d (numpy.ndarray): The distances to move.
+
+    Returns:
+        numpy.ndarray: The times required to move the distances.
+    """
+    a = ACCELERATION
+    return np.where(d <= v**2/(2*v), np.sqrt(2*d/a), (d/v) + (v/(2*a)))
+
+
+def _axis_velocities(d, t):
+    """
+    Calculates the maximum velocities to move distances along one axis within given times, as Coordinate.get_velocity.
+
+    Args:
+        d (numpy.ndarray): The distances to move.
+        t (numpy.ndarray): The time durations for the movements.
+
+    Returns:
+        numpy.ndarray: The maximum velocities, rounded to 10 decimal places.
+    """
+    a = ACCELERATION
+    radicand = t ** 2 - ((2 * d) / a)
+    velocities = a * t - a * np.sqrt(np.maximum(radicand, 0))
+    return np.where(radicand < 0, MAXIMUM_VELOCITY, velocities).round(10)
+
+
+def _get_step_times(dx, dy):
+    """
+    Calculates the times of straight movements whose shortest non-zero axis moves at the minimum velocity.
+
+    Args:
+        dx (numpy.ndarray): The distances along the x-axis.
+        dy (numpy.ndarray): The distances along the y-axis.
+
+    Returns:
+        numpy.ndarray: The times of the movements.
+    """
+    min_distance = np.where(dx == 0, dy, np.where(dy == 0, dx, np.minimum(dx, dy)))
+    return _movement_times(MINIMUM_VELOCITY, min_distance)
+
+
+def _segment_velocities(x0, y0, x1, y1):
+    """
+    Calculates the velocities of straight movements so that both axes arrive at the same time, with the shortest
+    non-zero axis moving at the minimum velocity.
+
+    Args:
+        x0 (numpy.ndarray): The initial x positions.
+        y0 (numpy.ndarray): The initial y positions.
+        x1 (numpy.ndarray): The final x positions.
+        y1 (numpy.ndarray): The final y positions.
+
+    Returns:
+        tuple: The velocities in the x-direction and y-direction.
+    """
+    dx = np.abs(x1 - x0)
+    dy = np.abs(y1 - y0)
+    step_time = _get_step_times(dx, dy)
+    return _axis_velocities(dx, step_time), _axis_velocities(dy, step_time)
+
+
+def _has_ambiguous_radicand(x0, y0, x1, y1):
+    """
+    Finds the movements for which _segment_velocities may round a velocity radicand to another sign than the numeric
+    backend does. The shortest axis of a movement that only accelerates has a radicand of exactly zero, whose sign is
+    left to rounding.
+
+    Args:
+        x0 (numpy.ndarray): The initial x positions.
+        y0 (numpy.ndarray): The initial y positions.
+        x1 (numpy.ndarray): The final x positions.
+        y1 (numpy.ndarray): The final y positions.
+
+    Returns:
+        numpy.ndarray: Whether the velocities of each movement should be resolved in the numeric backend.
+    """
+    dx = np.abs(x1 - x0)
+    dy = np.abs(y1 - y0)
+    step_time = _get_step_times(dx, dy)
+    tolerance = step_time ** 2 * _RADICAND_TOLERANCE
+    return (np.abs(step_time ** 2 - (2 * dx) / ACCELERATION) <= tolerance) | (np.abs(step_time ** 2 - (2 * dy) / ACCELERATION) <= tolerance)
+
+
+def _is_valid_velocity(v):
+    """
+    Checks which velocities the motors can perform.
+    """
+    return ((MINIMUM_VELOCITY <= v) & (v <= MAXIMUM_VELOCITY)) | (v == 0.0)
+
 
 class Coordinate:
     """
@@ -26,8 +123,10 @@ class Coordinate:
             x (float): The x-coordinate value.
             y (float): The y-coordinate value.
         """
-        self.x = Decimal(x)
-        self.y = Decimal(y)
+        # copy and Coordinates.add_velocity_and_current_to_coordinates create Coordinates without calling this, so
+        # attributes added here must be set there too
+        self.x = NumericBackend.number(x)
+        self.y = NumericBackend.number(y)
         self.v = None
         self.a = None
         self.lp = True
@@ -38,7 +137,7 @@ class Coordinate:
 
         Args:
             to (Coordinate): The destination coordinate.
-            time (Decimal): The time duration for the movement.
+            time (number): The time duration for the movement.
 
         Returns:
             tuple: A tuple containing the maximum velocity in the x-direction and y-direction.
@@ -53,21 +152,20 @@ class Coordinate:
         Calculates the maximum velocity for a movement from a starting position to a final position within a given time.
 
         Args:
-            i (Decimal): The initial position.
-            f (Decimal): The final position.
-            t (Decimal): The time duration for the movement.
+            i (number): The initial position.
+            f (number): The final position.
+            t (number): The time duration for the movement.
 
         Returns:
-            float: The maximum velocity.
+            number: The maximum velocity.
         """
         d = (f - i).__abs__()
-        a = Decimal(ACCELERATION)
-        try:
-            pvf = a * t - a * (t ** 2 - ((2 * d) / a)).sqrt()
-        except InvalidOperation:
-            pvf = Decimal(MAXIMUM_VELOCITY)
-        
-        return pvf
+        a = NumericBackend.number(ACCELERATION)
+        radicand = t ** 2 - ((2 * d) / a)
+        if radicand < 0:
+            return NumericBackend.number(MAXIMUM_VELOCITY)
+
+        return a * t - a * NumericBackend.sqrt(radicand)
     
     def movement_time(self, to):
         """
@@ -92,7 +190,7 @@ class Coordinate:
             d = math.fabs(yf - yi) 
             v = y_velocity
             
-        return float(self.__calculate_movement_time__(Decimal(v), Decimal(d)))
+        return float(self.__calculate_movement_time__(NumericBackend.number(v), NumericBackend.number(d)))
     
     @staticmethod
     def __calculate_movement_time__(v, d):
@@ -100,16 +198,17 @@ class Coordinate:
         Calculates the time required to move a distance with a given velocity.
         
         Args:
-            v (Decimal): The velocity.
-            d (Decimal): The distance to move.
+            v (number): The velocity.
+            d (number): The distance to move.
             
         Returns:
-            Decimal: The time required to move the distance.
+            number: The time required to move the distance.
         """
+        a = NumericBackend.number(ACCELERATION)
         if d <= v**2/(2*v):
-            return (2*d/Decimal(ACCELERATION)).sqrt()
+            return NumericBackend.sqrt(2*d/a)
         else:
-            return (d/v) + (v/(2*Decimal(ACCELERATION)))
+            return (d/v) + (v/(2*a))
 
     def __str__(self):
         """
@@ -318,7 +417,7 @@ class Coordinates:
         """
         if len(self) != 0:
             prev = self[-1]
-            if self.distance_squared(coord, prev) >= _MIN_BEAM_DIST_SQ:
+            if self.distance_squared(coord, prev) >= NumericBackend.min_beam_dist_sq:
                 self.append(coord)
         else:
             self.append(coord)
@@ -331,8 +430,9 @@ class Coordinates:
             coord (Coordinate): The Coordinate object to append.
         """
         if len(self) != 0:
+            min_beam_dist_sq = NumericBackend.min_beam_dist_sq
             for i in self:
-                if self.distance_squared(coord, i) < _MIN_BEAM_DIST_SQ:
+                if self.distance_squared(coord, i) < min_beam_dist_sq:
                     return
             self.append(coord)
         else:
@@ -348,7 +448,7 @@ class Coordinates:
         if len(self) != 0:
             prev = self[-1]
             if not prev.same_location_as(coord):
-                if self.distance_squared(coord, prev) < _HALF_MIN_BEAM_DIST_SQ:
+                if self.distance_squared(coord, prev) < NumericBackend.half_min_beam_dist_sq:
                     self.coordinates[-1] = coord
                 else:
                     self.append(coord)
@@ -377,87 +477,194 @@ class Coordinates:
         """
         Adds velocity and current values to the Coordinate objects.
 
+        Distances, velocities, currents and iteration counts are resolved for all segments at once as NumPy arrays,
+        and the multi-pass path is emitted from index arrays so every point is created exactly once.
+
         Args:
             stiffness (float): The stiffness in Pascals of the shape.
             coordinates (Coordinates): The Coordinate objects to add velocity and current values to.
             beam_diameter_mm (float): The diameter of the beam.
-        """
-        resolved_coordinates = Coordinates()
-        resolved_coordinates.append(coordinates[0])
-        
-        # get the resolved configuration for each coordinate
-        configuration = [Configuration()]
-        velocities = [None]
-        prev = coordinates[0]
-        for curr in coordinates[1:]:
-            vx, vy = -1, -1
-            while not ((MINIMUM_VELOCITY <= vx <= MAXIMUM_VELOCITY or vx == 0.0) and (MINIMUM_VELOCITY <= vy <= MAXIMUM_VELOCITY or vy == 0.0)):
-                if vy >= MAXIMUM_VELOCITY:
-                    curr.x = prev.x
-                elif vx >= MAXIMUM_VELOCITY:
-                    curr.y = prev.y
-
-                min_distance = min([i for i in [(prev.x - curr.x).__abs__(), (prev.y - curr.y).__abs__()] if i != 0])
-                step_time = Coordinate.__calculate_movement_time__(Decimal(MINIMUM_VELOCITY), min_distance)
-                vx, vy = prev.get_velocity(to=curr, time=step_time)
-
-            configuration.append(curing_calculations.get_resolved_configuration_from_velocities(vx, vy, stiffness, beam_diameter_mm))
-
-            velocities.append((vx, vy))
-            resolved_coordinates.append(curr)
-            prev = curr.copy()
+
+        Raises:
+            ValueError: If two consecutive coordinates share the same location.
+        """
+        points = list(coordinates)
+        n = len(points)
+        x = np.array([float(c.x) for c in points])
+        y = np.array([float(c.y) for c in points])
+
+        if np.any((x[1:] == x[:-1]) & (y[1:] == y[:-1])):
+            raise ValueError("Consecutive coordinates at the same location cannot be resolved into a movement.")
+
+        # Collapse moves that cannot be performed within the velocity limits onto a single axis
+        x_source, y_source = self.__resolve_axis_collapses__(x, y)
+
+        # A collapse can move a coordinate to within a motor step of the one before or after it, which leaves nothing
+        # to move, so the collapsed coordinate is dropped
+        is_collapsed = (x_source != np.arange(n)) | (y_source != np.arange(n))
+        is_empty_move = np.hypot(np.diff(x[x_source]), np.diff(y[y_source])) < MOTOR_MINIMUM_STEP_SIZE
+        is_empty_in = np.append(False, is_empty_move)
+        is_empty_out = np.append(is_empty_move & ~is_collapsed[1:], False)
+        kept = ~(is_collapsed & (is_empty_in | is_empty_out))
+        x_source, y_source = x_source[kept], y_source[kept]
+        n = len(x_source)
+        x, y = x[x_source], y[y_source]
+
+        # get the resolved configuration for each segment
+        vx, vy = _segment_velocities(x[:-1], y[:-1], x[1:], y[1:])
+        for i in np.flatnonzero(_has_ambiguous_radicand(x[:-1], y[:-1], x[1:], y[1:])).tolist():
+            vx[i], vy[i] = self.__get_backend_velocities__(points[x_source[i]].x, points[y_source[i]].y, points[x_source[i + 1]].x, points[y_source[i + 1]].y)
+        currents, iterations = curing_calculations.get_resolved_configurations_from_velocities(vx, vy, stiffness, beam_diameter_mm)
 
         # The value of iterations that all configurations have in common
-        base_iterations = min([i.iterations for i in configuration[1:]])
+        base_iterations = int(iterations.min())
+        remaining = np.concatenate(([0], iterations - base_iterations))
+        lamps = np.array([c.lp for c in points], dtype=bool)[kept]
 
-        # Add velocity and current values to the coordinates and resolve the iterations
-        for i in range(len(resolved_coordinates)):
-            resolved_coordinates[i].v = velocities[i]
-            resolved_coordinates[i].a = configuration[i].current
-            configuration[i].iterations -= base_iterations
+        # Each emitted point is described by the index of its position, the index of the segment whose velocity and
+        # current it uses (0 carries none) and its lamp state
+        sources = [np.arange(n)]
+        motions = [np.arange(n)]
+        lamp_states = [lamps]
 
         # Copy the coordinates based on the base_iterations
-        original_coordinates = Coordinates()
-        for c in resolved_coordinates:
-            original_coordinates.append(c.copy())
-        for i in range(base_iterations - 1):
-            copy_to_add = Coordinates()
-            for c in original_coordinates:
-                copy_to_add.append(c.copy())
-            copy_to_add[0].lp = False
-            if copy_to_add[0].same_location_as(resolved_coordinates[-1]):
-                copy_to_add.remove(0)
-
-            resolved_coordinates += copy_to_add
+        start = 1 if (x[0] == x[-1] and y[0] == y[-1]) else 0
+        repeated_lamps = lamps[start:].copy()
+        if start == 0:
+            repeated_lamps[0] = False
+        for _ in range(base_iterations - 1):
+            sources.append(np.arange(start, n))
+            motions.append(np.arange(start, n))
+            lamp_states.append(repeated_lamps)
 
         # Resolve the remaining iterations
-        last = original_coordinates[0].copy()
-        for i in range(1, len(original_coordinates)):
-            if configuration[i].iterations > 0 and not last.same_location_as(original_coordinates[i]):
-                resolved_coordinates.append(original_coordinates[i].copy())
-                resolved_coordinates[-1].lp = False
-
-            while configuration[i].iterations > 0:
-                prev = original_coordinates[i - 1].copy()
-                curr = original_coordinates[i].copy()
-
-                if configuration[i].iterations == 1:
-                    prev.lp = False
-                    configuration[i].iterations -= 1
-                else:
-                    prev.a = curr.a
-                    prev.v = curr.v
-                    prev.lp = curr.lp
-                    configuration[i].iterations -= 2
-
-                resolved_coordinates.append(prev)
-                resolved_coordinates.append(curr)
-                
-                last = curr
-        
+        segments = np.flatnonzero(remaining > 0)
+        if segments.size:
+            sources_, motions_, lamp_states_ = self.__expand_remaining_iterations__(segments, remaining[segments], x, y, lamps)
+            sources.append(sources_)
+            motions.append(motions_)
+            lamp_states.append(lamp_states_)
+
+        x_positions = [points[i].x for i in x_source]
+        y_positions = [points[i].y for i in y_source]
+        velocities = [None] + list(zip(vx.tolist(), vy.tolist()))
+        currents = [None] + currents.tolist()
+
+        sources = np.concatenate(sources).tolist()
+        motions = np.concatenate(motions).tolist()
         self.clear()
-        for c in resolved_coordinates:
-            self.append(c)
+        self.x = [x_positions[s] for s in sources]
+        self.y = [y_positions[s] for s in sources]
+        self.v = [velocities[m] for m in motions]
+
+        # The points skip Coordinate.__init__, which would convert the positions again, so they set every attribute
+        # it sets. Keep the two in step.
+        for (px, py, v, m, lp) in zip(self.x, self.y, self.v, motions, np.concatenate(lamp_states).tolist()):
+            c = Coordinate.__new__(Coordinate)
+            c.x = px
+            c.y = py
+            c.v = v
+            c.a = currents[m]
+            c.lp = lp
+            self.coordinates.append(c)
+
+    @staticmethod
+    def __get_backend_velocities__(x0, y0, x1, y1):
+        """
+        Calculates the velocities of a straight movement in the numeric backend, as _segment_velocities does in
+        float64.
+
+        Args:
+            x0 (number): The initial x position.
+            y0 (number): The initial y position.
+            x1 (number): The final x position.
+            y1 (number): The final y position.
+
+        Returns:
+            tuple: The velocities in the x-direction and y-direction.
+        """
+        min_distance = min([i for i in [(x1 - x0).__abs__(), (y1 - y0).__abs__()] if i != 0])
+        step_time = Coordinate.__calculate_movement_time__(NumericBackend.number(MINIMUM_VELOCITY), min_distance)
+        return float(Coordinate.__calculate_velocity__(x0, x1, step_time).__round__(10)), float(Coordinate.__calculate_velocity__(y0, y1, step_time).__round__(10))
+
+    @staticmethod
+    def __resolve_axis_collapses__(x, y):
+        """
+        Finds the position each coordinate ends up at once moves that exceed the maximum velocity on one axis are
+        collapsed onto the other axis (x takes the previous x when vy is too high, otherwise y takes the previous y
+        when vx is too high).
+
+        A collapse moves a coordinate and therefore changes the next segment, so segments are re-evaluated in rounds
+        until no position changes. Only segments following a moved coordinate are re-evaluated, and every round fixes
+        at least one more coordinate in order, which yields the same result as resolving the segments one by one.
+
+        Args:
+            x (numpy.ndarray): The x positions of the coordinates.
+            y (numpy.ndarray): The y positions of the coordinates.
+
+        Returns:
+            tuple: For each coordinate, the index of the coordinate whose x position it takes and the index of the
+                coordinate whose y position it takes.
+        """
+        n = len(x)
+        x_source = np.arange(n)
+        y_source = np.arange(n)
+        pending = np.arange(1, n)
+        while pending.size:
+            prev_x_source = x_source[pending - 1]
+            prev_y_source = y_source[pending - 1]
+            vx, vy = _segment_velocities(x[prev_x_source], y[prev_y_source], x[pending], y[pending])
+
+            invalid = ~(_is_valid_velocity(vx) & _is_valid_velocity(vy))
+            collapse_x = invalid & (vy >= MAXIMUM_VELOCITY)
+            collapse_y = invalid & ~collapse_x & (vx >= MAXIMUM_VELOCITY)
+            new_x_source = np.where(collapse_x, prev_x_source, pending)
+            new_y_source = np.where(collapse_y, prev_y_source, pending)
+
+            changed = (x[new_x_source] != x[x_source[pending]]) | (y[new_y_source] != y[y_source[pending]])
+            x_source[pending] = new_x_source
+            y_source[pending] = new_y_source
+            pending = pending[changed] + 1
+            pending = pending[pending < n]
+
+        return x_source, y_source
+
+    @staticmethod
+    def __expand_remaining_iterations__(segments, remaining, x, y, lamps):
+        """
+        Builds the extra passes of segments that need more iterations than the base iterations. Every segment is
+        passed back and forth in pairs, with a lamp-off return when an odd pass is left, and is reached with a lamp-off
+        travel move when the path is not already there.
+
+        Args:
+            segments (numpy.ndarray): The indices of the segments end points with remaining iterations, ascending.
+            remaining (numpy.ndarray): The remaining iterations of each segment.
+            x (numpy.ndarray): The resolved x positions of the coordinates.
+            y (numpy.ndarray): The resolved y positions of the coordinates.
+            lamps (numpy.ndarray): The lamp state of each coordinate.
+
+        Returns:
+            tuple: The position indices, velocity/current indices and lamp states of the emitted points.
+        """
+        last = np.concatenate(([0], segments[:-1]))
+        travel = ~((x[last] == x[segments]) & (y[last] == y[segments]))
+        passes = (remaining + 1) // 2
+        counts = travel + 2 * passes
+
+        owner = np.repeat(np.arange(len(segments)), counts)
+        offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        segment = segments[owner]
+
+        # Position in the passes after the travel move: even entries start a pass, odd entries end it
+        j = offset - travel[owner]
+        is_travel = j < 0
+        is_start = ~is_travel & (j % 2 == 0)
+        is_return = is_start & (remaining[owner] % 2 == 1) & (j // 2 == passes[owner] - 1)
+
+        sources = np.where(is_start, segment - 1, segment)
+        motions = np.where(is_return, segment - 1, segment)
+        lamp_states = lamps[segment] & ~is_travel & ~is_return
+        return sources, motions, lamp_states
 
     def normalize(self, center, rotation, stiffness, beam_diameter_mm, is_layer=True, is_multiple_layers=True):
         """
@@ -491,6 +698,22 @@ class Coordinates:
             self.add_velocity_and_current_to_coordinates(stiffness=stiffness, coordinates=self.coordinates, beam_diameter_mm=beam_diameter_mm)
             self.coordinates[0].lp = False
 
+        self.snap_to_motor_steps()
+
+    def snap_to_motor_steps(self):
+        """
+        Snaps every position onto the motor step grid when the active numeric backend is quantized.
+        Velocities and currents are resolved before snapping, so they are unaffected.
+        """
+        if not NumericBackend.backend.is_quantized:
+            return
+
+        for (i, c) in enumerate(self.coordinates):
+            c.x = NumericBackend.position(c.x)
+            c.y = NumericBackend.position(c.y)
+            self.x[i] = c.x
+            self.y[i] = c.y
+
     def rotate_coordinates(self, center, rotation):
         centroid = self.get_centroid()
         for (i, v) in tqdm(enumerate(self), desc="Calculating Transformations"):
@@ -516,14 +739,39 @@ class Coordinates:
         delta_x = c.x - centroid.x
         delta_y = c.y - centroid.y
         rotation = math.radians(rotation)
-        cos_theta = Decimal(math.cos(rotation))
-        sin_theta = Decimal(math.sin(rotation))
+        cos_theta = NumericBackend.number(math.cos(rotation))
+        sin_theta = NumericBackend.number(math.sin(rotation))
 
         new_x = delta_x * cos_theta - delta_y * sin_theta + centroid.x
         new_y = delta_x * sin_theta + delta_y * cos_theta + centroid.y
 
         return Coordinate(new_x - c.x, new_y - c.y)
 
+    def get_reversed(self):
+        """
+        Returns the toolpath traversed from its last point to its first. A point's velocity, current and lamp state
+        describe the move into it, so each reversed point takes them from the point that followed it. The new first
+        point is only travelled to, with the lamp off.
+
+        Returns:
+            Coordinates: The reversed toolpath.
+        """
+        reversed_coordinates = Coordinates()
+        n = len(self.coordinates)
+        for i in range(n - 1, -1, -1):
+            c = self.coordinates[i].copy()
+            if i == n - 1:
+                c.v = None
+                c.a = None
+                c.lp = False
+            else:
+                following = self.coordinates[i + 1]
+                c.v = following.v
+                c.a = following.a
+                c.lp = following.lp
+            reversed_coordinates.append(c)
+        return reversed_coordinates
+
     def get_centroid(self):
         """
         Calculates the centroid of the Coordinate objects.
@@ -563,7 +811,7 @@ class Coordinates:
         delta_x = c2.x - c1.x
         delta_y = c2.y - c1.y
 
-        return (delta_x ** 2 + delta_y ** 2).sqrt()
+        return NumericBackend.sqrt(delta_x ** 2 + delta_y ** 2)
 
     @staticmethod
     def distance_squared(c1, c2):
@@ -639,42 +887,69 @@ class Coordinates:
 
         return inside
 
-    def fill(self, uses_step_coordinates=False):
+    def fill(self, uses_step_coordinates=False, holes=None, keeps_all_parts=False):
         """
         Fills the shape defined by the Coordinate objects with points.
 
+        Args:
+            uses_step_coordinates (bool, optional): Whether to interpolate the filled outlines with step coordinates.
+                Defaults to False.
+            holes (list, optional): The Coordinates of outlines inside the shape that are left unfilled. Defaults to None.
+            keeps_all_parts (bool, optional): Whether to keep filling every part an inward offset splits the shape into,
+                instead of only the largest one. Defaults to False.
+
         Returns:
             Coordinates: An array of Coordinate objects representing the filled shape.
         """
         # Convert shape's coordinates to a shapely Polygon
         coordinates = [(coord.x, coord.y) for coord in self.coordinates]
+        interiors = [[(coord.x, coord.y) for coord in hole.coordinates] for hole in holes] if holes else None
 
-        original_polygon = Polygon(coordinates)
+        original_polygon = Polygon(coordinates, interiors)
         original_polygon = orient(original_polygon, sign=1.0)  # Ensure consistent orientation
 
         # Initialize variables
         distance = 0
         offset_polygons = []
 
-        # Generate inward offsets until the polygon disappears
-        while True:
-            offset_polygon = original_polygon.buffer(-distance)
-            if offset_polygon.is_empty:
-                break
-            if offset_polygon.geom_type == 'MultiPolygon':
-                # Handle cases where the offset results in multiple polygons
-                offset_polygon = max(offset_polygon.geoms, key=lambda p: p.area)
-            offset_polygons.append(offset_polygon)
-            distance += MINIMUM_DISTANCE_BETWEEN_TWO_LIGHT_BEAMS
-
-        # Collect points from all offset polygons
+        if keeps_all_parts:
+            # Inward offsets add up, so every part is offset on its own and filled before moving on to the next one
+            parts = [original_polygon.buffer(0)]
+            while parts:
+                part = parts.pop()
+                if part.is_empty:
+                    continue
+                if part.geom_type == 'MultiPolygon':
+                    parts.extend(reversed(part.geoms))
+                    continue
+                offset_polygons.append(part)
+                parts.append(part.buffer(-MINIMUM_DISTANCE_BETWEEN_TWO_LIGHT_BEAMS))
+        else:
+            # Generate inward offsets until the polygon disappears
+            while True:
+                offset_polygon = original_polygon.buffer(-distance)
+                if offset_polygon.is_empty:
+                    break
+                if offset_polygon.geom_type == 'MultiPolygon':
+                    # Handle cases where the offset results in multiple polygons
+                    offset_polygon = max(offset_polygon.geoms, key=lambda p: p.area)
+                offset_polygons.append(offset_polygon)
+                distance += MINIMUM_DISTANCE_BETWEEN_TWO_LIGHT_BEAMS
+
+        # Collect points from all offset polygons, including the outlines around holes. Corners closer than a motor
+        # step to the previous point cannot be moved to and are skipped.
         points = Coordinates()
+        previous = None
         for poly in offset_polygons:
-            x, y = poly.exterior.coords.xy
-            for i, (xi, yi) in enumerate(zip(x, y)):
-                c = Coordinate(xi, yi)
-                c.lp = (i != 0)
-                points.append(c)
+            for ring in [poly.exterior, *poly.interiors]:
+                x, y = ring.coords.xy
+                for i, (xi, yi) in enumerate(zip(x, y)):
+                    if previous and math.hypot(xi - previous[0], yi - previous[1]) < MOTOR_MINIMUM_STEP_SIZE:
+                        continue
+                    c = Coordinate(xi, yi)
+                    c.lp = (i != 0)
+                    points.append(c)
+                    previous = (xi, yi)
         
         if uses_step_coordinates:
             points = points.fill_line_segments()
@@ -808,3 +1083,492 @@ class Coordinates:
                 fixed_coords.append(current_coordinate)
         
         return fixed_coords
+
+
+class CoordinateArray:
+    """
+    Represents a collection of coordinates stored as columnar NumPy arrays.
+
+    Each point is stored as float64 x/y positions, float64 x/y velocities, a float64 current and a boolean
+    lamp state instead of a Coordinate object holding Decimals. Missing velocities and currents (None on a
+    Coordinate) are stored as NaN. The container exposes the same append/__getitem__/__iter__/__add__ surface
+    as Coordinates, materializing Coordinate objects on access so existing consumers keep working.
+    """
+
+    def __init__(self, capacity=0):
+        """
+        Initializes an empty CoordinateArray object.
+
+        Args:
+            capacity (int, optional): The number of points to preallocate. Defaults to 0.
+        """
+        self._length = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        """
+        Allocates new column arrays, preserving the stored points.
+
+        Args:
+            capacity (int): The number of points the columns should hold.
+        """
+        columns = {
+            '_x': np.empty(capacity, dtype=np.float64),
+            '_y': np.empty(capacity, dtype=np.float64),
+            '_vx': np.empty(capacity, dtype=np.float64),
+            '_vy': np.empty(capacity, dtype=np.float64),
+            '_a': np.empty(capacity, dtype=np.float64),
+            '_lp': np.empty(capacity, dtype=bool),
+        }
+        for name, column in columns.items():
+            if self._length:
+                column[:self._length] = getattr(self, name)[:self._length]
+            setattr(self, name, column)
+
+    def _reserve(self, additional):
+        """
+        Grows the columns geometrically so that `additional` more points fit.
+
+        Args:
+            additional (int): The number of points about to be added.
+        """
+        required = self._length + additional
+        capacity = len(self._x)
+        if required > capacity:
+            self._allocate(max(required, 2 * capacity, 16))
+
+    @classmethod
+    def from_arrays(cls, x, y, vx=None, vy=None, a=None, lp=None):
+        """
+        Creates a CoordinateArray from column arrays.
+
+        Args:
+            x (array-like): The x-coordinate values in mm.
+            y (array-like): The y-coordinate values in mm.
+            vx (array-like, optional): The x-velocities in mm/s. Defaults to NaN (no velocity).
+            vy (array-like, optional): The y-velocities in mm/s. Defaults to NaN (no velocity).
+            a (array-like, optional): The lamp currents in A. Defaults to NaN (no current).
+            lp (array-like, optional): Whether the lamp is on for each point. Defaults to True.
+
+        Returns:
+            CoordinateArray: The new CoordinateArray object.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        length = len(x)
+        array = cls(length)
+        array._x[:] = x
+        array._y[:] = np.asarray(y, dtype=np.float64)
+        array._vx[:] = np.nan if vx is None else np.asarray(vx, dtype=np.float64)
+        array._vy[:] = np.nan if vy is None else np.asarray(vy, dtype=np.float64)
+        array._a[:] = np.nan if a is None else np.asarray(a, dtype=np.float64)
+        array._lp[:] = True if lp is None else np.asarray(lp, dtype=bool)
+        array._length = length
+        return array
+
+    @classmethod
+    def from_coordinates(cls, coordinates):
+        """
+        Creates a CoordinateArray from an iterable of Coordinate objects.
+
+        Args:
+            coordinates (Coordinates): The coordinates to convert.
+
+        Returns:
+            CoordinateArray: The new CoordinateArray object.
+        """
+        array = cls()
+        array.extend(coordinates)
+        return array
+
+    @staticmethod
+    def buffer_size(length):
+        """
+        Returns the number of bytes needed to store points in a flat buffer.
+
+        Args:
+            length (int): The number of points.
+
+        Returns:
+            int: The buffer size in bytes.
+        """
+        return length * (5 * np.dtype(np.float64).itemsize + np.dtype(bool).itemsize)
+
+    @classmethod
+    def from_buffer(cls, buffer, length):
+        """
+        Creates a CoordinateArray whose columns are views into a flat buffer, without copying. The buffer holds the
+        float64 x, y, vx, vy and a columns back to back, followed by the boolean lp column.
+
+        The columns stay views until the array grows, at which point they are copied into new arrays.
+
+        Args:
+            buffer (buffer): The buffer holding the points, at least buffer_size(length) bytes long.
+            length (int): The number of points.
+
+        Returns:
+            CoordinateArray: The new CoordinateArray object.
+        """
+        array = cls()
+        floats = np.frombuffer(buffer, dtype=np.float64, count=5 * length)
+        array._x, array._y, array._vx, array._vy, array._a = (floats[i * length:(i + 1) * length] for i in range(5))
+        array._lp = np.frombuffer(buffer, dtype=bool, count=length, offset=floats.nbytes)
+        array._length = length
+        return array
+
+    def to_buffer(self, buffer):
+        """
+        Copies the points into a flat buffer in the layout read by from_buffer.
+
+        Args:
+            buffer (buffer): A writable buffer of at least buffer_size(len(self)) bytes.
+        """
+        view = CoordinateArray.from_buffer(buffer, self._length)
+        for name in ('_x', '_y', '_vx', '_vy', '_a', '_lp'):
+            getattr(view, name)[:] = getattr(self, name)[:self._length]
+
+    def to_coordinates(self):
+        """
+        Converts the CoordinateArray into a Coordinates object.
+
+        Returns:
+            Coordinates: A Coordinates object holding one Coordinate per point.
+        """
+        coordinates = Coordinates()
+        for c in self:
+            coordinates.append(c)
+        return coordinates
+
+    @property
+    def x(self):
+        """
+        numpy.ndarray: A view of the x-coordinate column.
+        """
+        return self._x[:self._length]
+
+    @property
+    def y(self):
+        """
+        numpy.ndarray: A view of the y-coordinate column.
+        """
+        return self._y[:self._length]
+
+    @property
+    def vx(self):
+        """
+        numpy.ndarray: A view of the x-velocity column. NaN marks points without a velocity.
+        """
+        return self._vx[:self._length]
+
+    @property
+    def vy(self):
+        """
+        numpy.ndarray: A view of the y-velocity column. NaN marks points without a velocity.
+        """
+        return self._vy[:self._length]
+
+    @property
+    def a(self):
+        """
+        numpy.ndarray: A view of the current column. NaN marks points without a current.
+        """
+        return self._a[:self._length]
+
+    @property
+    def lp(self):
+        """
+        numpy.ndarray: A view of the lamp state column.
+        """
+        return self._lp[:self._length]
+
+    @property
+    def nbytes(self):
+        """
+        int: The number of bytes used by the stored points.
+        """
+        return sum(column.nbytes for column in (self.x, self.y, self.vx, self.vy, self.a, self.lp))
+
+    def __str__(self):
+        """
+        Returns a string representation of the CoordinateArray object.
+
+        Returns:
+            str: The string representation of the CoordinateArray object.
+        """
+        return '\n'.join([str(coord) for coord in self])
+
+    def __repr__(self):
+        """
+        Returns a string representation of the CoordinateArray object.
+
+        Returns:
+            str: The string representation of the CoordinateArray object.
+        """
+        return self.__str__()
+
+    def __len__(self):
+        """
+        Returns the number of points in the CoordinateArray object.
+
+        Returns:
+            int: The number of points.
+        """
+        return self._length
+
+    def __getstate__(self):
+        """
+        Returns the picklable state, trimmed to the stored points.
+
+        Returns:
+            dict: The state of the CoordinateArray object.
+        """
+        return {'x': self.x, 'y': self.y, 'vx': self.vx, 'vy': self.vy, 'a': self.a, 'lp': self.lp}
+
+    def __setstate__(self, state):
+        """
+        Restores the CoordinateArray object from a pickled state.
+
+        Args:
+            state (dict): The state returned by __getstate__.
+        """
+        self._length = 0
+        self._allocate(len(state['x']))
+        for name in ('x', 'y', 'vx', 'vy', 'a', 'lp'):
+            getattr(self, '_' + name)[:] = state[name]
+        self._length = len(state['x'])
+
+    def _coordinate_at(self, index):
+        """
+        Materializes the point at the given index as a Coordinate object.
+
+        Args:
+            index (int): The non-negative index of the point.
+
+        Returns:
+            Coordinate: A new Coordinate holding the point's values.
+        """
+        c = Coordinate(self._x[index], self._y[index])
+        vx, vy, a = self._vx[index], self._vy[index], self._a[index]
+        c.v = None if math.isnan(vx) else (float(vx), float(vy))
+        c.a = None if math.isnan(a) else float(a)
+        c.lp = bool(self._lp[index])
+        return c
+
+    def __getitem__(self, item):
+        """
+        Returns the point at the specified index as a Coordinate, or a slice as a new CoordinateArray.
+
+        Modifying the returned Coordinate does not modify the CoordinateArray; use __setitem__ to write it back.
+
+        Args:
+            item (int or slice): The index or slice of the points.
+
+        Returns:
+            Coordinate or CoordinateArray: The selected point(s).
+        """
+        if isinstance(item, slice):
+            return CoordinateArray.from_arrays(self.x[item], self.y[item], self.vx[item], self.vy[item], self.a[item], self.lp[item])
+
+        if item < 0:
+            item += self._length
+        if not 0 <= item < self._length:
+            raise IndexError("CoordinateArray index out of range")
+        return self._coordinate_at(item)
+
+    def __setitem__(self, index, coordinate):
+        """
+        Replaces the point at the specified index.
+
+        Args:
+            index (int): The index of the point.
+            coordinate (Coordinate): The Coordinate holding the new values.
+        """
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("CoordinateArray index out of range")
+        self._store(index, coordinate)
+
+    def __iter__(self):
+        """
+        Returns an iterator over the points as Coordinate objects.
+
+        Returns:
+            iterator: An iterator of Coordinate objects.
+        """
+        for i in range(self._length):
+            yield self._coordinate_at(i)
+
+    def __add__(self, rhs):
+        """
+        Concatenates two collections of coordinates.
+
+        Args:
+            rhs (CoordinateArray or Coordinates): The coordinates to concatenate with.
+
+        Returns:
+            CoordinateArray: A new CoordinateArray that is the concatenation of both collections.
+        """
+        new_coords = CoordinateArray(self._length + len(rhs))
+        new_coords.extend(self)
+        new_coords.extend(rhs)
+        return new_coords
+
+    def __iadd__(self, rhs):
+        """
+        Appends another collection of coordinates in place.
+
+        Args:
+            rhs (CoordinateArray or Coordinates): The coordinates to append.
+
+        Returns:
+            CoordinateArray: This CoordinateArray object.
+        """
+        self.extend(rhs)
+        return self
+
+    def _store(self, index, coordinate):
+        """
+        Writes a Coordinate's values into the columns at the given index.
+
+        Args:
+            index (int): The index to write to.
+            coordinate (Coordinate): The Coordinate to store.
+        """
+        self._x[index] = coordinate.x
+        self._y[index] = coordinate.y
+        if coordinate.v is None:
+            self._vx[index] = self._vy[index] = np.nan
+        else:
+            self._vx[index], self._vy[index] = coordinate.v
+        self._a[index] = np.nan if coordinate.a is None else coordinate.a
+        self._lp[index] = coordinate.lp
+
+    def append(self, coordinate):
+        """
+        Appends a Coordinate object to the CoordinateArray object.
+
+        Args:
+            coordinate (Coordinate): The Coordinate object to append.
+        """
+        self._reserve(1)
+        self._store(self._length, coordinate)
+        self._length += 1
+
+    def extend(self, coordinates):
+        """
+        Appends a collection of coordinates to the CoordinateArray object.
+
+        Args:
+            coordinates (CoordinateArray or iterable of Coordinate): The coordinates to append.
+        """
+        if isinstance(coordinates, CoordinateArray):
+            count = len(coordinates)
+            self._reserve(count)
+            end = self._length + count
+            for name in ('_x', '_y', '_vx', '_vy', '_a', '_lp'):
+                getattr(self, name)[self._length:end] = getattr(coordinates, name)[:count]
+            self._length = end
+            return
+
+        if isinstance(coordinates, Coordinates):
+            coordinates = coordinates.coordinates
+        self._reserve(len(coordinates))
+        for c in coordinates:
+            self._store(self._length, c)
+            self._length += 1
+
+    def clear(self):
+        """
+        Clears the CoordinateArray object.
+        """
+        self._length = 0
+
+    def translate(self, dx, dy):
+        """
+        Translates every point by the given offsets.
+
+        Args:
+            dx (float): The offset along the x-axis in mm.
+            dy (float): The offset along the y-axis in mm.
+        """
+        self.x[:] += float(dx)
+        self.y[:] += float(dy)
+
+    def snap_to_motor_steps(self):
+        """
+        Snaps every position onto the motor step grid when the active numeric backend is quantized.
+        """
+        if not NumericBackend.backend.is_quantized:
+            return
+
+        self.x[:] = np.round(self.x / MOTOR_MINIMUM_STEP_SIZE) * MOTOR_MINIMUM_STEP_SIZE
+        self.y[:] = np.round(self.y / MOTOR_MINIMUM_STEP_SIZE) * MOTOR_MINIMUM_STEP_SIZE
+
+    def get_x_coordinates(self):
+        """
+        Returns the x-coordinates of the points.
+
+        Returns:
+            numpy.ndarray: A view of the x-coordinates.
+        """
+        return self.x
+
+    def get_y_coordinates(self):
+        """
+        Returns the y-coordinates of the points.
+
+        Returns:
+            numpy.ndarray: A view of the y-coordinates.
+        """
+        return self.y
+
+    def get_reversed(self):
+        """
+        Returns the toolpath traversed from its last point to its first, matching Coordinates.get_reversed.
+
+        Returns:
+            CoordinateArray: The reversed toolpath.
+        """
+        if self._length == 0:
+            return CoordinateArray()
+
+        def shifted(column, first):
+            return np.concatenate(([first], column[:0:-1]))
+
+        return CoordinateArray.from_arrays(self.x[::-1], self.y[::-1], shifted(self.vx, np.nan), shifted(self.vy, np.nan), shifted(self.a, np.nan), shifted(self.lp, False))
+
+    def get_centroid(self):
+        """
+        Calculates the centroid of the lamp-on points, matching Coordinates.get_centroid.
+
+        Returns:
+            Coordinate: The centroid coordinate.
+        """
+        included = self.lp.copy()
+        if self._length and self._x[0] == self._x[self._length - 1] and self._y[0] == self._y[self._length - 1]:
+            included[-1] = False
+
+        return Coordinate(float(np.mean(self.x[included])), float(np.mean(self.y[included])))
+
+    def plot(self, plot_lines=True, plot_points=False, show=True):
+        """
+        Plots the coordinates on a 2D graph.
+
+        Args:
+            plot_lines (bool, optional): Whether to plot lines connecting the coordinates. Defaults to True.
+            plot_points (bool, optional): Whether to plot points at the coordinates. Defaults to False.
+            show (bool, optional): Whether to display the plot. Defaults to True.
+
+        Returns:
+            matplotlib.pyplot: The plot object.
+        """
+        if plot_lines:
+            plt.plot(self.x, self.y)
+        if plot_points:
+            plt.plot(self.x, self.y, '.', color='black')
+
+        plt.axis('square')
+        if show:
+            plt.show()
+
+        return plt
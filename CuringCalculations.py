@@ -1,7 +1,19 @@
+import os
+import json
 import math
-import pandas as pd
+import hashlib
+import numpy as np
 from Constants import MAXIMUM_CURRENT, MINIMUM_CURRENT
 
+CURING_CALCULATIONS_DATA_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'Curing Calculations Data.xlsx')
+
+# The parsed calibration is cached next to the Excel file, e.g. 'Curing Calculations Data.cache.json'
+CACHE_SUFFIX = '.cache.json'
+CACHE_VERSION = 1
+
+# The most configurations resolve_configuration keeps before it starts over
+RESOLVED_CONFIGURATIONS_SIZE = 4096
+
 
 class Configuration:
     """
@@ -29,11 +41,77 @@ class CuringCalculations:
     """
     Performs curing calculations based on given parameters.
     """
-    def __init__(self):
+    def __init__(self, data_path=CURING_CALCULATIONS_DATA_PATH):
+        """
+        Initializes the CuringCalculations object. The curing calculations data is read from the Excel file the first
+        time the average ratio is needed.
+
+        Args:
+            data_path (str, optional): The path of the curing calculations Excel file. Defaults to the file next to this module.
+        """
+        self.data_path = data_path
+        self.cache_path = os.path.splitext(data_path)[0] + CACHE_SUFFIX
+        self._average_ratio = None
+        self.resolved_configurations = {}
+
+    @property
+    def average_ratio(self):
+        """
+        The average stiffness-to-photon ratio of the calibration data, loaded on first access.
+
+        Returns:
+            float: The average stiffness-to-photon ratio.
         """
-        Initializes the CuringCalculations object and reads the curing calculations data from an Excel file.
+        if self._average_ratio is None:
+            self.average_ratio = self.load_average_ratio()
+        return self._average_ratio
+
+    @average_ratio.setter
+    def average_ratio(self, average_ratio):
+        """
+        Sets the average stiffness-to-photon ratio and forgets the configurations resolved with the previous one.
+
+        Args:
+            average_ratio (float): The average stiffness-to-photon ratio.
+        """
+        self._average_ratio = average_ratio
+        self.resolved_configurations = {}
+
+    def load_average_ratio(self):
         """
-        df = pd.read_excel('Curing Calculations Data.xlsx')
+        Loads the average stiffness-to-photon ratio from the cache file, or from the Excel file when the cache is
+        missing or was created from a different version of the Excel file. A fresh cache is written after parsing.
+
+        Returns:
+            float: The average stiffness-to-photon ratio.
+        """
+        stat = os.stat(self.data_path)
+        cache = self.read_cache()
+        if cache is not None:
+            source = cache['source']
+            if source['mtime_ns'] == stat.st_mtime_ns and source['size'] == stat.st_size:
+                return cache['average_ratio']
+
+            # A checkout or copy changes the modification time without changing the data
+            digest = self.get_data_digest()
+            if source['sha256'] == digest:
+                self.write_cache(cache['average_ratio'], stat, digest)
+                return cache['average_ratio']
+
+        average_ratio = self.parse_average_ratio()
+        self.write_cache(average_ratio, stat, self.get_data_digest())
+        return average_ratio
+
+    def parse_average_ratio(self):
+        """
+        Reads the curing calculations data from the Excel file and averages the stiffness-to-photon ratio of every row.
+
+        Returns:
+            float: The average stiffness-to-photon ratio.
+        """
+        import pandas as pd
+
+        df = pd.read_excel(self.data_path)
         stiffness_to_photon_ratios = []
         for index, row in df.iterrows():
             beam_diameter = row['Beam Diameter (mm)']
@@ -43,7 +121,66 @@ class CuringCalculations:
             total_photon_exposure_per_pixel = self.get_total_photon_exposure_per_pixel(beam_diameter, current, velocity)
             stiffness_to_photon_ratios.append(self.calculate_stiffness_to_photon_ratio(stiffness, total_photon_exposure_per_pixel))
 
-        self.average_ratio = sum(stiffness_to_photon_ratios) / len(stiffness_to_photon_ratios)
+        return float(sum(stiffness_to_photon_ratios) / len(stiffness_to_photon_ratios))
+
+    def get_data_digest(self):
+        """
+        Calculates the digest used to recognize the Excel file when its modification time changes.
+
+        Returns:
+            str: The SHA-256 digest of the Excel file.
+        """
+        with open(self.data_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def read_cache(self):
+        """
+        Reads the cache file.
+
+        Returns:
+            dict: The cached data, or None if there is no readable cache or it is not laid out as write_cache writes it.
+        """
+        try:
+            with open(self.cache_path) as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if not isinstance(cache, dict) or cache.get('version') != CACHE_VERSION:
+            return None
+        source = cache.get('source')
+        if not isinstance(source, dict) or not isinstance(source.get('sha256'), str):
+            return None
+        numbers = [source.get('mtime_ns'), source.get('size'), cache.get('average_ratio')]
+        if not all(isinstance(number, (int, float)) and not isinstance(number, bool) for number in numbers):
+            return None
+        return cache
+
+    def write_cache(self, average_ratio, stat, digest):
+        """
+        Writes the cache file. The file is replaced atomically so concurrent workers never read a partial cache, and
+        failures (e.g. a read-only checkout) are ignored since the cache is only an optimization.
+
+        Args:
+            average_ratio (float): The average stiffness-to-photon ratio.
+            stat (os.stat_result): The status of the Excel file the ratio was read from.
+            digest (str): The SHA-256 digest of the Excel file.
+        """
+        cache = {
+            'version': CACHE_VERSION,
+            'source': {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': digest},
+            'average_ratio': average_ratio,
+        }
+        temporary_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary_path, 'w') as f:
+                json.dump(cache, f)
+            os.replace(temporary_path, self.cache_path)
+        except OSError:
+            try:
+                os.remove(temporary_path)
+            except OSError:
+                pass
 
     def calculate_stiffness_to_photon_ratio(self, stiffness, photon_exposure):
         """
@@ -117,22 +254,114 @@ class CuringCalculations:
         target_current = (target_photon_exposure * beam_area) / exposure_time_per_pixel
         return target_current
     
-    def get_resolved_configuration_from_velocities(self, vx, vy, stiffness, beam_diameter_mm):
-        configuration = Configuration()
+    def get_minimum_iterations(self, velocity, stiffness, beam_diameter_mm):
+        """
+        Calculates the minimum number of iterations needed to keep the current at or below MAXIMUM_CURRENT.
+        The current for n iterations is the single-pass current divided by n, so the count follows in closed form.
+        It is then checked against the exact per-iteration current to absorb floating-point rounding at the boundary.
+
+        Args:
+            velocity (float): The velocity value in mm/s.
+            stiffness (float): The stiffness in Pa.
+            beam_diameter_mm (float): The beam diameter in mm.
+
+        Returns:
+            int: The minimum number of iterations.
+        """
+        target_exposure = self.calculate_stiffness_to_photon_ratio(stiffness, self.average_ratio)
+        single_pass_current = self.get_current_based_on_target_photon_exposure(beam_diameter_mm, velocity, target_exposure)
+        iterations = max(1, math.ceil(single_pass_current / MAXIMUM_CURRENT))
+
+        while iterations > 1 and self.get_current_based_on_target_photon_exposure(beam_diameter_mm, velocity, target_exposure / (iterations - 1)) <= MAXIMUM_CURRENT:
+            iterations -= 1
+        while self.get_current_based_on_target_photon_exposure(beam_diameter_mm, velocity, target_exposure / iterations) > MAXIMUM_CURRENT:
+            iterations += 1
+        return iterations
+
+    def resolve_configuration(self, velocity, stiffness, beam_diameter_mm):
+        """
+        Resolves the current and iterations for curing at a velocity. Results are memoized in resolved_configurations
+        until the calibration changes, as shapes repeat the same few velocities for thousands of segments.
+
+        Args:
+            velocity (float): The velocity value in mm/s.
+            stiffness (float): The stiffness in Pa.
+            beam_diameter_mm (float): The beam diameter in mm.
+
+        Returns:
+            tuple: The current in A and the number of iterations.
+
+        Raises:
+            Exception: If the current needed falls below MINIMUM_CURRENT.
+        """
+        key = (velocity, stiffness, beam_diameter_mm)
+        if key in self.resolved_configurations:
+            return self.resolved_configurations[key]
+
+        iterations = self.get_minimum_iterations(velocity, stiffness, beam_diameter_mm)
         target_exposure = self.calculate_stiffness_to_photon_ratio(stiffness, self.average_ratio)
+        current = self.get_current_based_on_target_photon_exposure(beam_diameter_mm, velocity, target_exposure / iterations)
+        if current < MINIMUM_CURRENT:
+            raise Exception("Configuration not achievable with current parameters.")
+
+        if len(self.resolved_configurations) >= RESOLVED_CONFIGURATIONS_SIZE:
+            self.resolved_configurations = {}
+        self.resolved_configurations[key] = (float(current) / 1000.0, iterations) # conversion from mA to A
+        return self.resolved_configurations[key]
+
+    def get_resolved_configuration_from_velocities(self, vx, vy, stiffness, beam_diameter_mm):
+        """
+        Resolves the configuration for curing a movement with the given axis velocities.
+
+        Args:
+            vx (float): The velocity in the x-direction in mm/s.
+            vy (float): The velocity in the y-direction in mm/s.
+            stiffness (float): The stiffness in Pa.
+            beam_diameter_mm (float): The beam diameter in mm.
+
+        Returns:
+            Configuration: The resolved configuration.
+        """
         velocity = math.sqrt(vx**2 + vy**2)
+        current, iterations = self.resolve_configuration(velocity, stiffness, beam_diameter_mm)
+        return Configuration(current=current, iterations=iterations)
+
+    def get_resolved_configurations_from_velocities(self, vx, vy, stiffness, beam_diameter_mm):
+        """
+        Resolves the configurations for curing many movements at once.
+
+        Args:
+            vx (numpy.ndarray): The velocities in the x-direction in mm/s.
+            vy (numpy.ndarray): The velocities in the y-direction in mm/s.
+            stiffness (float or numpy.ndarray): The stiffness in Pa, per movement or shared by all.
+            beam_diameter_mm (float): The beam diameter in mm.
+
+        Returns:
+            tuple: The currents in A and the numbers of iterations, as arrays.
+
+        Raises:
+            Exception: If the current needed for any movement falls below MINIMUM_CURRENT.
+        """
+        vx, vy, stiffness = np.broadcast_arrays(np.asarray(vx, dtype=float), np.asarray(vy, dtype=float), np.asarray(stiffness, dtype=float))
+        velocity = np.sqrt(vx**2 + vy**2)
+        target_exposure = self.calculate_stiffness_to_photon_ratio(stiffness, self.average_ratio)
+
+        single_pass_current = self.get_current_based_on_target_photon_exposure(beam_diameter_mm, velocity, target_exposure)
+        iterations = np.maximum(1, np.ceil(single_pass_current / MAXIMUM_CURRENT)).astype(np.int64)
+
+        fewer = (iterations > 1) & (self.get_current_based_on_target_photon_exposure(beam_diameter_mm, velocity, target_exposure / np.maximum(iterations - 1, 1)) <= MAXIMUM_CURRENT)
+        while fewer.any():
+            iterations -= fewer
+            fewer = (iterations > 1) & (self.get_current_based_on_target_photon_exposure(beam_diameter_mm, velocity, target_exposure / np.maximum(iterations - 1, 1)) <= MAXIMUM_CURRENT)
+
+        current = self.get_current_based_on_target_photon_exposure(beam_diameter_mm, velocity, target_exposure / iterations)
+        while (current > MAXIMUM_CURRENT).any():
+            iterations += current > MAXIMUM_CURRENT
+            current = self.get_current_based_on_target_photon_exposure(beam_diameter_mm, velocity, target_exposure / iterations)
+
+        if (current < MINIMUM_CURRENT).any():
+            raise Exception("Configuration not achievable with current parameters.")
 
-        while True:
-            current = self.get_current_based_on_target_photon_exposure(beam_diameter_mm, velocity, target_exposure / configuration.iterations)
-            if current < MINIMUM_CURRENT:
-                raise Exception("Configuration not achievable with current parameters.")
-            
-            if current > MAXIMUM_CURRENT:
-                configuration.iterations += 1
-                continue
-            
-            configuration.current = float(current) / 1000.0 # conversion from mA to A
-            break
-        return configuration
+        return current / 1000.0, iterations # conversion from mA to A
 
 curing_calculations = CuringCalculations()
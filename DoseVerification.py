@@ -0,0 +1,247 @@
+import math
+import numpy as np
+from scipy import ndimage
+from Constants import BEAM_DIAMETER, MAXIMUM_CURRENT, MOTOR_MAX_TRAVEL
+from CuringCalculations import curing_calculations
+
+
+class DoseVerification:
+    """
+    Compares the stiffness a simulated job cures with the stiffness its shapes intend.
+
+    The intended stiffness of a shape with a single stiffness is rasterized from its own path, independently of the
+    velocities and currents of the job: every segment the lamp is on for cures the pixels the beam crosses in proportion
+    to the chord of the beam through them, with the stiffness of the shape on its center line. Filled shapes also intend
+    their stiffness inside their outline. Shapes without a single stiffness, such as a Gradient, Texture or
+    HistologyImage, are rasterized from their toolpath instead, each segment with the stiffness its current and velocity
+    resolve to. Passes over the same segment add up. Only the core of the strokes, where the intended stiffness is at
+    least CORE_FRACTION of the stiffness of the strongest segment over a pixel, is scored, as the stiffness falls
+    steeply towards the edge of the beam. The simulated dose of the canvas is converted to stiffness through
+    CuringCalculations.average_ratio, as the dose of a pixel is its photon exposure divided by MAXIMUM_CURRENT.
+
+    Attributes:
+        coordinate_sets (list): The Coordinates of each shape.
+        shapes (list): The shapes, or None to name the coordinate sets by their index.
+        tolerance (float): The fraction the simulated stiffness may differ from the intended stiffness by.
+    """
+
+    CORE_FRACTION = 0.5
+
+    def __init__(self, coordinate_sets, shapes=None, tolerance=0.2):
+        """
+        Initializes a new instance of the DoseVerification class.
+
+        Args:
+            coordinate_sets (list): The Coordinates of each shape.
+            shapes (list, optional): The shapes of the coordinate sets, in the same order. Defaults to None.
+            tolerance (float, optional): The fraction the simulated stiffness may differ from the intended stiffness
+                by. Defaults to 0.2.
+        """
+        if shapes is not None and len(shapes) != len(coordinate_sets):
+            raise ValueError(f"Expected a shape for each of the {len(coordinate_sets)} coordinate sets, got {len(shapes)}.")
+        self.coordinate_sets = coordinate_sets
+        self.shapes = shapes
+        self.tolerance = tolerance
+
+    @staticmethod
+    def simulate(coordinate_sets, canvas_dimensions_mm=MOTOR_MAX_TRAVEL, beam_diameter=BEAM_DIAMETER):
+        """
+        Simulates a job with the analytic simulator on a tiled canvas whose dose is not capped, so that over-cure
+        beyond the canvas's display limit is measured.
+
+        Args:
+            coordinate_sets (list): The Coordinates of each shape.
+            canvas_dimensions_mm (int, optional): The dimensions of the canvas in millimeters. Defaults to MOTOR_MAX_TRAVEL.
+            beam_diameter (float, optional): The diameter of the curing beam. Defaults to BEAM_DIAMETER.
+
+        Returns:
+            Canvas: The simulated canvas.
+        """
+        from Simulator.AnalyticVirtualManager import AnalyticVirtualManager
+        from Simulator.Canvas import Canvas
+
+        manager = AnalyticVirtualManager(canvas_dimensions_mm=canvas_dimensions_mm, beam_diameter=beam_diameter)
+        manager.canvas = manager.lamp.canvas = Canvas(dimensions_mm=canvas_dimensions_mm, storage="tiled")
+        manager.canvas.MAX_ALPHA = np.inf
+        for coordinates in coordinate_sets:
+            for coordinate in coordinates:
+                manager.move(coordinate)
+        return manager.canvas
+
+    @staticmethod
+    def has_single_stiffness(shape):
+        """
+        Checks whether a shape intends one stiffness everywhere, unlike a Gradient, GradientLine, Texture or
+        HistologyImage.
+
+        Args:
+            shape (Shape): The shape, or None.
+
+        Returns:
+            bool: True if the shape has a path and a single stiffness.
+        """
+        return hasattr(shape, "get_path") and not hasattr(shape, "min_stiffness")
+
+    def get_intended_stiffness(self, coordinates, shape, mm_to_pixel_ratio):
+        """
+        Rasterizes the intended stiffness of a shape.
+
+        A shape with a single stiffness intends it along its own path, from Shape.get_path, so the job is checked
+        against the shape rather than against the velocities and currents it was resolved with. Any other shape
+        intends the stiffness the current and velocity of each segment of its toolpath resolve to.
+
+        Args:
+            coordinates (Coordinates): The coordinates of the shape.
+            shape (Shape): The shape, or None.
+            mm_to_pixel_ratio (float): The resolution of the canvas.
+
+        Returns:
+            tuple: The x and y pixel of the first element of the maps, the intended stiffness in Pa of each pixel, and
+                the stiffness in Pa of the strongest segment over each pixel, both indexed [x, y], or None if the lamp
+                is never on.
+        """
+        beam_diameter = getattr(shape, "beam_diameter", BEAM_DIAMETER)
+        is_single_stiffness = self.has_single_stiffness(shape)
+        points = list(shape.get_path() if is_single_stiffness else coordinates)
+        x = np.array([float(c.x) for c in points])
+        y = np.array([float(c.y) for c in points])
+        if is_single_stiffness:
+            cured = np.flatnonzero([bool(c.lp) for c in points[1:]]) + 1
+            stiffness = np.full(len(cured), float(shape.stiffness))
+        else:
+            cured = np.flatnonzero([bool(c.lp) and c.a is not None and c.v is not None for c in points[1:]]) + 1
+            currents = np.array([float(points[i].a) for i in cured])
+            velocities = np.array([math.hypot(*(float(v) for v in points[i].v)) for i in cured])
+
+            # The photon exposure of a pass at the center of its stroke, as CuringCalculations resolves it
+            exposure = curing_calculations.get_total_photon_exposure_per_pixel(beam_diameter, currents * 1000, np.maximum(velocities, 1e-12))
+            stiffness = exposure * curing_calculations.average_ratio
+        if len(cured) == 0:
+            return None
+
+        # Passes over the same segment, in either direction, add up to the stiffness of the segment
+        ends = np.round(np.stack([x[cured - 1], y[cured - 1], x[cured], y[cured]], axis=1), 6)
+        is_reversed = (ends[:, 0] > ends[:, 2]) | ((ends[:, 0] == ends[:, 2]) & (ends[:, 1] > ends[:, 3]))
+        ends[is_reversed] = ends[is_reversed][:, [2, 3, 0, 1]]
+        segments, passes = np.unique(ends, axis=0, return_inverse=True)
+        stiffness = np.bincount(passes.ravel(), weights=stiffness, minlength=len(segments))
+
+        radius = beam_diameter / 2
+        margin = int(np.ceil(radius * mm_to_pixel_ratio)) + 2
+        x_min = int(np.floor(segments[:, [0, 2]].min() * mm_to_pixel_ratio)) - margin
+        y_min = int(np.floor(segments[:, [1, 3]].min() * mm_to_pixel_ratio)) - margin
+        x_max = int(np.ceil(segments[:, [0, 2]].max() * mm_to_pixel_ratio)) + margin + 1
+        y_max = int(np.ceil(segments[:, [1, 3]].max() * mm_to_pixel_ratio)) + margin + 1
+        intended = np.zeros((x_max - x_min, y_max - y_min), dtype=np.float64)
+        peak = np.zeros_like(intended)
+
+        # A pass cures a pixel for the time the beam covers it: the chord of the beam through the pixel, cut at the
+        # ends of the segment. The center line of a long segment sees the whole beam diameter, which the stiffness of
+        # the pass is resolved for, so the chord is taken as a fraction of the diameter. Passes add up, and the peak
+        # map holds the stiffness of the strongest segment over each pixel.
+        for i in np.argsort(stiffness, kind="stable"):
+            start, end = segments[i, :2], segments[i, 2:]
+            length = math.hypot(*(end - start))
+            if length == 0:
+                continue
+            direction = (end - start) / length
+            xs = slice(int(np.floor(min(start[0], end[0]) * mm_to_pixel_ratio)) - margin - x_min,
+                       int(np.ceil(max(start[0], end[0]) * mm_to_pixel_ratio)) + margin + 1 - x_min)
+            ys = slice(int(np.floor(min(start[1], end[1]) * mm_to_pixel_ratio)) - margin - y_min,
+                       int(np.ceil(max(start[1], end[1]) * mm_to_pixel_ratio)) + margin + 1 - y_min)
+            x_grid, y_grid = np.meshgrid((np.arange(xs.start, xs.stop) + x_min) / mm_to_pixel_ratio - start[0],
+                                         (np.arange(ys.start, ys.stop) + y_min) / mm_to_pixel_ratio - start[1], indexing="ij")
+            along = x_grid * direction[0] + y_grid * direction[1]
+            across = x_grid * direction[1] - y_grid * direction[0]
+            half_chord = np.sqrt(np.maximum(radius ** 2 - across ** 2, 0))
+            chord = np.clip(np.minimum(along + half_chord, length) - np.maximum(along - half_chord, 0), 0, None)
+            intended[xs, ys] += stiffness[i] * chord / beam_diameter
+            peak[xs, ys] = np.where(chord > 0, stiffness[i], peak[xs, ys])
+
+        if is_single_stiffness and shape.filled:
+            is_inside = ndimage.binary_fill_holes(intended > 0) & (intended == 0)
+            intended[is_inside] = peak[is_inside] = shape.stiffness
+        return x_min, y_min, intended, peak
+
+    def verify(self, canvas):
+        """
+        Compares the simulated dose of a canvas with the intended stiffness of every shape.
+
+        Args:
+            canvas (Canvas): The simulated canvas, e.g. from simulate.
+
+        Returns:
+            list: A dict for each shape with its name, scored area in mm^2, median intended stiffness in Pa, the
+                mean ratio of simulated to intended stiffness, the fractions of its scored area that are under-cured,
+                over-cured or at the dose limit of the canvas, and the area in mm^2 around it cured where no shape
+                intends any stiffness.
+        """
+        ratio = canvas.mm_to_pixel_ratio
+        size = canvas.dimensions + 1
+        to_stiffness = MAXIMUM_CURRENT * curing_calculations.average_ratio
+
+        maps = []
+        for (i, coordinates) in enumerate(self.coordinate_sets):
+            shape = self.shapes[i] if self.shapes is not None else None
+            maps.append(self.get_intended_stiffness(coordinates, shape, ratio))
+
+        reports = []
+        for (i, intended_map) in enumerate(maps):
+            shape = self.shapes[i] if self.shapes is not None else None
+            name = f"{i}: {type(shape).__name__}" if shape is not None else f"{i}: coordinate set"
+            if intended_map is None:
+                reports.append({"name": name, "area_mm2": 0.0})
+                continue
+
+            x_min, y_min, intended, peak = intended_map
+            # The map may reach past the canvas, whose pixels outside it are never cured
+            window = (slice(max(x_min, 0), min(x_min + intended.shape[0], size)), slice(max(y_min, 0), min(y_min + intended.shape[1], size)))
+            alpha = np.zeros(intended.shape, dtype=np.float64)
+            alpha[window[0].start - x_min:window[0].stop - x_min, window[1].start - y_min:window[1].stop - y_min] = np.asarray(canvas.alpha[window])
+            simulated = alpha * to_stiffness
+
+            # Pixels any shape intends stiffness for, within the map of this shape
+            is_intended = np.zeros(intended.shape, dtype=bool)
+            for other in maps:
+                if other is None:
+                    continue
+                other_x, other_y, other_map, _ = other
+                xs = slice(max(x_min, other_x), min(x_min + intended.shape[0], other_x + other_map.shape[0]))
+                ys = slice(max(y_min, other_y), min(y_min + intended.shape[1], other_y + other_map.shape[1]))
+                if xs.start < xs.stop and ys.start < ys.stop:
+                    is_intended[xs.start - x_min:xs.stop - x_min, ys.start - y_min:ys.stop - y_min] |= \
+                        other_map[xs.start - other_x:xs.stop - other_x, ys.start - other_y:ys.stop - other_y] > 0
+
+            footprint = (intended > 0) & (intended >= self.CORE_FRACTION * peak)
+            target = intended[footprint]
+            cured = simulated[footprint]
+            median_stiffness = float(np.median(peak[footprint]))
+            is_stray = ~is_intended & (simulated > self.tolerance * median_stiffness)
+            reports.append({
+                "name": name,
+                "area_mm2": footprint.sum() / ratio ** 2,
+                "intended_stiffness": median_stiffness,
+                "mean_ratio": float(np.mean(cured / target)),
+                "under_cured": float(np.mean(cured < (1 - self.tolerance) * target)),
+                "over_cured": float(np.mean(cured > (1 + self.tolerance) * target)),
+                "saturated": float(np.mean(alpha[footprint] >= canvas.MAX_ALPHA)),
+                "stray_mm2": is_stray.sum() / ratio ** 2,
+            })
+        return reports
+
+    def print_report(self, reports):
+        """
+        Prints the reports of verify as a table.
+
+        Args:
+            reports (list): The reports of verify.
+        """
+        print(f"Dose verification (tolerance {self.tolerance:.0%}):")
+        for report in reports:
+            if report["area_mm2"] == 0:
+                print(f"  {report['name']:>24}: the lamp is never on")
+                continue
+            print(f"  {report['name']:>24}: {report['area_mm2']:7.2f} mm^2 at {report['intended_stiffness']:8.0f} Pa | "
+                  f"simulated/intended {report['mean_ratio']:5.2f} | under-cured {report['under_cured']:6.1%} | "
+                  f"over-cured {report['over_cured']:6.1%} | at the canvas limit {report['saturated']:6.1%} | "
+                  f"stray {report['stray_mm2']:6.2f} mm^2")
@@ -1,8 +1,6 @@
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.realpath(__file__)))
-from Motor import Motor
-from Lamp import Lamp
 import threading
 
 
@@ -18,6 +16,11 @@ class Manager:
     """
 
     def __init__(self, serial_number_x, serial_number_y, lamp_serial_number, acceleration=None, max_velocity=None):
+        # The drivers are imported here so that subclasses with other devices (e.g. DryRunManager) can import Manager
+        # on computers without them
+        from Motor import Motor
+        from Lamp import Lamp
+
         self.lamp = Lamp(lamp_serial_number)
         self.x = Motor(serial_no=serial_number_x, acceleration=acceleration, max_velocity=max_velocity)
         self.y = Motor(serial_no=serial_number_y, acceleration=acceleration, max_velocity=max_velocity)
@@ -24,7 +24,7 @@ class Motor:
     """
 
     # documented min step size 0.001
-    MINIMUM_STEP_SIZE = Decimal(0.001)
+    MINIMUM_STEP_SIZE = Decimal(MOTOR_MINIMUM_STEP_SIZE)
 
     def __init__(self, serial_no, acceleration=None, max_velocity=None):
         """
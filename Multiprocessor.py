@@ -1,66 +1,147 @@
-import multiprocessing
-import time
-import uuid
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import psutil
+import NumericBackend
+import SharedMemoryTransport
+from Constants import PARALLEL_TRANSPORT
 
 MAXIMUM_PARALLEL_PROCESSES = psutil.cpu_count(logical=False)
 
+SERIAL = "serial"
+THREADS = "threads"
+PROCESSES = "processes"
+BACKENDS = (SERIAL, THREADS, PROCESSES)
+
 
 class Multiprocessor:
+    """
+    Generates the coordinates of many shapes on a pool of workers that is reused across calls.
+
+    Attributes:
+        max_workers (int): The maximum number of shapes generated at the same time.
+        backend (str): Where shapes are generated: "serial" (in the calling thread), "threads" or "processes".
+        transport (str): How results leave worker processes: "pickle", or "shared_memory" to map them without copying.
+    """
+
+    def __init__(self, max_workers=None, backend=PROCESSES, transport=PARALLEL_TRANSPORT):
+        """
+        Initializes a Multiprocessor object. Workers are started on first use.
+
+        Args:
+            max_workers (int, optional): The maximum number of workers. Defaults to the number of physical cores.
+            backend (str, optional): One of "serial", "threads" or "processes". Defaults to "processes".
+            transport (str, optional): One of "pickle" or "shared_memory". Only used by the "processes" backend.
+                Defaults to PARALLEL_TRANSPORT.
+
+        Raises:
+            ValueError: If the backend or transport is unknown.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}'. Choose one of {list(BACKENDS)}.")
+        if transport not in SharedMemoryTransport.TRANSPORTS:
+            raise ValueError(f"Unknown transport '{transport}'. Choose one of {list(SharedMemoryTransport.TRANSPORTS)}.")
+
+        self.max_workers = max_workers or MAXIMUM_PARALLEL_PROCESSES or 1
+        self.backend = backend
+        self.transport = transport
+        self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.shutdown()
+
+    def get_executor(self):
+        """
+        Returns the worker pool, starting it on first use.
+
+        Returns:
+            concurrent.futures.Executor: The worker pool.
+        """
+        if self.executor is None:
+            # Decimal contexts are per thread, so each worker sets the precision coordinates are generated at
+            if self.backend == THREADS:
+                self.executor = ThreadPoolExecutor(max_workers=self.max_workers, initializer=NumericBackend.set_decimal_context)
+            else:
+                self.executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=NumericBackend.set_decimal_context)
+        return self.executor
+
+    def shutdown(self):
+        """
+        Stops the workers. The next call starts a new pool.
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
     def get_coordinate_sets(self, shapes):
-        coordinate_sets = multiprocessing.Manager().dict()
-        processes = []
-        shape_ids = []
-        for shape in shapes:
-            shape_id = uuid.uuid4()
-            shape_ids.append(shape_id)
-            processes.append(multiprocessing.Process(target=self.append_coordinates, args=(shape, shape_id, coordinate_sets)))
-
-        self.handle_processes(processes)
-
-        coordinate_sets_in_order = []
-        for shape_id in shape_ids:
-            if shape_id in coordinate_sets:
-                coordinate_sets_in_order.append(coordinate_sets[shape_id])
-        
-        return coordinate_sets_in_order
-    
+        """
+        Generates the coordinates of every shape.
+
+        Args:
+            shapes (list): The shapes to generate.
+
+        Returns:
+            list: The Coordinates of each shape, in the order of the shapes. Shapes that fail are left out.
+        """
+        return list(self.iterate_coordinate_sets(shapes))
+
+    def iterate_coordinate_sets(self, shapes):
+        """
+        Generates the coordinates of every shape, yielding each result in the order of the shapes as soon as it and
+        all results before it are done.
+
+        Args:
+            shapes (list): The shapes to generate.
+
+        Yields:
+            Coordinates: The Coordinates of each shape, or a CoordinateArray when the shared memory transport is used.
+                Shapes that fail are left out.
+        """
+        if self.backend == SERIAL:
+            results = map(self.generate_coordinates, shapes)
+        elif self.backend == PROCESSES and self.transport == SharedMemoryTransport.SHARED_MEMORY:
+            results = self.get_executor().map(self.generate_shared_coordinates, shapes)
+        else:
+            results = self.get_executor().map(self.generate_coordinates, shapes)
+
+        for coordinates in results:
+            if isinstance(coordinates, SharedMemoryTransport.SharedCoordinates):
+                coordinates = SharedMemoryTransport.import_coordinates(coordinates)
+            if coordinates is not None:
+                yield coordinates
+
     @staticmethod
-    def append_coordinates(shape, shape_id, coordinates):
-        coordinates[shape_id] = shape.get_coordinates()
+    def generate_coordinates(shape):
+        """
+        Generates the coordinates of a single shape. Errors are printed instead of raised so one failing shape does
+        not stop the others.
+
+        Args:
+            shape (Shape): The shape to generate.
 
-    
-    def handle_processes(self, processes):
+        Returns:
+            Coordinates: The coordinates of the shape, or None if generating them failed.
+        """
+        try:
+            return shape.get_coordinates()
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    @staticmethod
+    def generate_shared_coordinates(shape):
         """
-        Handles the execution of multiple processes in parallel.
+        Generates the coordinates of a single shape and writes them into shared memory.
 
         Args:
-            processes (list): A list of processes to be executed.
+            shape (Shape): The shape to generate.
 
         Returns:
-            None
+            SharedCoordinates: The reference to the coordinates, or None if generating them failed.
         """
-        # Define the number of processes to run at a time
-        num_processes = MAXIMUM_PARALLEL_PROCESSES
-
-        # Start the first set of processes
-        current_processes = []
-        for i in range(num_processes):
-            if processes:
-                current_processes.append(processes.pop(0))
-                current_processes[-1].start()
-
-        # Loop until all processes have finished
-        while current_processes:
-            for thread in current_processes:
-                if not thread.is_alive():
-                    current_processes.remove(thread)
-                    thread.join()
-
-                    # Start a new thread if there are any left in the queue
-                    if processes:
-                        new_thread = processes.pop(0)
-                        current_processes.append(new_thread)
-                        new_thread.start()
-                    break
-            time.sleep(0.5)
\ No newline at end of file
+        coordinates = Multiprocessor.generate_coordinates(shape)
+        if coordinates is None:
+            return None
+        return SharedMemoryTransport.export_coordinates(coordinates)
@@ -0,0 +1,185 @@
+import math
+from decimal import Decimal, getcontext
+from Constants import NUMERIC_BACKEND, MOTOR_MINIMUM_STEP_SIZE, MINIMUM_DISTANCE_BETWEEN_TWO_LIGHT_BEAMS
+
+# The number of significant digits of Decimal coordinate math
+DECIMAL_PRECISION = 15
+
+
+def set_decimal_context():
+    """
+    Sets the Decimal precision of the calling thread. Decimal contexts are per thread, so every thread that generates
+    coordinates must call this before it does any Decimal math; the importing thread is set up at import.
+    """
+    getcontext().prec = DECIMAL_PRECISION
+
+
+set_decimal_context()
+
+
+class DecimalBackend:
+    """
+    Performs coordinate math with Decimal numbers at 15 significant digits.
+    """
+
+    name = "decimal"
+    is_quantized = False
+
+    def number(self, value):
+        """
+        Converts a value to the backend's number type.
+
+        Args:
+            value (float): The value to convert.
+
+        Returns:
+            Decimal: The converted value.
+        """
+        return Decimal(value)
+
+    def position(self, value):
+        """
+        Converts a position in mm to the backend's number type.
+
+        Args:
+            value (float): The position in mm.
+
+        Returns:
+            Decimal: The converted position.
+        """
+        return Decimal(value)
+
+    def sqrt(self, value):
+        """
+        Calculates the square root of a non-negative value.
+
+        Args:
+            value (Decimal): The value.
+
+        Returns:
+            Decimal: The square root of the value.
+        """
+        return value.sqrt()
+
+
+class FloatBackend:
+    """
+    Performs coordinate math with float64 numbers.
+    """
+
+    name = "float"
+    is_quantized = False
+
+    def number(self, value):
+        """
+        Converts a value to the backend's number type.
+
+        Args:
+            value (float): The value to convert.
+
+        Returns:
+            float: The converted value.
+        """
+        return float(value)
+
+    def position(self, value):
+        """
+        Converts a position in mm to the backend's number type.
+
+        Args:
+            value (float): The position in mm.
+
+        Returns:
+            float: The converted position.
+        """
+        return float(value)
+
+    def sqrt(self, value):
+        """
+        Calculates the square root of a non-negative value.
+
+        Args:
+            value (float): The value.
+
+        Returns:
+            float: The square root of the value.
+        """
+        return math.sqrt(value)
+
+
+class MicrometreBackend(FloatBackend):
+    """
+    Performs coordinate math with float64 numbers and snaps the finished toolpath onto the integer micrometre grid
+    of the KDC101 controller (MOTOR_MINIMUM_STEP_SIZE). Velocities, times and rotation factors keep full float precision.
+    """
+
+    name = "micrometre"
+    is_quantized = True
+
+    def position(self, value):
+        """
+        Snaps a position in mm to the nearest motor step.
+
+        Args:
+            value (float): The position in mm.
+
+        Returns:
+            float: The position as an integer number of motor steps, expressed in mm.
+        """
+        return round(float(value) / MOTOR_MINIMUM_STEP_SIZE) * MOTOR_MINIMUM_STEP_SIZE
+
+
+BACKENDS = {backend.name: backend for backend in (DecimalBackend, FloatBackend, MicrometreBackend)}
+
+backend = None
+
+# The squared minimum beam distance and squared half of it in the active backend's number type, so distance
+# comparisons avoid sqrt. Set with the backend.
+min_beam_dist_sq = None
+half_min_beam_dist_sq = None
+
+
+def set_backend(name):
+    """
+    Selects the numeric backend used for coordinate math.
+
+    Coordinates created before switching keep the number type of the previous backend, so the backend should be
+    selected before any shapes are generated.
+
+    Args:
+        name (str): One of "decimal", "float" or "micrometre".
+
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+    global backend, min_beam_dist_sq, half_min_beam_dist_sq
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown numeric backend '{name}'. Choose one of {list(BACKENDS)}.")
+    backend = BACKENDS[name]()
+    min_beam_distance = backend.number(MINIMUM_DISTANCE_BETWEEN_TWO_LIGHT_BEAMS)
+    min_beam_dist_sq = min_beam_distance ** 2
+    half_min_beam_dist_sq = (min_beam_distance / 2) ** 2
+
+
+def number(value):
+    """
+    Converts a value to the active backend's number type.
+    """
+    return backend.number(value)
+
+
+def position(value):
+    """
+    Converts a position in mm to the active backend's number type.
+    """
+    return backend.position(value)
+
+
+def sqrt(value):
+    """
+    Calculates the square root of a non-negative value with the active backend.
+    """
+    return backend.sqrt(value)
+
+
+set_backend(NUMERIC_BACKEND)
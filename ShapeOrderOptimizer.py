@@ -0,0 +1,264 @@
+import time
+import numpy as np
+from scipy.spatial import cKDTree
+from Coordinate import Coordinate
+from Constants import ACCELERATION, MAXIMUM_VELOCITY
+
+# Smallest travel time reduction in seconds accepted by the improvement pass, so rounding noise cannot cause endless swaps
+_MINIMUM_IMPROVEMENT = 1e-9
+
+
+def _travel_times(a, b):
+    """
+    Calculates the times the stage takes to travel between two arrays of points with the lamp off. Both axes move at
+    once with move_absolute, accelerating at ACCELERATION up to MAXIMUM_VELOCITY and decelerating to the point, so the
+    longer axis sets the time.
+    """
+    d = np.maximum(np.abs(a[..., 0] - b[..., 0]), np.abs(a[..., 1] - b[..., 1]))
+    # An axis travelling less than v^2 / a never reaches MAXIMUM_VELOCITY
+    return np.where(d < MAXIMUM_VELOCITY ** 2 / ACCELERATION, 2 * np.sqrt(d / ACCELERATION), MAXIMUM_VELOCITY / ACCELERATION + d / MAXIMUM_VELOCITY)
+
+
+class ShapeOrderOptimizer:
+    """
+    Orders coordinate sets to reduce the lamp-off travel time between them.
+
+    Every set is entered at one endpoint and left at the other, so a set may also be drawn in reverse. A greedy
+    nearest-neighbor tour over a KD-tree of all endpoints is built first. It is then refined with 2-opt (reversing a
+    run of sets) and Or-opt (moving a run of up to three sets) until no move helps or the time budget is used up.
+    Every step compares travel times, where the time between two points only depends on the longer axis, so the
+    KD-tree is queried by the Chebyshev distance.
+
+    Attributes:
+        allow_reversal (bool): Whether sets may be drawn from their last point to their first.
+        improvement_time_budget_s (float): The maximum time in seconds spent refining the greedy tour.
+        start (Coordinate): The position the stage starts from.
+        saved_seconds (float): The lamp-off travel time saved by the last optimization.
+    """
+
+    def __init__(self, allow_reversal=True, improvement_time_budget_s=1.0, start=None):
+        """
+        Initializes a ShapeOrderOptimizer object.
+
+        Args:
+            allow_reversal (bool, optional): Whether sets may be drawn in reverse. Defaults to True.
+            improvement_time_budget_s (float, optional): The time budget of the 2-opt / Or-opt pass in seconds, 0 to
+                skip it. Defaults to 1.0.
+            start (Coordinate, optional): The position the stage starts from. Defaults to the origin.
+        """
+        self.allow_reversal = allow_reversal
+        self.improvement_time_budget_s = improvement_time_budget_s
+        self.start = start if start else Coordinate(0, 0)
+        self.saved_seconds = 0
+
+    def optimize(self, coordinate_sets):
+        """
+        Reorders the coordinate sets, reversing some of them if allowed. Empty sets are dropped.
+
+        Args:
+            coordinate_sets (list): The Coordinates or CoordinateArray of each shape.
+
+        Returns:
+            list: The reordered coordinate sets.
+        """
+        sets = [cs for cs in coordinate_sets if len(cs) > 0]
+        self.saved_seconds = 0
+        if len(sets) <= 1:
+            return sets
+
+        starts = np.array([(float(cs[0].x), float(cs[0].y)) for cs in sets])
+        ends = np.array([(float(cs[-1].x), float(cs[-1].y)) for cs in sets])
+        origin = np.array([float(self.start.x), float(self.start.y)])
+
+        order, flipped = self.get_nearest_neighbor_order(starts, ends, origin)
+        if self.improvement_time_budget_s > 0:
+            order, flipped = self.improve_order(order, flipped, starts, ends, origin)
+
+        ordered = [sets[i].get_reversed() if is_flipped else sets[i] for (i, is_flipped) in zip(order.tolist(), flipped.tolist())]
+
+        before = self.get_travel_time(np.arange(len(sets)), np.zeros(len(sets), dtype=bool), starts, ends, origin)
+        after = self.get_travel_time(order, flipped, starts, ends, origin)
+        if after > before:
+            # The greedy tour can lose to the given order when the improvement pass is skipped or runs out of time
+            return sets
+
+        self.saved_seconds = before - after
+        return ordered
+
+    @classmethod
+    def get_travel_time(cls, order, flipped, starts, ends, origin):
+        """
+        Calculates the lamp-off travel time of a tour, from the origin to the last set.
+
+        Args:
+            order (numpy.ndarray): The order of the sets.
+            flipped (numpy.ndarray): Whether each set in the order is drawn in reverse.
+            starts (numpy.ndarray): The first point of each set.
+            ends (numpy.ndarray): The last point of each set.
+            origin (numpy.ndarray): The position the stage starts from.
+
+        Returns:
+            float: The travel time in seconds.
+        """
+        entries, exits = cls.get_entries_and_exits(order, flipped, starts, ends)
+        return float(_travel_times(np.vstack([origin, exits[:-1]]), entries).sum())
+
+    def get_nearest_neighbor_order(self, starts, ends, origin):
+        """
+        Builds a tour by repeatedly travelling to the endpoint of a set that has not been drawn yet that is reached
+        soonest.
+
+        Args:
+            starts (numpy.ndarray): The first point of each set.
+            ends (numpy.ndarray): The last point of each set.
+            origin (numpy.ndarray): The position the stage starts from.
+
+        Returns:
+            tuple: The order of the sets and whether each of them is drawn in reverse, as arrays.
+        """
+        n = len(starts)
+        endpoints = np.vstack([starts, ends]) if self.allow_reversal else starts
+        tree = cKDTree(endpoints)
+        is_drawn = np.zeros(n, dtype=bool)
+        order = np.empty(n, dtype=np.int64)
+        flipped = np.zeros(n, dtype=bool)
+
+        position = origin
+        for step in range(n):
+            # Query more neighbors until one belongs to a set that has not been drawn yet
+            k = min(8, len(endpoints))
+            while True:
+                _, indices = tree.query(position, k=k, p=np.inf)
+                indices = np.atleast_1d(indices)
+                candidates = indices[~is_drawn[indices % n]]
+                if candidates.size or k == len(endpoints):
+                    break
+                k = min(2 * k, len(endpoints))
+
+            endpoint = candidates[0]
+            set_index = endpoint % n
+            is_drawn[set_index] = True
+            order[step] = set_index
+            flipped[step] = endpoint >= n
+            position = starts[set_index] if flipped[step] else ends[set_index]
+
+        return order, flipped
+
+    def improve_order(self, order, flipped, starts, ends, origin):
+        """
+        Refines a tour with 2-opt and Or-opt moves until none reduces the travel time or the time budget is used up.
+
+        Args:
+            order (numpy.ndarray): The order of the sets.
+            flipped (numpy.ndarray): Whether each set in the order is drawn in reverse.
+            starts (numpy.ndarray): The first point of each set.
+            ends (numpy.ndarray): The last point of each set.
+            origin (numpy.ndarray): The position the stage starts from.
+
+        Returns:
+            tuple: The refined order and reversal flags.
+        """
+        deadline = time.perf_counter() + self.improvement_time_budget_s
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            if self.allow_reversal:
+                order, flipped, two_opt_improved = self.two_opt_pass(order, flipped, starts, ends, origin, deadline)
+                improved |= two_opt_improved
+            order, flipped, or_opt_improved = self.or_opt_pass(order, flipped, starts, ends, origin, deadline)
+            improved |= or_opt_improved
+
+        return order, flipped
+
+    @staticmethod
+    def get_entries_and_exits(order, flipped, starts, ends):
+        """
+        Returns the point where each set in the tour is entered and the point where it is left.
+        """
+        entries = np.where(flipped[:, None], ends[order], starts[order])
+        exits = np.where(flipped[:, None], starts[order], ends[order])
+        return entries, exits
+
+    def two_opt_pass(self, order, flipped, starts, ends, origin, deadline):
+        """
+        Tries to reverse every run of consecutive sets, which also reverses the direction of each set in the run.
+
+        Returns:
+            tuple: The order, reversal flags and whether any move was applied.
+        """
+        n = len(order)
+        improved = False
+        for i in range(n):
+            if time.perf_counter() >= deadline:
+                break
+
+            entries, exits = self.get_entries_and_exits(order, flipped, starts, ends)
+            previous_exit = exits[i - 1] if i > 0 else origin
+
+            # Reversing the sets i..j connects the previous exit to exit j and entry i to the entry after j
+            next_entries = entries[i + 1:]
+            old = _travel_times(previous_exit, entries[i]) + np.append(_travel_times(exits[i:-1], next_entries), 0)
+            new = _travel_times(previous_exit, exits[i:]) + np.append(_travel_times(entries[i], next_entries), 0)
+            delta = new - old
+
+            j = int(np.argmin(delta))
+            if delta[j] < -_MINIMUM_IMPROVEMENT:
+                order[i:i + j + 1] = order[i:i + j + 1][::-1].copy()
+                flipped[i:i + j + 1] = ~flipped[i:i + j + 1][::-1]
+                improved = True
+
+        return order, flipped, improved
+
+    def or_opt_pass(self, order, flipped, starts, ends, origin, deadline):
+        """
+        Tries to move every run of one to three consecutive sets between two other sets, reversed if allowed.
+
+        Returns:
+            tuple: The order, reversal flags and whether any move was applied.
+        """
+        n = len(order)
+        improved = False
+        for length in (1, 2, 3):
+            for i in range(n - length + 1):
+                if time.perf_counter() >= deadline:
+                    return order, flipped, improved
+
+                entries, exits = self.get_entries_and_exits(order, flipped, starts, ends)
+                end = i + length
+                previous_exit = exits[i - 1] if i > 0 else origin
+                removal = -_travel_times(previous_exit, entries[i])
+                if end < n:
+                    removal += _travel_times(previous_exit, entries[end]) - _travel_times(exits[end - 1], entries[end])
+
+                # Edges of the tour without the run, from the origin to the virtual end after the last set
+                remaining = np.concatenate([np.arange(i), np.arange(end, n)])
+                edge_exits = np.vstack([origin, exits[remaining]])
+                edge_entries = entries[remaining]
+                has_next = np.append(np.ones(len(remaining), dtype=bool), False)
+                edge_entries = np.vstack([edge_entries, origin])
+
+                def insertion(first, last):
+                    cost = _travel_times(edge_exits, first[None, :])
+                    cost += np.where(has_next, _travel_times(last[None, :], edge_entries) - _travel_times(edge_exits, edge_entries), 0)
+                    return cost
+
+                delta = removal + insertion(entries[i], exits[end - 1])
+                is_reversed = False
+                if self.allow_reversal:
+                    reversed_delta = removal + insertion(exits[end - 1], entries[i])
+                    if reversed_delta.min() < delta.min():
+                        delta = reversed_delta
+                        is_reversed = True
+
+                k = int(np.argmin(delta))
+                if delta[k] < -_MINIMUM_IMPROVEMENT:
+                    run_order = order[i:end].copy()
+                    run_flipped = flipped[i:end].copy()
+                    if is_reversed:
+                        run_order = run_order[::-1]
+                        run_flipped = ~run_flipped[::-1]
+                    order = np.concatenate([order[remaining[:k]], run_order, order[remaining[k:]]])
+                    flipped = np.concatenate([flipped[remaining[:k]], run_flipped, flipped[remaining[k:]]])
+                    improved = True
+
+        return order, flipped, improved
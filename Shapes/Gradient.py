@@ -2,8 +2,9 @@ from Shapes.Shape import Shape
 from Coordinate import Coordinate, Coordinates
 from tqdm import tqdm
 import math
+import numpy as np
 from Constants import MINIMUM_DISTANCE_BETWEEN_TWO_LIGHT_BEAMS, MINIMUM_VELOCITY
-from decimal import Decimal
+import NumericBackend
 from CuringCalculations import curing_calculations
 
 class Gradient(Shape):
@@ -45,11 +46,11 @@ class Gradient(Shape):
             Coordinates: The generated coordinates.
         """
         coordinates = Coordinates()
-        w = Decimal(self.width)
-        h = Decimal(self.height)
-        b = Decimal(self.beam_diameter)
+        w = NumericBackend.number(self.width)
+        h = NumericBackend.number(self.height)
+        b = NumericBackend.number(self.beam_diameter)
         x_bounds = (self.center.x - (w / 2) + (b / 2), self.center.x + (w / 2) + (b / 2))
-        normalized_beam_diameter = Decimal(MINIMUM_DISTANCE_BETWEEN_TWO_LIGHT_BEAMS)
+        normalized_beam_diameter = NumericBackend.number(MINIMUM_DISTANCE_BETWEEN_TWO_LIGHT_BEAMS)
         num_columns = math.floor((x_bounds[1] - x_bounds[0]) / normalized_beam_diameter)
 
         if num_columns == 0:
@@ -69,16 +70,20 @@ class Gradient(Shape):
             cur_s = self.max_stiffness
 
         # Pre-compute per-column configuration
+        stiffnesses = []
+        for _ in range(num_columns):
+            stiffnesses.append(cur_s)
+            cur_s += stiffness_step
+        currents, iterations = curing_calculations.get_resolved_configurations_from_velocities(0, MINIMUM_VELOCITY, np.array(stiffnesses), self.beam_diameter)
+
         columns = []
         x = x_bounds[0] + (b / 2)
-        for _ in tqdm(range(num_columns), desc="Getting Coordinates"):
-            config = curing_calculations.get_resolved_configuration_from_velocities(0, MINIMUM_VELOCITY, cur_s, self.beam_diameter)
+        for (current, column_iterations) in tqdm(zip(currents.tolist(), iterations.tolist()), total=num_columns, desc="Getting Coordinates"):
             columns.append({
                 'x': x,
-                'current': config.current,
-                'iterations': config.iterations,
+                'current': current,
+                'iterations': column_iterations,
             })
-            cur_s += stiffness_step
             x += normalized_beam_diameter
 
         max_iterations = max(col['iterations'] for col in columns)
@@ -116,5 +121,6 @@ class Gradient(Shape):
                     going_up = not going_up
 
         coordinates.rotate_coordinates(self.center, self.rotation_angle_degrees)
+        coordinates.snap_to_motor_steps()
 
         return coordinates
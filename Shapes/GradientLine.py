@@ -2,8 +2,9 @@ from Shapes.Shape import Shape
 from Coordinate import Coordinate, Coordinates
 from tqdm import tqdm
 import math
+import numpy as np
 from Constants import MINIMUM_DISTANCE_BETWEEN_TWO_LIGHT_BEAMS, MINIMUM_VELOCITY
-from decimal import Decimal
+import NumericBackend
 from CuringCalculations import curing_calculations
 
 
@@ -48,8 +49,8 @@ class GradientLine(Shape):
             Coordinates: The generated coordinates.
         """
         coordinates = Coordinates()
-        step_length = Decimal(self.length) / Decimal(self.num_steps)
-        half_length = Decimal(self.length) / Decimal(2)
+        step_length = NumericBackend.number(self.length) / NumericBackend.number(self.num_steps)
+        half_length = NumericBackend.number(self.length) / NumericBackend.number(2)
 
         if self.num_steps == 1:
             stiffness_step = 0
@@ -62,18 +63,22 @@ class GradientLine(Shape):
             cur_s = self.max_stiffness
 
         # Pre-compute per-segment boundaries and curing configuration
+        stiffnesses = []
+        for _ in range(self.num_steps):
+            stiffnesses.append(cur_s)
+            cur_s += stiffness_step
+        currents, iterations = curing_calculations.get_resolved_configurations_from_velocities(0, MINIMUM_VELOCITY, np.array(stiffnesses), self.beam_diameter)
+
         segments = []
         for k in tqdm(range(self.num_steps), desc="Getting Coordinates"):
             y_start = self.center.y - half_length + (step_length * k)
             y_end = y_start + step_length
-            config = curing_calculations.get_resolved_configuration_from_velocities(0, MINIMUM_VELOCITY, cur_s, self.beam_diameter)
             segments.append({
                 'y_start': y_start,
                 'y_end': y_end,
-                'current': config.current,
-                'iterations': config.iterations,
+                'current': float(currents[k]),
+                'iterations': int(iterations[k]),
             })
-            cur_s += stiffness_step
 
         max_iterations = max(seg['iterations'] for seg in segments)
         velocity = (0, MINIMUM_VELOCITY)
@@ -115,5 +120,6 @@ class GradientLine(Shape):
                     prev_was_curing = False
 
         coordinates.rotate_coordinates(self.center, self.rotation_angle_degrees)
+        coordinates.snap_to_motor_steps()
 
         return coordinates
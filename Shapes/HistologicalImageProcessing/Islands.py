@@ -50,26 +50,34 @@ def detect_islands(image):
     # Calculate sizes of all regions
     sizes = ndimage.sum(filled_binary, labeled_array, range(1, num_features + 1))
     
-    # Create mask for islands within size range
-    mask_size = (sizes >= min_size) & (sizes <= max_size)
+    # Create mask for islands within size range. Islands must also be smaller than 80 pixels, so the thickness is only
+    # calculated for the regions that can still pass
+    mask_size = (sizes >= min_size) & (sizes <= max_size) & (sizes < 80)
     valid_labels = np.arange(1, num_features + 1)[mask_size]
     
     # Check thickness of each valid region
     valid_labels_thickness = []
     thicknesses = []
     
+    # Each blob is measured in its bounding box with a one pixel border, which holds the nearest background pixel of
+    # every pixel in the blob, instead of in the whole image
+    height, width = labeled_array.shape
+    objects = ndimage.find_objects(labeled_array)
     for label in valid_labels:
-        # Extract single blob
-        blob_mask = (labeled_array == label).astype(np.uint8)
+        rows, cols = objects[label - 1]
+        rows = slice(max(rows.start - 1, 0), min(rows.stop + 1, height))
+        cols = slice(max(cols.start - 1, 0), min(cols.stop + 1, width))
+        blob_mask = (labeled_array[rows, cols] == label).astype(np.uint8)
         thickness = get_blob_thickness(blob_mask)
-        area = np.sum(blob_mask)
         
-        if thickness >= min_thickness and area < 80:
+        if thickness >= min_thickness:
             valid_labels_thickness.append(label)
             thicknesses.append(thickness)
     
     # Create new image with only valid islands
-    island_mask = np.in1d(labeled_array, valid_labels_thickness).reshape(labeled_array.shape)
+    is_island = np.zeros(num_features + 1, dtype=bool)
+    is_island[valid_labels_thickness] = True
+    island_mask = is_island[labeled_array]
     final_labeled, final_num_features = ndimage.label(island_mask)
     
     # Calculate sizes of final islands
@@ -1,5 +1,6 @@
 import cv2
 import numpy as np
+from collections.abc import Mapping
 from scipy.signal import find_peaks
 from scipy.ndimage import gaussian_filter1d
 import matplotlib.pyplot as plt
@@ -73,11 +74,12 @@ def sma(data, window_size):
     return sma_values
 
 
-def detect_bins_from_histogram(pixels):
+def detect_bins_from_histogram(pixels, weights=None):
     """
     Function to detect peaks, valleys, and start/end points of rapid changes in a grayscale image histogram.
     Args:
     - image: Grayscale image array
+    - weights: The number of pixels with each value of pixels, when pixels holds each value once
     - min_valley_depth: The minimum prominence of valleys to detect
     - min_peak_prominence: The minimum prominence of peaks to detect
     - sigma: Smoothing factor for Gaussian filtering
@@ -85,7 +87,7 @@ def detect_bins_from_histogram(pixels):
     """
     
     # Create the histogram
-    hist, bin_edges = np.histogram(pixels, bins=256)
+    hist, bin_edges = np.histogram(pixels, bins=256, weights=weights)
     
     # normalize the histogram
     hist = hist / np.max(np.abs(hist))
@@ -190,10 +192,139 @@ def maximize_distances(numbers, min_distance=15):
     
     return result
 
+class SegmentedImages(Mapping):
+    """
+    The layers of a segmented image by color. Every pixel is labeled with the interval of its value between the bin
+    edges of each channel, and the image of a layer is only created when it is looked up.
+
+    Attributes:
+        labels (numpy.ndarray): The interval of every pixel in each channel, shaped (height, width, channels).
+        label_ranges (numpy.ndarray): The first and the end of the intervals of each layer in each channel, shaped
+            (layers, channels, 2).
+        colors (list): The color of each layer, in layer order.
+        shape (tuple): The shape of the image of a layer.
+        dtype (numpy.dtype): The type of the image of a layer.
+    """
+
+    def __init__(self, labels, label_ranges, colors, shape, dtype):
+        self.labels = labels
+        self.label_ranges = label_ranges
+        self.colors = colors
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.indices = {color: i for (i, color) in enumerate(colors)}
+
+    def __getitem__(self, color):
+        return self.get_image(self.indices[color])
+
+    def __iter__(self):
+        return iter(self.colors)
+
+    def __len__(self):
+        return len(self.colors)
+
+    def get_mask(self, index):
+        """
+        Returns the pixels of a layer.
+
+        Args:
+            index (int): The index of the layer.
+
+        Returns:
+            numpy.ndarray: The pixels of the layer, as a 2D boolean array.
+        """
+        first, end = self.label_ranges[index, :, 0], self.label_ranges[index, :, 1]
+        return ((self.labels >= first) & (self.labels < end)).all(axis=2)
+
+    def get_image(self, index):
+        """
+        Returns the image of a layer, which has the color of the layer on its pixels and is 0 elsewhere.
+
+        Args:
+            index (int): The index of the layer.
+
+        Returns:
+            numpy.ndarray: The image of the layer.
+        """
+        image = np.zeros(self.shape, dtype=self.dtype)
+        image[self.get_mask(index)] = self.colors[index]
+        return image
+
+    def to_arrays(self):
+        """
+        Returns the segmentation as arrays, e.g. to save it with np.savez.
+
+        Returns:
+            dict: The arrays by name.
+        """
+        return {
+            "segmentation_labels": self.labels,
+            "segmentation_label_ranges": self.label_ranges,
+            "segmentation_colors": np.array(self.colors).reshape(len(self.colors), -1),
+            "segmentation_shape": np.array(self.shape),
+            "segmentation_dtype": np.array(self.dtype.str),
+        }
+
+    @staticmethod
+    def from_arrays(arrays):
+        """
+        Creates a segmentation from the arrays returned by to_arrays.
+
+        Args:
+            arrays (dict): The arrays by name.
+
+        Returns:
+            SegmentedImages: The segmentation.
+        """
+        colors = [int(color[0]) if len(color) == 1 else tuple(int(c) for c in color) for color in arrays["segmentation_colors"]]
+        return SegmentedImages(arrays["segmentation_labels"], arrays["segmentation_label_ranges"], colors, arrays["segmentation_shape"], str(arrays["segmentation_dtype"]))
+
+
+def label_bins(pixels, bin_ranges, weights=None):
+    """
+    Labels every pixel with the interval of its value between the bin edges. Bin i holds the values from bin_ranges[i]
+    to bin_ranges[i + 1] + 1, so neighboring bins overlap and the edges are split at both ends of the overlap.
+
+    Args:
+        pixels (numpy.ndarray): The pixel values.
+        bin_ranges (numpy.ndarray): The bin edges.
+        weights (numpy.ndarray, optional): The number of pixels each value of pixels stands for. Defaults to None.
+
+    Returns:
+        tuple: The label of every pixel, the first and the end of the labels of each bin, and the number of pixels in
+            each bin.
+    """
+    edges = np.unique(np.concatenate((bin_ranges, bin_ranges + 1)))
+    labels = np.digitize(pixels, edges).astype(np.uint16)
+    first = np.searchsorted(edges, bin_ranges[:-1]) + 1
+    end = np.searchsorted(edges, bin_ranges[1:] + 1) + 1
+    counts = np.concatenate(([0], np.cumsum(np.bincount(labels.ravel(), weights=weights, minlength=len(edges) + 1))))
+    return labels, np.column_stack((first, end)), counts[end] - counts[first]
+
+
+def get_layer_ranges(bin_ranges, label_ranges, counts):
+    """
+    Sorts the bins of a grayscale image into layers by frequency. Bins with the same average pixel share a layer,
+    which has the position of the first and the labels of the last of them.
+
+    Args:
+        bin_ranges (numpy.ndarray): The bin edges.
+        label_ranges (numpy.ndarray): The first and the end of the labels of each bin.
+        counts (numpy.ndarray): The number of pixels in each bin.
+
+    Returns:
+        dict: The first and the end of the labels of each layer, by the average pixel of the layer.
+    """
+    average_pixels = ((bin_ranges[:-1] + bin_ranges[1:]) / 2).astype(int).tolist()
+    layer_ranges = {}
+    for i in sorted(range(len(counts)), key=lambda i: counts[i], reverse=True):
+        layer_ranges[average_pixels[i]] = label_ranges[i]
+    return layer_ranges
+
+
 def segment_images(img):
     # Check if the image is already grayscale or convert it if necessary
     # assert len(img.shape) == 2 or img.shape[2] == 1, "Image must be grayscale"
-    images = {}
     grayscale = True
     
     if grayscale:
@@ -205,20 +336,10 @@ def segment_images(img):
         else:
             pixels = ((img.flatten() * scale) * 100).astype(int) / 100
         bin_ranges = detect_bins_from_histogram(pixels)
-        
-        pixel_colors = []
-        for i in range(len(bin_ranges) - 1):
-            average_pixel = int((bin_ranges[i] + bin_ranges[i + 1]) / 2)
-            mask = (pixels >= bin_ranges[i]) & (pixels < bin_ranges[i + 1] + 1)
-            pixel_colors.append((average_pixel, mask))
-        
-        # Sort by frequency
-        sorted_pixel_colors = sorted(pixel_colors, key=lambda x: np.sum(x[1]), reverse=True)
-        for color, mask in sorted_pixel_colors:
-            images[color] = np.zeros_like(img)
-            images[color][mask.reshape(img.shape[:2])] = color
-            # plt.imshow(images[color])
-            # plt.show()
+        labels, label_ranges, counts = label_bins(pixels, bin_ranges)
+        layer_ranges = get_layer_ranges(bin_ranges, label_ranges, counts)
+        return SegmentedImages(labels.reshape(*img.shape[:2], 1), np.array(list(layer_ranges.values())).reshape(-1, 1, 2),
+                               list(layer_ranges.keys()), img.shape, img.dtype)
     else:
         image = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
         max_val = np.max(img)
@@ -226,23 +347,18 @@ def segment_images(img):
         pixels = image.reshape(-1, 3) * scale
         
         rgb = [img[:, :, 0], img[:, :, 1], img[:, :, 2]]
-        pixel_colors = [[], [], []]
-        for (i, pixel_array) in enumerate(rgb):
+        labels, label_ranges, average_pixels = [], [], []
+        for pixel_array in rgb:
             pixels = ((pixel_array * 256) * 100).astype(int) / 100
             bin_ranges = detect_bins_from_histogram(pixels)
-            
-            for j in range(len(bin_ranges) - 1):
-                average_pixel = int((bin_ranges[j] + bin_ranges[j + 1]) / 2)
-                mask = (pixels >= bin_ranges[j]) & (pixels < bin_ranges[j + 1] + 1)
-                pixel_colors[i].append((average_pixel, mask))
-
-        
-        for i in range(len(pixel_colors[0])):
-            color = (pixel_colors[0][i][0], pixel_colors[1][i][0], pixel_colors[2][i][0])
-            mask = pixel_colors[0][i][1] & pixel_colors[1][i][1] & pixel_colors[2][i][1]
-            images[color] = np.zeros_like(img, dtype=np.uint8)
-            images[color][mask.reshape(img.shape[:2])] = color
-            # plt.imshow(images[color])
-            # plt.show()
-
-    return images
\ No newline at end of file
+            channel_labels, channel_label_ranges, _ = label_bins(pixels, bin_ranges)
+            labels.append(channel_labels)
+            label_ranges.append(channel_label_ranges)
+            average_pixels.append(((bin_ranges[:-1] + bin_ranges[1:]) / 2).astype(int).tolist())
+
+        layer_ranges = {}
+        for i in range(len(label_ranges[0])):
+            color = (average_pixels[0][i], average_pixels[1][i], average_pixels[2][i])
+            layer_ranges[color] = np.stack([channel_label_ranges[i] for channel_label_ranges in label_ranges])
+        return SegmentedImages(np.stack(labels, axis=2), np.array(list(layer_ranges.values())).reshape(-1, 3, 2),
+                               list(layer_ranges.keys()), img.shape, np.uint8)
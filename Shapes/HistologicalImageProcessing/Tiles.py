@@ -0,0 +1,155 @@
+import tempfile
+import cv2
+import numpy as np
+from PIL import Image
+from .SmartColorBinning import SegmentedImages, detect_bins_from_histogram, label_bins, get_layer_ranges
+from .utils import downsample
+
+
+def get_image_size(img_file):
+    """
+    Returns the size of an image without decoding it.
+
+    Parameters:
+    img_file (str): The path of the image, or of a 2D .npy array of 8-bit gray values.
+
+    Returns:
+    tuple: The height and width of the image in pixels.
+    """
+    if img_file.lower().endswith('.npy'):
+        return np.load(img_file, mmap_mode='r').shape[:2]
+    with Image.open(img_file) as img:
+        return img.height, img.width
+
+
+def read_grayscale(img_file):
+    """
+    Reads an image as 8-bit gray values. A .npy file is memory mapped, so its tiles are paged in from disk when they
+    are processed. Other images are decoded whole, straight to gray values, which takes one byte per pixel.
+
+    Parameters:
+    img_file (str): The path of the image, or of a 2D .npy array of 8-bit gray values.
+
+    Returns:
+    numpy.ndarray: The gray values, shaped (height, width).
+    """
+    if img_file.lower().endswith('.npy'):
+        return np.load(img_file, mmap_mode='r')
+
+    image = cv2.imread(img_file, cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise ValueError(f"Could not read the image '{img_file}'.")
+    return image
+
+
+def get_tiles(shape, tile_size, margin=0):
+    """
+    Splits an image into square tiles that each carry a margin of the pixels around them.
+
+    Parameters:
+    shape (tuple): The height and width of the image.
+    tile_size (int): The size of a tile in pixels.
+    margin (int): The width of the margin in pixels.
+
+    Yields:
+    tuple: The slices of the tile in the image, the slices of the tile with its margin in the image, and the slices
+        of the tile in the tile with its margin.
+    """
+    height, width = shape[:2]
+    for row in range(0, height, tile_size):
+        for col in range(0, width, tile_size):
+            tile = (slice(row, min(row + tile_size, height)), slice(col, min(col + tile_size, width)))
+            padded = tuple(slice(max(s.start - margin, 0), min(s.stop + margin, size)) for (s, size) in zip(tile, (height, width)))
+            inner = tuple(slice(s.start - p.start, s.stop - p.start) for (s, p) in zip(tile, padded))
+            yield tile, padded, inner
+
+
+def segment_tiles(image, tile_size):
+    """
+    Segments a grayscale image like segment_images, from the histogram of all its tiles, without creating a copy of
+    the image. Since the gray values are 8-bit, every pixel is labeled through a table of the 256 values.
+
+    Parameters:
+    image (numpy.ndarray): The 8-bit gray values.
+    tile_size (int): The size of the tiles the histogram is collected from.
+
+    Returns:
+    tuple: The label of each gray value, and the segmentation of a downsampled copy of the image to preview the layers.
+    """
+    counts = np.zeros(256, dtype=np.int64)
+    for (tile, _, _) in get_tiles(image.shape, tile_size):
+        counts += np.bincount(image[tile].ravel(), minlength=256)
+
+    present = np.flatnonzero(counts)
+    scale = 255 / present[-1]
+    values = ((np.arange(256) * scale) * 100).astype(int) / 100
+    bin_ranges = detect_bins_from_histogram(values[present], weights=counts[present])
+    value_labels, label_ranges, bin_counts = label_bins(values, bin_ranges, weights=counts)
+    layer_ranges = get_layer_ranges(bin_ranges, label_ranges, bin_counts)
+
+    preview = downsample(np.asarray(image))
+    previews = SegmentedImages(value_labels[preview][..., None], np.array(list(layer_ranges.values())).reshape(-1, 1, 2),
+                               list(layer_ranges.keys()), preview.shape, np.uint8)
+    return value_labels, previews
+
+
+def get_tiled_layer_mask(image, value_labels, label_range, tile_size, kernel_size):
+    """
+    Finds the pixels of a layer tile by tile. Each tile is median filtered, then closed and opened with a disk of
+    kernel_size pixels to fill gaps and drop specks narrower than the disk. Tiles are processed with a margin that holds
+    every pixel these filters read, so the mask is the same as if the whole image had been processed at once.
+
+    Parameters:
+    image (numpy.ndarray): The 8-bit gray values.
+    value_labels (numpy.ndarray): The label of each gray value.
+    label_range (numpy.ndarray): The first and the end of the labels of the layer.
+    tile_size (int): The size of a tile in pixels.
+    kernel_size (int): The diameter of the disk in pixels.
+
+    Returns:
+    numpy.ndarray: The layer as 0 and 255, in a memory map on a temporary file.
+    """
+    radius = kernel_size // 2
+    margin = 4 * radius + 1
+    is_in_layer = np.zeros(len(value_labels), dtype=np.uint8)
+    is_in_layer[(value_labels >= label_range[0]) & (value_labels < label_range[1])] = 255
+
+    mask = np.memmap(tempfile.TemporaryFile(), dtype=np.uint8, mode='w+', shape=image.shape[:2])
+    for (tile, padded, inner) in get_tiles(image.shape, tile_size, margin):
+        layer = cv2.medianBlur(is_in_layer[image[padded]], 3)
+        layer = erode(dilate(layer, radius), radius)
+        layer = dilate(erode(layer, radius), radius)
+        mask[tile] = layer[inner]
+    return mask
+
+
+def dilate(layer, radius):
+    """
+    Dilates a layer with a disk. The disk is applied through the distance to the layer, which takes the same time for
+    any radius.
+
+    Parameters:
+    layer (numpy.ndarray): The layer as 0 and 255.
+    radius (int): The radius of the disk in pixels.
+
+    Returns:
+    numpy.ndarray: The dilated layer as 0 and 255.
+    """
+    distances = cv2.distanceTransform(cv2.bitwise_not(layer), cv2.DIST_L2, cv2.DIST_MASK_PRECISE)
+    return (distances <= radius).astype(np.uint8) * 255
+
+
+def erode(layer, radius):
+    """
+    Erodes a layer with a disk, through the distance to the pixels outside of the layer. The edges of the image are not
+    eroded, as with cv2.erode.
+
+    Parameters:
+    layer (numpy.ndarray): The layer as 0 and 255.
+    radius (int): The radius of the disk in pixels.
+
+    Returns:
+    numpy.ndarray: The eroded layer as 0 and 255.
+    """
+    distances = cv2.distanceTransform(layer, cv2.DIST_L2, cv2.DIST_MASK_PRECISE)
+    return (distances > radius).astype(np.uint8) * 255
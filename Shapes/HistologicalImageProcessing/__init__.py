@@ -1,3 +1,4 @@
 from .Islands import *
 from .SmartColorBinning import *
+from .Tiles import *
 from .utils import *
@@ -70,17 +70,18 @@ def dilate_and_erode(img):
 
     return img_dilation
 
-def downsample(img):
+def downsample(img, max_size=500):
     """
-    Downsample an image to a maximum size of 500 pixels in either dimension.
+    Downsample an image to a maximum size of max_size pixels in either dimension.
 
     Parameters:
     img (numpy.ndarray): Image to downsample
+    max_size (int): Largest size of the downsampled image in pixels (default 500)
 
     Returns:
     numpy.ndarray: Downsampled image
     """
-    scale_factor = 500 / max(img.shape[0], img.shape[1])
+    scale_factor = max_size / max(img.shape[0], img.shape[1])
     scale_factor = scale_factor if scale_factor < 1 else 1
     return cv2.resize(img, (0, 0), fx=scale_factor, fy=scale_factor)
 
@@ -485,3 +486,37 @@ def convert_jpg_to_png(file_name):
         img.save(temp_file_path, "PNG")
 
     return temp_file_path
+
+
+def load_image(file_name):
+    """
+        Reads a JPG, PNG or TIFF image into memory as float32 values between 0 and 1, the way plt.imread reads a PNG,
+        so every format goes through one decoder without a temporary file.
+
+        32-bit integer images are read as 16-bit grayscale, which is how older Pillow versions open 16-bit PNGs and
+        TIFFs, and 32-bit float images are read as they are. Either raises a ValueError if its values are outside
+        that range, instead of being clipped.
+
+        Parameters:
+        - file_name: Name of the image file.
+
+        Returns:
+        - img: The image, shaped (height, width) for grayscale and (height, width, 3) or (height, width, 4) for RGB
+            and RGBA.
+    """
+    with Image.open(file_name) as img:
+        mode = img.mode
+        if mode in ("1", "L", "RGB", "RGBA", "I", "F") or mode.startswith("I;16"):
+            pixels = np.asarray(img)
+        else:
+            # Palette and grayscale with alpha images are expanded as plt.imread does, other modes (e.g. CMYK) to RGB
+            pixels = np.asarray(img.convert("RGBA" if mode in ("P", "PA", "LA") else "RGB"))
+
+    if pixels.dtype == bool:
+        return pixels.astype(np.float32)
+    if mode in ("I", "F"):
+        maximum = 1 if mode == "F" else np.iinfo(np.uint16).max
+        if pixels.size and not (pixels.min() >= 0 and pixels.max() <= maximum):
+            raise ValueError(f"The {mode} mode image '{file_name}' has values outside [0, {maximum}].")
+        return np.divide(pixels, maximum, dtype=np.float32)
+    return np.divide(pixels, np.iinfo(pixels.dtype).max, dtype=np.float32)
@@ -1,13 +1,19 @@
 import cv2
+import hashlib
+import json
+import math
+import os
+import zipfile
 from Coordinate import Coordinate, Coordinates
 import numpy as np
-from tqdm import tqdm
 from .HistologicalImageProcessing import *
+from scipy import ndimage
 from scipy.spatial import cKDTree
-from Constants import MINIMUM_DISTANCE_BETWEEN_TWO_LIGHT_BEAMS
-import tkinter as tk
-from tkinter import simpledialog
-from PIL import Image, ImageTk
+from shapely.geometry import Polygon
+from shapely.ops import unary_union
+from Constants import MINIMUM_DISTANCE_BETWEEN_TWO_LIGHT_BEAMS, MOTOR_MINIMUM_STEP_SIZE
+from ShapeOrderOptimizer import ShapeOrderOptimizer
+from PIL import Image
 import matplotlib
 try:
     matplotlib.use('TkAgg')
@@ -15,6 +21,37 @@ except ImportError:
     matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 
+NEAREST_NEIGHBOR = "nearest_neighbor"
+SCAN_LINES = "scan_lines"
+CONTOURS = "contours"
+TOOLPATH_MODES = (NEAREST_NEIGHBOR, SCAN_LINES, CONTOURS)
+
+# The images that can be read into memory. The tiled mode also reads 8-bit grayscale .npy arrays.
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.tif', '.tiff')
+
+# A layer selection saved next to the image, e.g. 'slide.jpg.layers.json', is used instead of asking the user
+LAYER_SELECTION_SUFFIX = '.layers.json'
+
+# The segmentation and the filled layers of an image are cached in this directory next to it, in '<digest>.npz' where the
+# digest covers the image bytes, LAYER_PROCESSING_PARAMETERS and the source of the image processing modules
+LAYER_CACHE_DIRECTORY = '.histology_cache'
+
+# The parameters of the processing of the cached layers: the size the image is downsampled to in pixels, the sizes of
+# the median and Gaussian filters that clean a layer, the level a layer is binarized at, the level below which the
+# blurred layer is noise, and the size of the blur of the colors the outlines are filled over
+LAYER_PROCESSING_PARAMETERS = {
+    "downsample_size": 500,
+    "median_blur_size": 3,
+    "binary_threshold": 0.6,
+    "blur_size": 5,
+    "noise_threshold": 0.05,
+    "color_blur_size": 21,
+}
+_PROCESSING_DIRECTORY = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'HistologicalImageProcessing')
+
+# The (row, column) offsets of the 8 neighbors of a pixel, in the order a flood fill queues them
+_NEIGHBOR_OFFSETS = np.array([(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)])
+
 
 class HistologyImage:
     """
@@ -39,12 +76,12 @@ class HistologyImage:
         factor (float): The scaling factor based on the dimensions and maximum dimension of the image.
     """
 
-    def __init__(self, img_file, height_mm=None, width_mm=None, center=Coordinate(0, 0), rotation_angle_degrees=0, beam_diameter=0.1):
+    def __init__(self, img_file, height_mm=None, width_mm=None, center=Coordinate(0, 0), rotation_angle_degrees=0, beam_diameter=0.1, toolpath_mode=None, layer_selection=None, uses_layer_cache=True, tile_size=None):
         """
         Initialize the HistologyImage object.
 
         Parameters:
-        - img_file (str): The path to the image file.
+        - img_file (str): The path to the image file, a JPG, PNG or TIFF image.
         - height_mm (float, optional): The height of the image in mm. Defaults to None. 
             If height_mm is not provided, it will be calculated based on the width_mm and the aspect ratio of the image.
         - width_mm (float, optional): The width of the image in mm. Defaults to None. 
@@ -52,76 +89,108 @@ class HistologyImage:
         - center (Coordinate, optional): The center coordinate of the image. Defaults to (0, 0).
         - rotation_angle_degrees (float, optional): The rotation angle of the image in degrees. Defaults to 0.
         - beam_diameter (float, optional): The beam diameter. Defaults to 0.1.
+        - toolpath_mode (str, optional): How each layer is cured: "nearest_neighbor" to hop between pixels,
+            "scan_lines" to sweep horizontal lines one beam pitch apart, or "contours" to fill the outlines of the layer
+            with inward offsets like a filled shape. Defaults to "nearest_neighbor", or "scan_lines" with tile_size.
+        - layer_selection (dict or str, optional): The layers to cure and their stiffness (Pa), so no window is shown.
+            Either {"layers": {index: stiffness}} with the index of a layer in the order select_layers shows them
+            (starting at 0), or {"gray_levels": {gray_level: stiffness}} to pick the layer whose gray level (0-255) is
+            closest, or the path to a JSON file holding one of these. Defaults to None, which uses
+            '<img_file>.layers.json' if it exists and asks the user otherwise.
+        - uses_layer_cache (bool, optional): Whether the segmented and filled layers are read from and written to
+            LAYER_CACHE_DIRECTORY next to the image, so a re-run with another stiffness or placement skips the image
+            processing. Defaults to True.
+        - tile_size (int, optional): Process the image at full resolution in tiles of this many pixels instead of
+            downsampling it to 500 pixels. The image is read as 8-bit gray values (a .npy file is memory mapped), and
+            every layer is cleaned with filters that only reach a margin around each tile, so memory grows with one
+            byte per pixel for the image and for a layer mask rather than with copies of the image. Tiles should be
+            several beam diameters wide, since the margin is about one. The layer cache is not used.
+            The "scan_lines" and "contours" toolpaths read the layer masks tile by tile too and grow with the outline
+            of the tissue. "nearest_neighbor" grows with the number of pixels, so it cannot be used with tile_size.
+            Defaults to None.
         """
-        if img_file.lower().endswith('.jpg'):
-            img_file = convert_jpg_to_png(img_file)
+        if toolpath_mode is None:
+            toolpath_mode = NEAREST_NEIGHBOR if tile_size is None else SCAN_LINES
+
+        if toolpath_mode not in TOOLPATH_MODES:
+            raise ValueError(f"Unknown toolpath mode '{toolpath_mode}'. Choose one of {list(TOOLPATH_MODES)}.")
+
+        if toolpath_mode == NEAREST_NEIGHBOR and tile_size is not None:
+            raise ValueError(f"The toolpath mode '{NEAREST_NEIGHBOR}' visits every pixel of the slide, which is too many at full resolution. Choose one of {[SCAN_LINES, CONTOURS]} with tile_size.")
 
-        if not img_file.lower().endswith('.png'):
-            raise ValueError("The image file must be a PNG file.")
+        if layer_selection is None and os.path.exists(img_file + LAYER_SELECTION_SUFFIX):
+            layer_selection = img_file + LAYER_SELECTION_SUFFIX
+
+        if isinstance(layer_selection, str):
+            with open(layer_selection) as f:
+                layer_selection = json.load(f)
+
+        if layer_selection is not None and set(layer_selection) - {"layers", "gray_levels"}:
+            raise ValueError(f"Unknown layer selection keys {sorted(set(layer_selection) - {'layers', 'gray_levels'})}. Choose from ['layers', 'gray_levels'].")
+
+        if tile_size is None and not img_file.lower().endswith(IMAGE_EXTENSIONS):
+            raise ValueError(f"The image file must be one of {list(IMAGE_EXTENSIONS)}.")
         
         if height_mm is None and width_mm is None:
             raise ValueError("The height or width of the image in mm must be provided.")
         
         self.img_file = img_file
-        self.img = plt.imread(self.img_file)
+        self.img = load_image(self.img_file) if tile_size is None else None
+        image_shape = self.img.shape if tile_size is None else get_image_size(self.img_file)
         self.center = center
         self.rotation = rotation_angle_degrees
         self.beam_diameter = beam_diameter
+        self.toolpath_mode = toolpath_mode
+        self.layer_selection = layer_selection
+        self.uses_layer_cache = uses_layer_cache
+        self.tile_size = tile_size
+        self.layer_cache_path = None
 
         self.selected_layers = []
 
         if height_mm and width_mm is None:
-            width_mm = (height_mm / self.img.shape[0]) * self.img.shape[1]
+            width_mm = (height_mm / image_shape[0]) * image_shape[1]
         
         if width_mm and height_mm is None:
-            height_mm = (width_mm / self.img.shape[1]) * self.img.shape[0]
+            height_mm = (width_mm / image_shape[1]) * image_shape[0]
 
         self.dimensions = (width_mm, height_mm)
 
     def get_coordinates(self):
-        og_img = downsample(self.img)
-        segmented_images = segment_images(og_img)
+        if self.tile_size is not None:
+            return self.get_tiled_coordinates()
+
+        cache = self.read_layer_cache() if self.uses_layer_cache else {}
+        cached_keys = set(cache)
+        og_img = None
+        if "segmentation_labels" in cache:
+            segmented_images = SegmentedImages.from_arrays(cache)
+        else:
+            og_img = downsample(self.img, LAYER_PROCESSING_PARAMETERS["downsample_size"])
+            segmented_images = segment_images(og_img)
+            cache.update(segmented_images.to_arrays())
 
         coordinates = Coordinates()
         coordinate_layers = []
         colors = [(0, 255, 0), (255, 0, 0), (0, 0, 255), (255, 255, 0), (0, 255, 255), (255, 0, 255), (255, 255, 255), (0, 0, 0), (128, 128, 128), (128, 0, 0), (0, 128, 0), (0, 0, 128), (128, 128, 0), (128, 0, 128), (0, 128, 128)]
 
         layers = []
-        target_values = list(segmented_images.values())
-        self.select_layers(target_values)
-        selected_images = [target_values[i] for i, _ in self.selected_layers]
+        if self.layer_selection is None:
+            self.select_layers(list(segmented_images.values()))
+        else:
+            self.selected_layers = self.get_selected_layers(self.layer_selection, list(segmented_images.keys()))
         stiffness = [i[1] for i in self.selected_layers]
-        for (i, image) in enumerate(selected_images):
-            gray_img = image
-            if len(image.shape) == 3:
-                gray_img = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-
-            medianBlurred = cv2.medianBlur(gray_img, 3)
-            
-            binary_img = (medianBlurred > 0.6).astype(np.float32)
-            blurred = blur(binary_img, 5)
-            reduced_noise_img = dilate_and_erode(blurred)
-            binary_img2 = (reduced_noise_img < 0.05).astype(np.float32)
-            
-            edge_detection_img = canny_edge_detection(binary_img2)
-
-            labeled_image, num_islands, island_sizes, thicknesses, island_mask = detect_islands(edge_detection_img)
-
-            cleaned_image = remove_islands(edge_detection_img, island_mask)
-    
-            opened_edges_colored = np.zeros_like(og_img)
-            opened_edges_colored[cleaned_image > 0] = (0, 255, 0)
-            
-            # get the associated color from the og_img
-            colored_img = np.zeros_like(og_img)
-            colored_img[image > 0] = og_img[image > 0]
-            
-            colored_img = blur(colored_img, 21)
-            opened_edges_colored_overlayed = combine_images(opened_edges_colored, colored_img)
-
+        for (i, (index, _)) in enumerate(self.selected_layers):
             layer_color = colors.pop(0)
             colors.append(layer_color)
-            filled_shape = fill_shape(opened_edges_colored_overlayed, layer_color)
+
+            # The filled layer depends on the color it is filled with, which depends on the order of the selection
+            key = f"filled_layer_{index}_{'_'.join(str(c) for c in layer_color)}"
+            if key not in cache:
+                if og_img is None:
+                    og_img = downsample(self.img, LAYER_PROCESSING_PARAMETERS["downsample_size"])
+                cache[key] = self.fill_layer(og_img, segmented_images.get_image(index), layer_color)
+            filled_shape = cache[key]
 
             layers.append(filled_shape)
 
@@ -132,6 +201,9 @@ class HistologyImage:
             coordinate_layers.append(coordinates_layer)
             coordinates += coordinates_layer
 
+        if self.uses_layer_cache and set(cache) != cached_keys:
+            self.write_layer_cache(cache)
+
         if len(coordinates) != 0:
             coordinates.normalize(center=self.center, rotation=self.rotation, stiffness=0, beam_diameter_mm=self.beam_diameter, is_layer=False, is_multiple_layers=True)
         
@@ -142,6 +214,131 @@ class HistologyImage:
 
         return coordinates
     
+    def get_tiled_coordinates(self):
+        """
+        Extracts the coordinates of the selected layers from the full resolution image, processed in tiles.
+
+        Returns:
+            Coordinates: The extracted coordinates.
+        """
+        image = read_grayscale(self.img_file)
+        value_labels, segmented_images = segment_tiles(image, self.tile_size)
+        if self.layer_selection is None:
+            self.select_layers(list(segmented_images.values()))
+        else:
+            self.selected_layers = self.get_selected_layers(self.layer_selection, list(segmented_images.keys()))
+
+        # Tissue narrower than half the beam is dropped, as the 500 pixel pipeline drops islands
+        pixels_per_mm = image.shape[1] / self.dimensions[0]
+        kernel_size = max(2 * int(self.beam_diameter * pixels_per_mm / 4) + 1, 3)
+
+        coordinates = Coordinates()
+        for (index, stiffness) in self.selected_layers:
+            mask = get_tiled_layer_mask(image, value_labels, segmented_images.label_ranges[index, 0], self.tile_size, kernel_size)
+            coordinates += self.convert_pixels_to_coordinates(np.flip(mask, axis=1), stiffness)
+
+        if len(coordinates) != 0:
+            coordinates.normalize(center=self.center, rotation=self.rotation, stiffness=0, beam_diameter_mm=self.beam_diameter, is_layer=False, is_multiple_layers=True)
+
+        return coordinates
+
+    @staticmethod
+    def fill_layer(og_img, image, layer_color):
+        """
+        Finds the outlines of the tissue in a segmented layer and fills them with a color.
+
+        Args:
+            og_img (numpy.ndarray): The downsampled image the layer was segmented from.
+            image (numpy.ndarray): The segmented layer.
+            layer_color (tuple): The color the layer is filled with.
+
+        Returns:
+            numpy.ndarray: The filled layer, shaped like og_img.
+        """
+        gray_img = image
+        if len(image.shape) == 3:
+            gray_img = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+        parameters = LAYER_PROCESSING_PARAMETERS
+        medianBlurred = cv2.medianBlur(gray_img, parameters["median_blur_size"])
+
+        binary_img = (medianBlurred > parameters["binary_threshold"]).astype(np.float32)
+        blurred = blur(binary_img, parameters["blur_size"])
+        reduced_noise_img = dilate_and_erode(blurred)
+        binary_img2 = (reduced_noise_img < parameters["noise_threshold"]).astype(np.float32)
+
+        edge_detection_img = canny_edge_detection(binary_img2)
+
+        labeled_image, num_islands, island_sizes, thicknesses, island_mask = detect_islands(edge_detection_img)
+
+        cleaned_image = remove_islands(edge_detection_img, island_mask)
+
+        opened_edges_colored = np.zeros_like(og_img)
+        opened_edges_colored[cleaned_image > 0] = (0, 255, 0)
+
+        # get the associated color from the og_img
+        colored_img = np.zeros_like(og_img)
+        colored_img[image > 0] = og_img[image > 0]
+
+        colored_img = blur(colored_img, parameters["color_blur_size"])
+        opened_edges_colored_overlayed = combine_images(opened_edges_colored, colored_img)
+
+        return fill_shape(opened_edges_colored_overlayed, layer_color)
+
+    def get_layer_cache_path(self):
+        """
+        Returns the path of the layer cache of the image, named after the digest of its bytes and of how its layers are
+        processed: LAYER_PROCESSING_PARAMETERS, and the source of the image processing modules for the constants they
+        hold. The digest is computed once per instance.
+
+        Returns:
+            str: The path of the layer cache.
+        """
+        if self.layer_cache_path is None:
+            digest = hashlib.sha256(json.dumps(LAYER_PROCESSING_PARAMETERS, sort_keys=True).encode())
+            for file_name in sorted(os.listdir(_PROCESSING_DIRECTORY)):
+                if file_name.endswith('.py'):
+                    with open(os.path.join(_PROCESSING_DIRECTORY, file_name), 'rb') as f:
+                        digest.update(f.read())
+            with open(self.img_file, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+            self.layer_cache_path = os.path.join(os.path.dirname(os.path.abspath(self.img_file)), LAYER_CACHE_DIRECTORY, f"{digest.hexdigest()}.npz")
+        return self.layer_cache_path
+
+    def read_layer_cache(self):
+        """
+        Reads the layer cache of the image.
+
+        Returns:
+            dict: The cached arrays by name, or an empty dict if there is no readable cache.
+        """
+        try:
+            with np.load(self.get_layer_cache_path()) as cache:
+                return dict(cache)
+        except (OSError, ValueError, zipfile.BadZipFile):
+            return {}
+
+    def write_layer_cache(self, cache):
+        """
+        Writes the layer cache of the image. The file is replaced atomically so concurrent workers never read a
+        partial cache, and failures (e.g. a read-only directory) are ignored since the cache is only an optimization.
+
+        Args:
+            cache (dict): The arrays to cache by name.
+        """
+        cache_path = self.get_layer_cache_path()
+        temporary_path = f"{cache_path}.{os.getpid()}.tmp.npz"
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            np.savez_compressed(temporary_path, **cache)
+            os.replace(temporary_path, cache_path)
+        except OSError:
+            try:
+                os.remove(temporary_path)
+            except OSError:
+                pass
+
     def plot_spatial_layers(self, layers, scatter=False):
         cs = ["green", "red", "blue", "yellow", "cyan", "magenta", "white", "black", "gray", "maroon", "navy", "olive", "purple", "teal"]
         for i, layer in enumerate(layers):
@@ -172,12 +369,41 @@ class HistologyImage:
             ax.axis('off')
         plt.show()
     
+    @staticmethod
+    def get_selected_layers(layer_selection, gray_levels):
+        """
+        Resolves a layer selection to the layers to cure, as select_layers would have stored them.
+
+        Args:
+            layer_selection (dict): {"layers": {index: stiffness}} and/or {"gray_levels": {gray_level: stiffness}}.
+                Keys may be strings, as they are when read from JSON.
+            gray_levels (list): The gray level of each segmented layer, in layer order.
+
+        Returns:
+            list: The (layer index, stiffness) of each selected layer, by layer index.
+        """
+        selected_layers = {}
+        for (index, stiffness) in layer_selection.get("layers", {}).items():
+            if not 0 <= int(index) < len(gray_levels):
+                raise ValueError(f"Layer {index} does not exist. The image has {len(gray_levels)} layers.")
+            selected_layers[int(index)] = float(stiffness)
+
+        for (gray_level, stiffness) in layer_selection.get("gray_levels", {}).items():
+            index = int(np.argmin(np.abs(np.asarray(gray_levels) - float(gray_level))))
+            selected_layers[index] = float(stiffness)
+
+        return sorted(selected_layers.items())
+
     def select_layers(self, layers):
         """
             use tkinter to create a GUI so the user can select the layer to use.
             display all the layers to the user with the ability for the image to be full screen. 
             The user should select each layer using a radio button if a layer is selected, a text box should appear for the user to enter the stiffness value
         """
+        # Imported here so headless runs with a layer selection never need a display
+        import tkinter as tk
+        from PIL import ImageTk
+
         def on_select():
             selected_layers = []
             button.config(state=tk.DISABLED)
@@ -259,93 +485,461 @@ class HistologyImage:
             Coordinates: The extracted coordinates.
 
         """
-        coordinates = Coordinates()
-        pixels = np.flip(pixels, axis=1)
-        visited = np.zeros((len(pixels), len(pixels[0])))
-        
+        pixels = np.flip(np.asarray(pixels), axis=1)
+        if pixels.size == 0:
+            return Coordinates()
+
         canvas_width = self.dimensions[0]
         canvas_height = self.dimensions[1]
 
-        width = 0 if len(pixels) == 0 else len(pixels[0])
-        height = len(pixels)
-
-        for row in tqdm(range(height), desc="Getting Coordinates"):
-            for col in range(width):
-                if pixels[row][col] == 255 and visited[row][col] == 0:
-                    queue = [(row, col)]
-                    while queue:
-                        y, x = queue.pop(0)
-                        if visited[y][x] == 0:
-                            visited[y][x] = 1
-                            # Scale x and y to fit inside width and height
-                            scaled_x = (canvas_width * x) / width
-                            scaled_y = (canvas_height * (height - y)) / height
-                            coordinates.append(Coordinate(scaled_x, scaled_y))
-
-                            # Define the possible offsets for neighboring pixels
-                            offsets = [(-1, -1), (-1, 0), (-1, 1),
-                                        (0, -1),           (0, 1),
-                                        (1, -1),  (1, 0),  (1, 1)]
-                            
-                            neighbors = []
-                            for dx, dy in offsets:
-                                nx, ny = x + dx, y + dy
-
-                                # Check if the neighbor is within bounds
-                                if 0 <= nx < width - 1 and 0 <= ny < height - 1 and visited[ny][nx] == 0:
-                                    neighbors.append((ny, nx))
-
-                            for neighbor in neighbors:
-                                if pixels[neighbor[0]][neighbor[1]] == 255:
-                                    queue.append(neighbor)
-
-        coordinates = self.ordered_by_nearest_neighbor(coordinates, self.beam_diameter)
+        if self.toolpath_mode == CONTOURS:
+            coordinates = Coordinates()
+            # Holes smaller than the beam are cured over anyway
+            minimum_hole_area_mm2 = math.pi * (self.beam_diameter / 2) ** 2
+            if self.tile_size is None:
+                polygons = self.get_contour_polygons(pixels == 255, canvas_width, canvas_height, minimum_hole_area_mm2=minimum_hole_area_mm2)
+            else:
+                polygons = self.get_tiled_contour_polygons(pixels, canvas_width, canvas_height, self.tile_size, minimum_hole_area_mm2=minimum_hole_area_mm2)
+            filled_polygons = [outline.fill(holes=holes, keeps_all_parts=True) for (outline, holes) in polygons]
+            for filled_polygon in ShapeOrderOptimizer().optimize(filled_polygons):
+                coordinates += filled_polygon
+        else:
+            if self.toolpath_mode == SCAN_LINES:
+                points, lamp_states = self.get_scan_line_path(pixels, canvas_width, canvas_height, tile_size=self.tile_size)
+            else:
+                height, width = pixels.shape
+                rows, cols = self.get_flood_fill_order(pixels == 255)
+                if len(rows) == 0:
+                    return Coordinates()
 
-        if len(coordinates) != 0:
-            coordinates.normalize(center=self.center, rotation=self.rotation, stiffness=stiffness, beam_diameter_mm=self.beam_diameter, is_layer=True, is_multiple_layers=False)
+                # Scale x and y to fit inside width and height
+                points = np.column_stack(((canvas_width * cols) / width, (canvas_height * (height - rows)) / height))
+
+                indices, lamp_states = self.get_nearest_neighbor_path(points, self.beam_diameter)
+                points = points[indices]
+
+            coordinates = Coordinates()
+            for (x, y), lp in zip(points.tolist(), lamp_states.tolist()):
+                coordinate = Coordinate(x, y)
+                coordinate.lp = lp
+                coordinates.append(coordinate)
+
+        if len(coordinates) == 0:
+            return coordinates
+
+        coordinates.normalize(center=self.center, rotation=self.rotation, stiffness=stiffness, beam_diameter_mm=self.beam_diameter, is_layer=True, is_multiple_layers=False)
 
         # coordinates.plot(plot_lines=False, plot_points=True)
 
         return coordinates
 
-    def ordered_by_nearest_neighbor(self, coordinates, beam_diameter):
+    @staticmethod
+    def get_flood_fill_order(mask):
+        """
+        Returns the pixels of a mask in the order of a breadth-first flood fill started from every unvisited pixel in
+        raster order. Neighbors are 8-connected, but pixels in the last row or column are never entered from a
+        neighbor, so they are only reached as the start of a fill.
+
+        All fills advance together, one breadth-first layer per step, and the pixels are then grouped by fill.
+
+        Args:
+            mask (numpy.ndarray): The pixels to visit, as a 2D boolean array.
+
+        Returns:
+            tuple: The rows and columns of the pixels in fill order, as arrays.
+        """
+        height, width = mask.shape
+        mask = mask.ravel()
+        enterable = np.zeros((height, width), dtype=bool)
+        enterable[:-1, :-1] = mask.reshape(height, width)[:-1, :-1]
+        labels, count = ndimage.label(enterable, structure=np.ones((3, 3)))
+        labels = labels.ravel()
+        enterable = enterable.ravel()
+
+        # Each component is filled from its first pixel in raster order
+        component_pixels = np.flatnonzero(labels)
+        _, first = np.unique(labels[component_pixels], return_index=True)
+        fill_starts = component_pixels[first]
+        start_keys = fill_starts.copy()
+
+        # A fill started from a last-column pixel enters the pixel below-left of it. If that pixel's component starts
+        # on the next row, it has not been filled yet, so this fill takes it over and visits it before its first pixel.
+        edge_pixels = np.flatnonzero(mask & ~enterable)
+        below_left = edge_pixels + width - 1
+        takes_over = (edge_pixels % width == width - 1) & (below_left < len(mask))
+        takes_over[takes_over] = enterable[below_left[takes_over]]
+        takes_over_component = labels[below_left[takes_over]] - 1
+        starts_next_row = fill_starts[takes_over_component] // width == edge_pixels[takes_over] // width + 1
+        takes_over[takes_over] = starts_next_row
+        takes_over_component = takes_over_component[starts_next_row]
+        start_keys[takes_over_component] = edge_pixels[takes_over]
+        fill_starts[takes_over_component] = below_left[takes_over]
+        single_pixels = edge_pixels[~takes_over]
+
+        # Rank the fills by the raster position of the pixel they start from
+        ranks = np.argsort(np.argsort(np.concatenate((start_keys, single_pixels))))
+        component_ranks = ranks[:count]
+
+        visited = np.zeros(len(mask), dtype=bool)
+        frontier = fill_starts[np.argsort(component_ranks)]
+        visited[frontier] = True
+        layers = [frontier]
+        while len(frontier):
+            rows = frontier[:, None] // width + _NEIGHBOR_OFFSETS[:, 0]
+            cols = frontier[:, None] % width + _NEIGHBOR_OFFSETS[:, 1]
+            inside = (rows >= 0) & (rows < height - 1) & (cols >= 0) & (cols < width - 1)
+            neighbors = (rows * width + cols)[inside]
+            neighbors = neighbors[enterable[neighbors] & ~visited[neighbors]]
+
+            # A pixel is queued by the first pixel of the layer that reaches it
+            _, first = np.unique(neighbors, return_index=True)
+            frontier = neighbors[np.sort(first)]
+            visited[frontier] = True
+            layers.append(frontier)
+
+        filled = np.concatenate(layers)
+        depths = np.repeat(np.arange(len(layers)), [len(layer) for layer in layers])
+        pixels = np.concatenate((edge_pixels[takes_over], single_pixels, filled))
+        pixel_ranks = np.concatenate((component_ranks[takes_over_component], ranks[count:], component_ranks[labels[filled] - 1]))
+        pixel_depths = np.concatenate((np.full(len(edge_pixels), -1), depths))
+
+        # The sort is stable, so the pixels of a layer keep their queue order
+        pixels = pixels[np.lexsort((pixel_depths, pixel_ranks))]
+        return pixels // width, pixels % width
+
+    @staticmethod
+    def get_contour_polygons(mask, width_mm, height_mm, tolerance_mm=MOTOR_MINIMUM_STEP_SIZE, minimum_hole_area_mm2=0):
+        """
+        Traces the outline of every region of a mask and of the holes in it, simplified with the Douglas-Peucker
+        algorithm.
+
+        Args:
+            mask (numpy.ndarray): The pixels of the layer, as a 2D boolean array whose first row is the top of the image.
+            width_mm (float): The width of the image in mm.
+            height_mm (float): The height of the image in mm.
+            tolerance_mm (float, optional): The largest distance in mm a simplified outline may deviate from the traced
+                one. Outlines are never simplified by less than half a pixel, the precision of the mask itself.
+                Defaults to the motor step size.
+            minimum_hole_area_mm2 (float, optional): Holes with a smaller area in mm² are filled. Defaults to 0.
+
+        Returns:
+            list: For every region whose outline keeps at least three corners, its outline and the outlines of its
+                holes, as Coordinates in mm.
+        """
+        height, width = mask.shape
+        contours, hierarchy = cv2.findContours(mask.astype(np.uint8), cv2.RETR_CCOMP, cv2.CHAIN_APPROX_NONE)
+        epsilon = max(float(tolerance_mm) * width / width_mm, 0.5)
+        pixel_area_mm2 = (width_mm / width) * (height_mm / height)
+
+        def to_coordinates(contour):
+            corners = cv2.approxPolyDP(contour, epsilon, True).reshape(-1, 2)
+            if len(corners) < 3:
+                return None
+            outline = Coordinates()
+            for (x, y) in zip(((width_mm * corners[:, 0]) / width).tolist(), ((height_mm * (height - corners[:, 1])) / height).tolist()):
+                outline.append(Coordinate(x, y))
+            return outline
+
+        # The hierarchy holds the next contour on the same level, the previous one, the first child and the parent
+        polygons = []
+        for (i, (_, _, first_hole, parent)) in enumerate(hierarchy[0] if len(contours) else []):
+            if parent != -1:
+                continue
+            outline = to_coordinates(contours[i])
+            if outline is None:
+                continue
+
+            holes = []
+            while first_hole != -1:
+                hole = None
+                if cv2.contourArea(contours[first_hole]) * pixel_area_mm2 >= minimum_hole_area_mm2:
+                    hole = to_coordinates(contours[first_hole])
+                if hole is not None:
+                    holes.append(hole)
+                first_hole = hierarchy[0][first_hole][0]
+            polygons.append((outline, holes))
+        return polygons
+
+    @staticmethod
+    def get_tiled_contour_polygons(mask, width_mm, height_mm, tile_size, tolerance_mm=MOTOR_MINIMUM_STEP_SIZE, minimum_hole_area_mm2=0):
+        """
+        Traces the outlines of a mask like get_contour_polygons, one tile at a time, so a memory-mapped mask is never
+        read whole. Each tile overlaps the next by a pixel, so the outlines of a region that crosses a seam meet along
+        it and are merged into one polygon before it is simplified.
+
+        Args:
+            mask (numpy.ndarray): The pixels of the layer, as a 2D array whose first row is the top of the image and
+                whose nonzero pixels are in the layer.
+            width_mm (float): The width of the image in mm.
+            height_mm (float): The height of the image in mm.
+            tile_size (int): The size of a tile in pixels.
+            tolerance_mm (float, optional): The largest distance in mm a simplified outline may deviate from the traced
+                one, at least half a pixel. Defaults to the motor step size.
+            minimum_hole_area_mm2 (float, optional): Holes with a smaller area in mm² are filled. Defaults to 0.
+
+        Returns:
+            list: For every region whose outline keeps at least three corners, its outline and the outlines of its
+                holes, as Coordinates in mm.
+        """
+        height, width = mask.shape
+        epsilon = max(float(tolerance_mm) * width / width_mm, 0.5)
+        pixel_area_mm2 = (width_mm / width) * (height_mm / height)
+
+        pieces = []
+        for (tile, _, _) in get_tiles(mask.shape, tile_size):
+            rows = slice(tile[0].start, min(tile[0].stop + 1, height))
+            cols = slice(tile[1].start, min(tile[1].stop + 1, width))
+            contours, hierarchy = cv2.findContours((mask[rows, cols] > 0).astype(np.uint8), cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE)
+            offset = np.array([cols.start, rows.start])
+            for (i, (_, _, first_hole, parent)) in enumerate(hierarchy[0] if len(contours) else []):
+                if parent != -1 or len(contours[i]) < 3:
+                    continue
+                holes = []
+                while first_hole != -1:
+                    if len(contours[first_hole]) >= 3:
+                        holes.append(contours[first_hole].reshape(-1, 2) + offset)
+                    first_hole = hierarchy[0][first_hole][0]
+                # Outlines traced through a line of single pixels enclose no area and are dropped
+                piece = Polygon(contours[i].reshape(-1, 2) + offset, holes).buffer(0)
+                if not piece.is_empty:
+                    pieces.append(piece)
+
+        def to_coordinates(ring):
+            corners = np.asarray(ring.coords)[:-1]
+            if len(corners) < 3:
+                return None
+            outline = Coordinates()
+            for (x, y) in zip(((width_mm * corners[:, 0]) / width).tolist(), ((height_mm * (height - corners[:, 1])) / height).tolist()):
+                outline.append(Coordinate(x, y))
+            return outline
+
+        merged = unary_union(pieces)
+        polygons = []
+        for region in getattr(merged, "geoms", [merged]):
+            if region.is_empty or region.geom_type != "Polygon":
+                continue
+            region = region.simplify(epsilon, preserve_topology=True)
+            outline = to_coordinates(region.exterior)
+            if outline is None:
+                continue
+
+            holes = []
+            for ring in region.interiors:
+                hole = to_coordinates(ring) if Polygon(ring).area * pixel_area_mm2 >= minimum_hole_area_mm2 else None
+                if hole is not None:
+                    holes.append(hole)
+            polygons.append((outline, holes))
+        return polygons
+
+    @staticmethod
+    def get_scan_line_path(mask, width_mm, height_mm, pitch=MINIMUM_DISTANCE_BETWEEN_TWO_LIGHT_BEAMS, tile_size=None):
+        """
+        Covers a mask with horizontal scan lines one pitch apart. Each line cures the pixels of the band of rows around
+        it, and every run of such pixels is cured with one constant-velocity move. Touching runs form regions that are
+        swept one after another in alternating directions (boustrophedon), so the stage does not cross gaps between
+        regions on every line. Each region is swept from whichever corner is closest to where the previous one ended,
+        and moves onto another line are made vertically first and then along the line.
+
+        Args:
+            mask (numpy.ndarray): The pixels to cure, as a 2D array whose first row is the top of the image and whose
+                nonzero pixels are cured.
+            width_mm (float): The width of the image in mm.
+            height_mm (float): The height of the image in mm.
+            pitch (float, optional): The distance between scan lines in mm. Defaults to the minimum distance between
+                two light beams.
+            tile_size (int, optional): Read the mask in tiles of this many pixels, so a memory-mapped mask is never
+                read whole. Defaults to None, to read it at once.
+
+        Returns:
+            tuple: The points of the path as an (n, 2) float array in mm, and whether the lamp is on while moving to
+                each of them, as an array. Only the moves along runs are made with the lamp on.
+        """
+        height, width = mask.shape
+        pitch = float(pitch)
+
+        # Assign every row to the band of the scan line through its center
+        row_centers = (height_mm * (height - np.arange(height) - 0.5)) / height
+        row_bands = np.floor(row_centers / pitch).astype(np.int64)
+        bands = np.zeros((row_bands.max() + 1, width), dtype=bool)
+        # The bands hold a row per scan line, so they stay small however large the mask is
+        for (tile, _, _) in get_tiles(mask.shape, tile_size or max(height, width)):
+            np.logical_or.at(bands[:, tile[1]], row_bands[tile[0]], mask[tile] > 0)
+
+        # Runs start where a band turns on and end where it turns off, in row-major order
+        edges = np.diff(np.pad(bands, ((0, 0), (1, 1))).astype(np.int8), axis=1)
+        run_bands, run_starts = np.nonzero(edges == 1)
+        run_ends = np.nonzero(edges == -1)[1]
+        if len(run_bands) == 0:
+            return np.empty((0, 2)), np.empty(0, dtype=bool)
+
+        # Touching runs form a region, which is swept line by line from its top or bottom line, starting at either end
+        labels, count = ndimage.label(bands, structure=np.ones((3, 3)))
+        run_regions = labels[run_bands, run_starts] - 1
+        first_bands = np.full(count, len(bands))
+        last_bands = np.full(count, -1)
+        np.minimum.at(first_bands, run_regions, run_bands)
+        np.maximum.at(last_bands, run_regions, run_bands)
+
+        # The left and right ends of the first and last line of each region, as pixel edges
+        line_ends = np.stack((np.full(count, width), np.zeros(count, dtype=np.int64), np.full(count, width), np.zeros(count, dtype=np.int64)))
+        on_first_band = run_bands == first_bands[run_regions]
+        on_last_band = run_bands == last_bands[run_regions]
+        np.minimum.at(line_ends[0], run_regions[on_first_band], run_starts[on_first_band])
+        np.maximum.at(line_ends[1], run_regions[on_first_band], run_ends[on_first_band])
+        np.minimum.at(line_ends[2], run_regions[on_last_band], run_starts[on_last_band])
+        np.maximum.at(line_ends[3], run_regions[on_last_band], run_ends[on_last_band])
+
+        # Where each of the four sweeps of a region (from the first or last line, from the left or right) enters and
+        # leaves it. A sweep leaves at the end of its last line that it reaches after alternating directions.
+        sweeps = np.arange(4)
+        from_last_band = sweeps >= 2
+        from_right = sweeps % 2 == 1
+        leaves_right = from_right == ((last_bands - first_bands)[:, None] % 2 == 1)
+        entry_bands = np.where(from_last_band, last_bands[:, None], first_bands[:, None])
+        exit_bands = np.where(from_last_band, first_bands[:, None], last_bands[:, None])
+        entry_ends = np.where(from_last_band, np.where(from_right, line_ends[3][:, None], line_ends[2][:, None]), np.where(from_right, line_ends[1][:, None], line_ends[0][:, None]))
+        exit_ends = np.where(from_last_band, np.where(leaves_right, line_ends[1][:, None], line_ends[0][:, None]), np.where(leaves_right, line_ends[3][:, None], line_ends[2][:, None]))
+        sweep_entries = np.stack(((width_mm * entry_ends) / width, (entry_bands + 0.5) * pitch), axis=-1)
+        sweep_exits = np.stack(((width_mm * exit_ends) / width, (exit_bands + 0.5) * pitch), axis=-1)
+
+        # Starting with the first region swept up from the left, move on to the closest entry of a region left to sweep
+        region_ranks = np.empty(count, dtype=np.int64)
+        region_sweeps = np.zeros(count, dtype=np.int64)
+        is_swept = np.zeros(count, dtype=bool)
+        region = 0
+        for rank in range(count):
+            region_ranks[region] = rank
+            is_swept[region] = True
+            if rank + 1 < count:
+                distances = np.hypot(*np.moveaxis(sweep_entries - sweep_exits[region, region_sweeps[region]], -1, 0))
+                distances[is_swept] = np.inf
+                region, sweep = np.unravel_index(np.argmin(distances), distances.shape)
+                region_sweeps[region] = sweep
+
+        # Order the runs by region, by line in the direction of the sweep, and along each line alternating directions
+        run_sweeps = region_sweeps[run_regions]
+        line_numbers = np.where(from_last_band[run_sweeps], last_bands[run_regions] - run_bands, run_bands - first_bands[run_regions])
+        is_reversed = from_right[run_sweeps] != (line_numbers % 2 == 1)
+        order = np.lexsort((np.where(is_reversed, -run_starts, run_starts), line_numbers, region_ranks[run_regions]))
+        run_bands, run_starts, run_ends, is_reversed = run_bands[order], run_starts[order], run_ends[order], is_reversed[order]
+
+        # A run spans its pixels from the left edge of the first to the left edge of the one after the last
+        y = (run_bands + 0.5) * pitch
+        entries = np.column_stack(((width_mm * np.where(is_reversed, run_ends, run_starts)) / width, y))
+        exits = np.column_stack(((width_mm * np.where(is_reversed, run_starts, run_ends)) / width, y))
+
+        # Moves onto another line go vertically first, so every move is along a single axis and no move is collapsed
+        # onto the following run by add_velocity_and_current_to_coordinates
+        corners = np.column_stack((exits[:-1, 0], entries[1:, 1]))
+        has_corner = np.append(False, (corners[:, 0] != entries[1:, 0]) & (corners[:, 1] != exits[:-1, 1]))
+        entry_positions = 2 * np.arange(len(entries)) + np.cumsum(has_corner)
+
+        points = np.empty((2 * len(entries) + np.count_nonzero(has_corner), 2))
+        points[entry_positions[has_corner] - 1] = corners[has_corner[1:]]
+        points[entry_positions] = entries
+        points[entry_positions + 1] = exits
+        lamp_states = np.zeros(len(points), dtype=bool)
+        lamp_states[entry_positions + 1] = True
+        return points, lamp_states
+
+    @staticmethod
+    def ordered_by_nearest_neighbor(coordinates, beam_diameter):
+        """
+        Orders the coordinates into a path with get_nearest_neighbor_path. Moves longer than the beam diameter are made
+        with the lamp off.
+
+        Args:
+            coordinates (Coordinates): The coordinates to order.
+            beam_diameter (float): The diameter of the beam in mm.
+
+        Returns:
+            Coordinates: The ordered path.
+        """
+        points = np.array([(coord.x, coord.y) for coord in coordinates.coordinates], dtype=float)
+        indices, lamp_states = HistologyImage.get_nearest_neighbor_path(points, beam_diameter)
+
+        path = Coordinates()
+        for index, lp in zip(indices.tolist(), lamp_states.tolist()):
+            if not lp:
+                coordinates[index].lp = False
+            path.append(coordinates[index])
+        return path
+
+    @staticmethod
+    def get_nearest_neighbor_path(points, beam_diameter):
+        """
+        Orders points into a path that starts at the first point and repeatedly moves to the nearest point that is at
+        least the minimum beam distance away and not yet covered. Every point within the minimum beam distance of a
+        visited point is covered.
+
+        The nearest uncovered point is found with k-nearest queries that grow until one qualifies, on a KD-tree that
+        is rebuilt without covered points once half of its points are covered. Points at the same distance are taken
+        in the order of the points.
+
+        Args:
+            points (numpy.ndarray): The points to order, as an (n, 2) float array in mm.
+            beam_diameter (float): The diameter of the beam in mm.
+
+        Returns:
+            tuple: The indices of the points along the path, and whether the lamp stays on while moving to each of
+                them (False for moves longer than the beam diameter), as arrays.
+        """
         min_distance = float(MINIMUM_DISTANCE_BETWEEN_TWO_LIGHT_BEAMS)
-        
-        # Convert the Coordinates object into a list of tuples for easier calculation
-        points = [(coord.x, coord.y) for coord in coordinates]
-        
+        n = len(points)
+
         # Initialize the path with the first point
-        path = Coordinates()
-        path.append(coordinates[0])
-        blacklist = set()
-        blacklist.add(0)
-        
-        # Build a k-d tree for efficient nearest neighbor search
+        path = [0]
+        lamp_states = [True]
+        blacklist = np.zeros(n, dtype=bool)
+        blacklist[0] = True
+
+        # The full tree finds the points a visited point covers; the search tree only holds points that may be uncovered
         tree = cKDTree(points)
+        remaining = np.arange(n)
+        search_tree = tree
+        covered_in_search_tree = 1
+        k = 8
 
+        current = 0
         while True:
-            current_coord = path[-1]
-            current_point = (current_coord.x, current_coord.y)
-
-            distances, indices = tree.query(current_point, k=len(points), distance_upper_bound=np.inf)        
-            next_point_found = False
-            for dist, idx in zip(distances, indices):
-                # idx == tree.n when there are no more neighbors
-                if idx != tree.n and dist >= min_distance and idx not in blacklist:
-                    # Add the next valid coordinate to the path
-                    if dist > beam_diameter:
-                        coordinates[idx].lp = False
-                    path.append(coordinates[idx])
-                    
-                    # Blacklist all points within distance `m` of the new point
-                    nearby_indices = tree.query_ball_point(points[idx], min_distance)
-                    blacklist.update(nearby_indices)
-
-                    next_point_found = True
+            next_index = None
+            while True:
+                k = min(k, len(remaining))
+                distances, indices = search_tree.query(points[current], k=k)
+                distances = np.atleast_1d(distances)
+                indices = remaining[np.atleast_1d(indices)]
+
+                valid = ~blacklist[indices] & (distances >= min_distance)
+                if valid.any():
+                    dist = distances[valid][0]
+                    # Every point closer than the farthest returned one is included, so all ties are known
+                    if dist < distances[-1] or k == len(remaining):
+                        next_index = indices[valid & (distances == dist)].min()
+                        break
+                elif k == len(remaining):
                     break
+                k *= 2
 
-            # If no valid next point is found, break the loop
-            if not next_point_found:
+            # If no valid next point is found, stop
+            if next_index is None:
                 break
 
-        return path
\ No newline at end of file
+            # Add the next valid point to the path
+            path.append(next_index)
+            lamp_states.append(bool(dist <= beam_diameter))
+            current = next_index
+            k = max(8, k // 2)
+
+            # Blacklist all points within distance `m` of the new point
+            nearby_indices = np.array(tree.query_ball_point(points[next_index], min_distance), dtype=np.int64)
+            covered_in_search_tree += np.count_nonzero(~blacklist[nearby_indices])
+            blacklist[nearby_indices] = True
+
+            if covered_in_search_tree * 2 > len(remaining):
+                remaining = remaining[~blacklist[remaining]]
+                if len(remaining) == 0:
+                    break
+                search_tree = cKDTree(points[remaining])
+                covered_in_search_tree = 0
+
+        return np.array(path, dtype=np.int64), np.array(lamp_states, dtype=bool)
@@ -50,6 +50,32 @@ class Shape:
         Raises:
             Exception: If the shape does not have a line or radial coordinate function.
         """
+        return self.__placed_coordinates__(is_layer=True)
+
+    def get_path(self):
+        """
+        Gets the path of the shape, placed and filled as get_coordinates places and fills it, without resolving the
+        velocities and currents that cure it.
+
+        Returns:
+            Coordinates: The positions of the shape and whether the lamp is on when moving to each.
+
+        Raises:
+            Exception: If the shape does not have a line or radial coordinate function.
+        """
+        return self.__placed_coordinates__(is_layer=False)
+
+    def __placed_coordinates__(self, is_layer):
+        """
+        Builds the coordinates of the shape, fills them if the shape is filled, and places them at its center and
+        rotation.
+
+        Args:
+            is_layer (bool): Whether to resolve the velocities and currents that cure the shape.
+
+        Returns:
+            Coordinates: The coordinates of the shape.
+        """
         coordinates = None
         if "__line_coordinates__" in dir(self):
             coordinates = self.__line_coordinates__()
@@ -64,7 +90,7 @@ class Shape:
             coordinates = coordinates.fill(uses_step_coordinates=self.uses_step_coordinates)
 
         if coordinates:
-            coordinates.normalize(center=self.center, rotation=self.rotation_angle_degrees, stiffness=self.stiffness, beam_diameter_mm=self.beam_diameter)
+            coordinates.normalize(center=self.center, rotation=self.rotation_angle_degrees, stiffness=self.stiffness, beam_diameter_mm=self.beam_diameter, is_layer=is_layer)
         
         return coordinates
     
@@ -1,5 +1,7 @@
-from Coordinate import Coordinate, Coordinates
+import numpy as np
+from Coordinate import Coordinate, Coordinates, CoordinateArray
 import Constants
+import SharedMemoryTransport
 from multiprocessing import Pool
 from copy import copy
 
@@ -14,13 +16,16 @@ class Texture:
         spacing_mm (float): The spacing between shapes in millimeters.
         margins (float): The margins around the texture grid in millimeters.
         is_spacing (bool): Indicates whether spacing is used instead of rows and columns.
+        transport (str): How the shapes generated in worker processes are returned, "pickle" or "shared_memory". Shared
+            memory saves unpickling every cell, but the cells are still copied once into the texture.
+        is_instanced (bool): Indicates whether the shape is generated once and translated into every cell.
 
     Methods:
         get_coordinates(): Returns the coordinates of all shapes in the texture.
         append_coordinates(shape): Helper method to get coordinates of a single shape.
     """
 
-    def __init__(self, shape, center=None, rows=None, columns=None, spacing_mm=None, margins=None):
+    def __init__(self, shape, center=None, rows=None, columns=None, spacing_mm=None, margins=None, transport=None, is_instanced=False):
         """
         Initializes a Texture object.
 
@@ -30,6 +35,10 @@ class Texture:
             columns (int): The number of columns in the texture grid.
             spacing_mm (float): The spacing between shapes in millimeters.
             margins (float): The margins around the texture grid in millimeters.
+            transport (str, optional): "pickle" or "shared_memory". Defaults to Constants.PARALLEL_TRANSPORT.
+            is_instanced (bool, optional): Whether to generate the shape once and translate it into every cell in
+                serpentine order, instead of generating every cell on a pool of worker processes. Instanced textures
+                visit the cells in a different order, so their toolpath differs from the pooled one. Defaults to False.
 
         Raises:
             Exception: If spacing or margins are specified when rows or columns are populated.
@@ -40,6 +49,8 @@ class Texture:
         self.columns = columns
         self.spacing = spacing_mm
         self.margins = margins
+        self.transport = transport or Constants.PARALLEL_TRANSPORT
+        self.is_instanced = is_instanced
 
         self.is_spacing = spacing_mm is not None
         if (self.rows or self.columns) and (self.spacing or self.margins):
@@ -53,12 +64,38 @@ class Texture:
         Returns the coordinates of all shapes in the texture.
 
         Returns:
-            Coordinates: The coordinates of all shapes in the texture.
+            Coordinates: The coordinates of all shapes in the texture, or a CoordinateArray when the texture is
+                instanced or the shared memory transport is used.
+        """
+        if self.is_instanced:
+            coordinates = self.get_instanced_coordinates()
+        else:
+            coordinates = self.get_pooled_coordinates()
+
+        if self.center:
+            centroid = coordinates.get_centroid()
+            x_dist = centroid.x - self.center.x
+            y_dist = centroid.y - self.center.y
+            if isinstance(coordinates, CoordinateArray):
+                coordinates.translate(-x_dist, -y_dist)
+            else:
+                for i in coordinates:
+                    i.x -= x_dist
+                    i.y -= y_dist
+            coordinates.snap_to_motor_steps()
+        
+        return coordinates
+
+    def get_cell_centers(self):
+        """
+        Returns the center of every cell in the texture grid.
+
+        Returns:
+            list: The Coordinate at the center of each cell.
         """
         bound = Constants.MOTOR_MAX_TRAVEL
-        coordinates = Coordinates()
+        centers = []
         if self.is_spacing:
-            args = []
             x = 1
             y = 0
             while True:
@@ -71,50 +108,147 @@ class Texture:
                 if y_spacing > bound - self.margins:
                     break
 
-                self.shape.center = Coordinate(x_spacing, y_spacing)
-                shape_copy = copy(self.shape)
-                args.append(shape_copy)
+                centers.append(Coordinate(x_spacing, y_spacing))
                 x += 1
-
-            pool = Pool()
-            try:
-                for result in pool.map(self.append_coordinates, args):
-                    coordinates += result
-            finally:
-                pool.close()
-                pool.join()
         else:
             x_dist = (bound / self.rows) / 2
             y_dist = (bound / self.rows) / 2
-            
-            args = []
             for i in range(self.rows):
                 for j in range(self.columns):
                     x = x_dist * (i) + x_dist
                     y = y_dist * (j) + y_dist
-                    self.shape.center = Coordinate(x, y)
-                    shape_copy = copy(self.shape)
-                    args.append(shape_copy)
-                    
-            pool = Pool()
-            try:
-                for result in pool.map(self.append_coordinates, args):
+                    centers.append(Coordinate(x, y))
+        return centers
+
+    @staticmethod
+    def get_serpentine_order(centers):
+        """
+        Orders cell centers row by row from the bottom, alternating the direction of every row so the stage never
+        travels back across the texture between rows.
+
+        Args:
+            centers (list): The Coordinate at the center of each cell.
+
+        Returns:
+            list: The centers in serpentine order.
+        """
+        rows = {}
+        for center in centers:
+            rows.setdefault(center.y, []).append(center)
+
+        ordered = []
+        for (i, y) in enumerate(sorted(rows)):
+            ordered.extend(sorted(rows[y], key=lambda c: c.x, reverse=(i % 2 == 1)))
+        return ordered
+
+    def get_instanced_coordinates(self):
+        """
+        Generates the shape once at the middle of the stage and stamps a translated copy of its resolved toolpath into
+        every cell, in serpentine order. Cells only differ by translation, as long as no copy reaches the stage bounds
+        where the toolpath would be clipped; such cells are generated individually instead.
+
+        Returns:
+            CoordinateArray: The coordinates of all shapes in the texture.
+        """
+        bound = Constants.MOTOR_MAX_TRAVEL
+        template_center = bound / 2
+        self.shape.center = Coordinate(template_center, template_center)
+        template = copy(self.shape).get_coordinates()
+        if not isinstance(template, CoordinateArray):
+            template = CoordinateArray.from_coordinates(template)
+
+        columns = []
+        for center in self.get_serpentine_order(self.get_cell_centers()):
+            dx = float(center.x) - template_center
+            dy = float(center.y) - template_center
+            if len(template) and self.is_inside_bounds(template, dx, dy):
+                columns.append((template.x + dx, template.y + dy, template.vx, template.vy, template.a, template.lp))
+                continue
+
+            self.shape.center = center
+            cell = copy(self.shape).get_coordinates()
+            if not isinstance(cell, CoordinateArray):
+                cell = CoordinateArray.from_coordinates(cell)
+            if len(cell):
+                cell.lp[0] = False
+            columns.append((cell.x, cell.y, cell.vx, cell.vy, cell.a, cell.lp))
+
+        if not columns:
+            return CoordinateArray()
+
+        coordinates = CoordinateArray.from_arrays(*(np.concatenate(column) for column in zip(*columns)))
+        coordinates.snap_to_motor_steps()
+        return coordinates
+
+    @staticmethod
+    def is_inside_bounds(coordinates, dx, dy):
+        """
+        Checks whether translated coordinates stay strictly within the stage bounds, where they would not be clipped.
+
+        Args:
+            coordinates (CoordinateArray): The coordinates.
+            dx (float): The translation along the x-axis in mm.
+            dy (float): The translation along the y-axis in mm.
+
+        Returns:
+            bool: True if every translated point is inside the bounds.
+        """
+        bound = Constants.MOTOR_MAX_TRAVEL
+        tolerance = 1e-9
+        return (coordinates.x.min() + dx > tolerance and coordinates.x.max() + dx < bound - tolerance and
+                coordinates.y.min() + dy > tolerance and coordinates.y.max() + dy < bound - tolerance)
+
+    def get_pooled_coordinates(self):
+        """
+        Generates the shape in every cell separately on a pool of worker processes.
+
+        Returns:
+            Coordinates: The coordinates of all shapes in the texture, or a CoordinateArray when the shared memory
+                transport is used.
+        """
+        is_shared = self.transport == SharedMemoryTransport.SHARED_MEMORY
+
+        args = []
+        for center in self.get_cell_centers():
+            self.shape.center = center
+            shape_copy = copy(self.shape)
+            args.append(shape_copy)
+
+        pool = Pool()
+        try:
+            results = self.map_coordinates(pool, args)
+        finally:
+            pool.close()
+            pool.join()
+
+        # The toolpaths mapped from shared memory are copied once, into an array that holds the whole texture
+        coordinates = CoordinateArray(sum(len(result) for result in results)) if is_shared else Coordinates()
+        for result in results:
+            if not self.is_spacing:
+                if is_shared:
+                    result.lp[0] = False
+                else:
                     result[0].lp = False
-                    coordinates += result
-            finally:
-                pool.close()
-                pool.join()
+            coordinates += result
 
-        if self.center:
-            centroid = coordinates.get_centroid()
-            x_dist = centroid.x - self.center.x
-            y_dist = centroid.y - self.center.y
-            for i in coordinates:
-                i.x -= x_dist
-                i.y -= y_dist
-        
         return coordinates
 
+    def map_coordinates(self, pool, shapes):
+        """
+        Generates the coordinates of the shapes on a pool of worker processes.
+
+        Args:
+            pool (multiprocessing.pool.Pool): The pool of worker processes.
+            shapes (list): The shapes to generate.
+
+        Returns:
+            list: The coordinates of each shape, as CoordinateArrays mapped from shared memory when the shared memory
+                transport is used.
+        """
+        if self.transport == SharedMemoryTransport.SHARED_MEMORY:
+            return [SharedMemoryTransport.import_coordinates(shared) for shared in pool.map(self.append_shared_coordinates, shapes)]
+        return pool.map(self.append_coordinates, shapes)
+
     def append_coordinates(self, shape):
         """
         Helper method to get coordinates of a single shape.
@@ -127,4 +261,14 @@ class Texture:
         """
         return shape.get_coordinates()
 
-    
\ No newline at end of file
+    def append_shared_coordinates(self, shape):
+        """
+        Helper method to get coordinates of a single shape and write them into shared memory.
+
+        Args:
+            shape (Shape): The shape to get coordinates for.
+
+        Returns:
+            SharedCoordinates: The reference to the coordinates of the shape.
+        """
+        return SharedMemoryTransport.export_coordinates(shape.get_coordinates())
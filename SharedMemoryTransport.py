@@ -0,0 +1,115 @@
+import os
+from multiprocessing import shared_memory, resource_tracker
+from Coordinate import CoordinateArray
+
+PICKLE = "pickle"
+SHARED_MEMORY = "shared_memory"
+TRANSPORTS = (PICKLE, SHARED_MEMORY)
+
+# Every segment starts with a header whose first byte the importing process sets once it has mapped the segment.
+# Eight bytes keep the float64 columns after it aligned.
+_HEADER_SIZE = 8
+
+# On Windows a shared memory segment is destroyed as soon as its last handle closes, so segments exported by this
+# process stay open until the importing process has mapped them. They are closed on the next export.
+_exported_segments = []
+
+
+class SharedCoordinates:
+    """
+    A picklable reference to a toolpath that a worker process wrote into shared memory.
+
+    Attributes:
+        name (str): The name of the shared memory segment, or None for an empty toolpath.
+        length (int): The number of points in the toolpath.
+    """
+
+    def __init__(self, name, length):
+        """
+        Initializes a SharedCoordinates object.
+
+        Args:
+            name (str): The name of the shared memory segment, or None for an empty toolpath.
+            length (int): The number of points in the toolpath.
+        """
+        self.name = name
+        self.length = length
+
+
+class _AttachedSegment(shared_memory.SharedMemory):
+    """
+    A shared memory segment whose buffer may outlive it. CoordinateArray columns keep the mapping alive after the
+    segment object is released, so closing it while they exist is expected to fail and is left to the mapping.
+    """
+
+    def __del__(self):
+        try:
+            self.close()
+        except (OSError, BufferError):
+            pass
+
+
+def export_coordinates(coordinates):
+    """
+    Writes a toolpath into a new shared memory segment as flat numeric arrays. The segment is owned by the process
+    that imports it, which unlinks it.
+
+    Args:
+        coordinates (Coordinates or CoordinateArray): The toolpath to export.
+
+    Returns:
+        SharedCoordinates: The reference to pass to the importing process.
+    """
+    if not isinstance(coordinates, CoordinateArray):
+        coordinates = CoordinateArray.from_coordinates(coordinates)
+
+    length = len(coordinates)
+    if length == 0:
+        return SharedCoordinates(None, 0)
+
+    segment = shared_memory.SharedMemory(create=True, size=_HEADER_SIZE + CoordinateArray.buffer_size(length))
+    segment.buf[0] = 0
+    coordinates.to_buffer(segment.buf[_HEADER_SIZE:])
+
+    if os.name == "nt":
+        _release_attached_segments()
+        _exported_segments.append(segment)
+    else:
+        # The importing process unlinks the segment, so this process must not clean it up when it exits
+        resource_tracker.unregister(segment._name, "shared_memory")
+        segment.close()
+
+    return SharedCoordinates(segment.name, length)
+
+
+def import_coordinates(shared):
+    """
+    Maps a toolpath exported by another process without copying it, and releases the segment's name so the memory
+    is freed once the returned CoordinateArray is no longer used.
+
+    Args:
+        shared (SharedCoordinates): The reference returned by export_coordinates.
+
+    Returns:
+        CoordinateArray: The toolpath, backed by the shared memory segment.
+    """
+    if shared.name is None:
+        return CoordinateArray()
+
+    segment = _AttachedSegment(name=shared.name)
+    coordinates = CoordinateArray.from_buffer(segment.buf[_HEADER_SIZE:], shared.length)
+    segment.buf[0] = 1
+    if os.name != "nt":
+        segment.unlink()
+    return coordinates
+
+
+def _release_attached_segments():
+    """
+    Closes the segments exported by this process that the importing process has mapped, which keeps them alive on
+    its own from then on.
+    """
+    attached = [segment for segment in _exported_segments if segment.buf[0]]
+    for segment in attached:
+        _exported_segments.remove(segment)
+        segment.close()
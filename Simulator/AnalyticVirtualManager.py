@@ -0,0 +1,241 @@
+import sys
+import os
+import math
+import numpy as np
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+from VirtualMotor import VirtualMotor
+from VirtualLamp import VirtualLamp
+from Simulator.Canvas import Canvas
+from Constants import CANVAS_QUALITY, MAXIMUM_CURRENT, MAXIMUM_VELOCITY
+
+
+class AnalyticVirtualManager:
+    """
+    A virtual manager that cures each move of the lamp in one step from the time the beam spends over every pixel,
+    instead of curing the canvas once per time step like VirtualManager.
+
+    Each axis accelerates to its velocity and then cruises, as in VirtualMotor, so a move splits into at most four
+    phases at the times an axis stops accelerating or arrives. Within a phase the beam follows the chord between the
+    ends of the phase with a constant acceleration along it, so the time it covers a pixel follows from where the chord
+    enters and leaves the disk of the beam around the pixel. While one axis accelerates and the other cruises the
+    path bends off the chord by at most a * (v / a)^2 / 8, about 8 µm at the default acceleration and velocity.
+    Pixels are cured while their centers are within the rounded pixel radius of the beam, as with the disk beam
+    profile, whatever the beam profile of the canvas.
+
+    Attributes:
+        canvas (Canvas): The canvas object representing the simulation environment.
+        x (VirtualMotor): The virtual motor controlling the x-axis movement.
+        y (VirtualMotor): The virtual motor controlling the y-axis movement.
+        lamp (VirtualLamp): The virtual lamp used for curing.
+        beam_diameter (float): The diameter of the curing beam.
+
+    Methods:
+        motors(): Returns the x and y virtual motors.
+        move(position): Moves the motors and cures the path of the beam if the lamp is on.
+        cure_phase(axes, t0, t1, dose_rate): Cures the pixels the beam covers during one phase of a move.
+    """
+
+    def __init__(self, canvas_dimensions_mm, acceleration=None, max_velocity=None, beam_diameter=None):
+        """
+        Initializes a new instance of the AnalyticVirtualManager class.
+
+        Args:
+            canvas_dimensions_mm (int): The dimensions of the canvas in millimeters.
+            acceleration (float, optional): The acceleration of the virtual motors. Defaults to None.
+            max_velocity (float, optional): The maximum velocity of the virtual motors. Defaults to None.
+            beam_diameter (float, optional): The diameter of the curing beam. Defaults to None.
+        """
+        time_step = 0.1 / (CANVAS_QUALITY**2)
+        self.canvas = Canvas(dimensions_mm=canvas_dimensions_mm)
+        self.x = VirtualMotor(time_step=time_step, acceleration=acceleration, max_velocity=max_velocity)
+        self.y = VirtualMotor(time_step=time_step, acceleration=acceleration, max_velocity=max_velocity)
+        self.lamp = VirtualLamp(time_step=time_step, canvas=self.canvas)
+        self.beam_diameter = beam_diameter
+
+    def motors(self):
+        """
+        Returns the x and y virtual motors.
+
+        Returns:
+            tuple: The x and y virtual motors.
+        """
+        return self.x, self.y
+
+    def move(self, position):
+        """
+        Moves the virtual motors and cures the path of the beam if the lamp is on.
+
+        Args:
+            position (Position): The position object containing the motor and lamp parameters.
+        """
+        start = (float(self.x.position), float(self.y.position))
+        is_lamp_on = position.lp
+        if is_lamp_on:
+            self.x.set_params(position.v[0])
+            self.y.set_params(position.v[1])
+        self.x.position = position.x
+        self.y.position = position.y
+        if not is_lamp_on:
+            return
+
+        axes = []
+        for (motor, axis_start) in zip(self.motors(), start):
+            distance = float(motor.position) - axis_start
+            # A motor without a velocity moves at the maximum velocity, as in VirtualMotor.get_movement_time
+            velocity = MAXIMUM_VELOCITY if motor.max_velocity == 0 else float(motor.max_velocity)
+            axes.append(MotorAxis(axis_start, distance, velocity, float(motor.acceleration)))
+
+        # The dose rate at which VirtualLamp.cure cures the canvas every time step
+        beam_area = math.pi * (self.beam_diameter / 2) ** 2
+        dose_rate = (float(position.a) / MAXIMUM_CURRENT) * 1000 / beam_area
+
+        times = sorted({0.0, *(t for axis in axes for t in (axis.acceleration_time, axis.arrival_time))})
+        for (t0, t1) in zip(times[:-1], times[1:]):
+            self.cure_phase(axes, t0, t1, dose_rate)
+
+    def cure_phase(self, axes, t0, t1, dose_rate):
+        """
+        Cures the pixels the beam covers between two times at which no axis changes from accelerating to cruising
+        or from cruising to stopped.
+
+        Args:
+            axes (list): The x and y MotorAxis of the move.
+            t0 (float): The time the phase starts, in seconds from the start of the move.
+            t1 (float): The time the phase ends.
+            dose_rate (float): The amount to cure a pixel for every second the beam covers it.
+        """
+        middle = (t0 + t1) / 2
+        start = np.array([axis.get_position(t0) for axis in axes])
+        end = np.array([axis.get_position(t1) for axis in axes])
+        velocity = np.array([axis.get_velocity(t0, middle) for axis in axes])
+        acceleration = np.array([axis.get_acceleration(middle) for axis in axes])
+
+        length = math.hypot(*(end - start))
+        if length == 0:
+            return
+        direction = (end - start) / length
+
+        # Distance along the chord as a function of time, s(t) = u * t + a * t^2 / 2
+        u = float(velocity @ direction)
+        a = float(acceleration @ direction)
+
+        ratio = self.canvas.mm_to_pixel_ratio
+        pixel_radius = int(round(self.beam_diameter / 2 * ratio))
+        x_min, y_min = np.floor(np.minimum(start, end) * ratio).astype(int) - pixel_radius
+        x_max, y_max = np.ceil(np.maximum(start, end) * ratio).astype(int) + pixel_radius + 1
+        x_grid, y_grid = np.ogrid[x_min:x_max, y_min:y_max]
+
+        # Each pixel is covered while the beam is within pixel_radius of it, as in Canvas.cure
+        relative_x = x_grid / ratio - start[0]
+        relative_y = y_grid / ratio - start[1]
+        along = relative_x * direction[0] + relative_y * direction[1]
+        across = relative_x * direction[1] - relative_y * direction[0]
+        half_chord_squared = (pixel_radius / ratio) ** 2 - across ** 2
+        half_chord = np.sqrt(np.maximum(half_chord_squared, 0))
+        enter = np.clip(along - half_chord, 0, length)
+        leave = np.clip(along + half_chord, 0, length)
+
+        time_covered = get_time_at_distance(leave, u, a) - get_time_at_distance(enter, u, a)
+        self.canvas.add_dose(x_min, y_min, np.where(half_chord_squared >= 0, dose_rate * time_covered, 0))
+
+    def __del__(self):
+        """
+        Cleans up the virtual motors and lamp when the AnalyticVirtualManager object is deleted.
+        """
+        self.x.__del__()
+        self.y.__del__()
+        self.lamp.__del__()
+
+
+class MotorAxis:
+    """
+    The motion of one motor during a move: it accelerates from rest to its velocity, cruises, and stops on arrival.
+
+    Attributes:
+        start (float): The position of the motor at the start of the move.
+        sign (int): The direction of the move, 1 or -1.
+        distance (float): The distance of the move.
+        velocity (float): The velocity the motor cruises at.
+        acceleration (float): The acceleration of the motor.
+        acceleration_time (float): The time the motor stops accelerating.
+        arrival_time (float): The time the motor arrives.
+    """
+
+    def __init__(self, start, distance, velocity, acceleration):
+        self.start = start
+        self.sign = 1 if distance >= 0 else -1
+        self.distance = math.fabs(distance)
+        self.velocity = velocity
+        self.acceleration = acceleration
+
+        # As in VirtualMotor.get_movement_time, short moves end before the motor reaches its velocity
+        self.acceleration_time = velocity / acceleration
+        self.arrival_time = math.sqrt(2 * self.distance / acceleration)
+        if self.arrival_time < self.acceleration_time:
+            self.acceleration_time = self.arrival_time
+        else:
+            self.arrival_time = self.acceleration_time + (self.distance - acceleration * self.acceleration_time ** 2 / 2) / velocity
+
+    def get_position(self, t):
+        """
+        Returns the position of the motor at a time.
+
+        Args:
+            t (float): The time in seconds from the start of the move.
+
+        Returns:
+            float: The position of the motor.
+        """
+        if t >= self.arrival_time:
+            change = self.distance
+        elif t < self.acceleration_time:
+            change = self.acceleration * t ** 2 / 2
+        else:
+            change = self.acceleration * self.acceleration_time ** 2 / 2 + self.velocity * (t - self.acceleration_time)
+        return self.start + self.sign * change
+
+    def get_velocity(self, t, middle):
+        """
+        Returns the velocity of the motor at the start of a phase.
+
+        Args:
+            t (float): The time the phase starts.
+            middle (float): A time within the phase, which decides whether the motor accelerates, cruises or stops.
+
+        Returns:
+            float: The velocity of the motor.
+        """
+        if middle >= self.arrival_time:
+            return 0.0
+        if middle < self.acceleration_time:
+            return self.sign * self.acceleration * t
+        return self.sign * self.velocity
+
+    def get_acceleration(self, middle):
+        """
+        Returns the acceleration of the motor during a phase.
+
+        Args:
+            middle (float): A time within the phase.
+
+        Returns:
+            float: The acceleration of the motor.
+        """
+        return self.sign * self.acceleration if middle < min(self.acceleration_time, self.arrival_time) else 0.0
+
+
+def get_time_at_distance(s, u, a):
+    """
+    Inverts s = u * t + a * t^2 / 2 for t >= 0, written so it stays exact when a is 0.
+
+    Args:
+        s (numpy.ndarray): The distances.
+        u (float): The velocity at t = 0.
+        a (float): The acceleration.
+
+    Returns:
+        numpy.ndarray: The times at which the distances are reached.
+    """
+    root = np.sqrt(u ** 2 + 2 * a * s)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(s > 0, 2 * s / (u + root), 0.0)
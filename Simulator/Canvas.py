@@ -1,5 +1,20 @@
+import os
 from PIL import Image
 import numpy as np
+from scipy.signal import fftconvolve
+from Simulator.TiledArray import TiledArray
+from Simulator.ImageExport import write_png, write_tiff
+from Constants import CANVAS_PIXELS_PER_MM, CANVAS_DTYPE, CANVAS_STORAGE, BEAM_PROFILE
+
+
+DISK = "disk"
+TOP_HAT = "top_hat"
+GAUSSIAN = "gaussian"
+BEAM_PROFILES = (DISK, TOP_HAT, GAUSSIAN)
+
+DENSE = "dense"
+TILED = "tiled"
+STORAGES = (DENSE, TILED)
 
 
 class Canvas:
@@ -7,29 +22,60 @@ class Canvas:
     A class representing a canvas for drawing and curing pixels.
 
     Attributes:
-        mm_to_pixel_ratio (int): The ratio of millimeters to pixels.
-        alpha (np.ndarray): A 2D numpy array representing the curing intensity of each pixel.
+        mm_to_pixel_ratio (float): The ratio of millimeters to pixels.
+        alpha (np.ndarray or TiledArray): A 2D array representing the curing intensity of each pixel.
         dimensions (int): The dimensions of the canvas in pixels.
+        beam_profile (str): The profile of the beam, one of BEAM_PROFILES.
 
     Methods:
-        __init__(self, dimensions_mm: int): Initializes a new instance of the Canvas class.
+        __init__(self, dimensions_mm: int, ...): Initializes a new instance of the Canvas class.
+        get_beam_kernel(self, diameter, x_offset: int, y_offset: int): Returns the dose of the beam around its center pixel.
         cure(self, x: int, y: int, diameter: int, cure_per_step: int): Cures the pixels within a given circle.
+        cure_many(self, xs, ys, diameter: int, cure_per_step): Cures the pixels within a circle at many centers at once.
+        add_dose(self, x_min: int, y_min: int, dose: np.ndarray): Cures a rectangle of pixels by a different amount per pixel.
+        get_image(alpha, binarized=False): Renders the curing intensity of pixels as an RGBA image.
+        get_image_bands(self, binarized=False, band_height=256): Renders the canvas in bands of rows.
+        save(self, file_name, binarized=False): Saves the canvas as a PNG, TIFF or .npy file without showing it.
+        save_preview(self, file_name, max_size=1000, binarized=False): Saves a downsampled image of the canvas.
         draw(self): Draws the pixels on the canvas.
     """
 
     mm_to_pixel_ratio = 100
     MAX_ALPHA = 256
 
-    def __init__(self, dimensions_mm: int):
+    # The beam is placed on a grid of SUBPIXEL_STEPS positions per pixel and its kernels are averaged over
+    # SUPERSAMPLING^2 points per pixel, for the profiles other than the disk
+    SUBPIXEL_STEPS = 4
+    SUPERSAMPLING = 8
+
+    def __init__(self, dimensions_mm: int, pixels_per_mm=None, dtype=None, beam_profile=None, storage=None, tile_size=256):
         """
         Initializes a new instance of the Canvas class.
 
         Args:
             dimensions_mm (int): The dimensions of the canvas in millimeters.
+            pixels_per_mm (float, optional): The resolution of the canvas. Defaults to CANVAS_PIXELS_PER_MM.
+            dtype (str, optional): The number type of the dose of each pixel, "float64" or "float32". Defaults to CANVAS_DTYPE.
+            beam_profile (str, optional): "disk", "top_hat" or "gaussian". Defaults to BEAM_PROFILE.
+            storage (str, optional): "dense" or "tiled". Defaults to CANVAS_STORAGE.
+            tile_size (int, optional): The size of the tiles of a tiled canvas in pixels. Defaults to 256.
         """
-        self.dimensions = dimensions_mm * self.mm_to_pixel_ratio
-        self.alpha = np.zeros((self.dimensions + 1, self.dimensions + 1), dtype=np.float64)
+        self.mm_to_pixel_ratio = pixels_per_mm or CANVAS_PIXELS_PER_MM
+        self.beam_profile = beam_profile or BEAM_PROFILE
+        storage = storage or CANVAS_STORAGE
+        dtype = np.dtype(dtype or CANVAS_DTYPE)
+        if self.beam_profile not in BEAM_PROFILES:
+            raise ValueError(f"Unknown beam profile '{self.beam_profile}'. Choose one of {list(BEAM_PROFILES)}.")
+        if storage not in STORAGES:
+            raise ValueError(f"Unknown canvas storage '{storage}'. Choose one of {list(STORAGES)}.")
+        if dtype not in (np.float64, np.float32):
+            raise ValueError(f"Unknown canvas dtype '{dtype}'. Choose one of ['float64', 'float32'].")
+
+        self.dimensions = int(round(dimensions_mm * self.mm_to_pixel_ratio))
+        shape = (self.dimensions + 1, self.dimensions + 1)
+        self.alpha = np.zeros(shape, dtype=dtype) if storage == DENSE else TiledArray(shape, dtype=dtype, tile_size=tile_size)
         self._circle_mask_cache = {}
+        self._beam_kernel_cache = {}
 
     def _get_circle_mask(self, pixel_radius):
         """
@@ -38,12 +84,74 @@ class Canvas:
         if pixel_radius in self._circle_mask_cache:
             return self._circle_mask_cache[pixel_radius]
 
-        diameter = 2 * pixel_radius + 1
         y_grid, x_grid = np.ogrid[-pixel_radius:pixel_radius + 1, -pixel_radius:pixel_radius + 1]
         mask = (x_grid ** 2 + y_grid ** 2) <= pixel_radius ** 2
         self._circle_mask_cache[pixel_radius] = mask
         return mask
 
+    def get_beam_kernel(self, diameter, x_offset=0, y_offset=0):
+        """
+        Returns the dose the beam cures around the pixel nearest to its center, relative to the dose of a pixel fully
+        within a disk beam. The kernels are cached by diameter and offset.
+
+        Args:
+            diameter: The diameter of the beam (in mm).
+            x_offset (int): The x offset of the center of the beam from the center of its pixel, in 1 / SUBPIXEL_STEPS
+                pixels. Ignored by the disk profile.
+            y_offset (int): The y offset, in 1 / SUBPIXEL_STEPS pixels.
+
+        Returns:
+            np.ndarray: The dose of each pixel, indexed [x, y] and centered on the pixel of the beam.
+        """
+        if self.beam_profile == DISK:
+            x_offset = y_offset = 0
+        key = (diameter, x_offset, y_offset)
+        if key in self._beam_kernel_cache:
+            return self._beam_kernel_cache[key]
+
+        radius = diameter / 2.0 * self.mm_to_pixel_ratio
+        if self.beam_profile == DISK:
+            kernel = self._get_circle_mask(int(round(radius))).astype(np.float64)
+        else:
+            # Gaussian beams are cut off at twice their 1/e^2 radius, which holds all but 0.03% of the dose
+            half_size = int(np.ceil(radius if self.beam_profile == TOP_HAT else 2 * radius)) + 1
+            samples = (np.arange(self.SUPERSAMPLING) + 0.5) / self.SUPERSAMPLING - 0.5
+            points = (np.arange(-half_size, half_size + 1)[:, None] + samples[None, :]).ravel()
+            x_points = points[:, None] - x_offset / self.SUBPIXEL_STEPS
+            y_points = points[None, :] - y_offset / self.SUBPIXEL_STEPS
+            squared_distance = x_points ** 2 + y_points ** 2
+            if self.beam_profile == TOP_HAT:
+                dose = (squared_distance <= radius ** 2).astype(np.float64)
+            else:
+                # A peak of twice the dose of the disk gives the Gaussian the total dose of the disk
+                dose = 2 * np.exp(-2 * squared_distance / radius ** 2)
+            size = 2 * half_size + 1
+            kernel = dose.reshape(size, self.SUPERSAMPLING, size, self.SUPERSAMPLING).mean(axis=(1, 3))
+
+        self._beam_kernel_cache[key] = kernel
+        return kernel
+
+    def get_beam_pixels(self, xs, ys):
+        """
+        Returns the pixels nearest to beam centers, and the offsets of the centers from them.
+
+        Args:
+            xs: The x-coordinates of the centers (in mm).
+            ys: The y-coordinates of the centers (in mm).
+
+        Returns:
+            tuple: The x and y pixels, and the x and y offsets in 1 / SUBPIXEL_STEPS pixels, which are 0 for the disk profile.
+        """
+        x_pixels = np.asarray(xs, dtype=np.float64) * self.mm_to_pixel_ratio
+        y_pixels = np.asarray(ys, dtype=np.float64) * self.mm_to_pixel_ratio
+        x0 = np.rint(x_pixels).astype(np.int64)
+        y0 = np.rint(y_pixels).astype(np.int64)
+        if self.beam_profile == DISK:
+            return x0, y0, np.zeros_like(x0), np.zeros_like(y0)
+        x_offsets = np.rint((x_pixels - x0) * self.SUBPIXEL_STEPS).astype(np.int64)
+        y_offsets = np.rint((y_pixels - y0) * self.SUBPIXEL_STEPS).astype(np.int64)
+        return x0, y0, x_offsets, y_offsets
+
     def cure(self, x, y, diameter, cure_per_step):
         """
         Cures the pixels within a given circle beam.
@@ -54,59 +162,168 @@ class Canvas:
             diameter: The diameter of the circle beam (in mm).
             cure_per_step: The amount to cure each pixel per step.
         """
-        radius = diameter / 2.0
-        x0 = int(round(float(x) * self.mm_to_pixel_ratio))
-        y0 = int(round(float(y) * self.mm_to_pixel_ratio))
-        pixel_radius = int(round(radius * self.mm_to_pixel_ratio))
+        x0, y0, x_offset, y_offset = (int(v) for v in self.get_beam_pixels(float(x), float(y)))
+        kernel = self.get_beam_kernel(diameter, x_offset, y_offset)
+        half_size = kernel.shape[0] // 2
+        self.add_dose(x0 - half_size, y0 - half_size, kernel * cure_per_step)
+
+    def cure_many(self, xs, ys, diameter, cure_per_step):
+        """
+        Cures the pixels within a circle beam at many centers at once, as if cure was called for each center. The
+        centers are counted into an image of impulses for each sub-pixel offset, which is convolved once with the beam
+        kernel of the offset, so the time taken grows with the area the centers span rather than with their number.
+
+        Args:
+            xs: The x-coordinates of the centers of the circle beam (in mm).
+            ys: The y-coordinates of the centers of the circle beam (in mm).
+            diameter: The diameter of the circle beam (in mm).
+            cure_per_step: The amount to cure each pixel per center, either one amount or one for each center.
+        """
+        x0, y0, x_offsets, y_offsets = self.get_beam_pixels(xs, ys)
+        if len(x0) == 0:
+            return
+        is_uniform = np.ndim(cure_per_step) == 0
+        weights = None if is_uniform else np.broadcast_to(np.asarray(cure_per_step, dtype=np.float64), x0.shape)
+
+        x_min, y_min = x0.min(), y0.min()
+        shape = (x0.max() - x_min + 1, y0.max() - y_min + 1)
+        indices = (x0 - x_min) * shape[1] + (y0 - y_min)
 
-        mask = self._get_circle_mask(pixel_radius)
+        offsets, groups = np.unique(np.stack([x_offsets, y_offsets], axis=1), axis=0, return_inverse=True)
+        for (group, (x_offset, y_offset)) in enumerate(offsets):
+            is_in_group = groups.ravel() == group
+            kernel = self.get_beam_kernel(diameter, int(x_offset), int(y_offset))
+            half_size = kernel.shape[0] // 2
+            impulses = np.bincount(indices[is_in_group], weights=None if is_uniform else weights[is_in_group],
+                                   minlength=shape[0] * shape[1]).reshape(shape)
+            dose = fftconvolve(impulses, kernel)
+            if is_uniform and self.beam_profile == DISK:
+                # The number of centers covering each pixel is an integer, so rounding removes the error of the FFT
+                dose = np.rint(dose) * cure_per_step
+            else:
+                # Pixels no center covers come out of the FFT as rounding noise rather than 0
+                dose[np.rint(fftconvolve(impulses != 0, kernel != 0)) == 0] = 0
+                if is_uniform:
+                    dose *= cure_per_step
+            self.add_dose(x_min - half_size, y_min - half_size, dose)
 
-        # Compute the bounding box of the circle on the canvas
-        x_min = x0 - pixel_radius
-        x_max = x0 + pixel_radius + 1
-        y_min = y0 - pixel_radius
-        y_max = y0 + pixel_radius + 1
+    def add_dose(self, x_min, y_min, dose):
+        """
+        Cures a rectangle of pixels by a different amount per pixel.
 
+        Args:
+            x_min (int): The x index of the first pixel of the rectangle.
+            y_min (int): The y index of the first pixel of the rectangle.
+            dose (np.ndarray): The amount to cure each pixel, indexed [x, y] from the first pixel.
+        """
         # Clip to canvas bounds (excluding edges at 0 and dimensions)
         canvas_x_min = max(1, x_min)
-        canvas_x_max = min(self.dimensions - 1, x_max)
+        canvas_x_max = min(self.dimensions - 1, x_min + dose.shape[0])
         canvas_y_min = max(1, y_min)
-        canvas_y_max = min(self.dimensions - 1, y_max)
+        canvas_y_max = min(self.dimensions - 1, y_min + dose.shape[1])
 
         if canvas_x_min >= canvas_x_max or canvas_y_min >= canvas_y_max:
             return
 
-        # Corresponding slice of the mask
-        mask_x_min = canvas_x_min - x_min
-        mask_x_max = mask_x_min + (canvas_x_max - canvas_x_min)
-        mask_y_min = canvas_y_min - y_min
-        mask_y_max = mask_y_min + (canvas_y_max - canvas_y_min)
+        region = (slice(canvas_x_min, canvas_x_max), slice(canvas_y_min, canvas_y_max))
+        dose = dose[canvas_x_min - x_min:canvas_x_max - x_min, canvas_y_min - y_min:canvas_y_max - y_min]
+        self.alpha[region] = np.minimum(self.alpha[region] + dose, self.MAX_ALPHA)
 
-        region = self.alpha[canvas_x_min:canvas_x_max, canvas_y_min:canvas_y_max]
-        circle_mask = mask[mask_x_min:mask_x_max, mask_y_min:mask_y_max]
+    @staticmethod
+    def get_image(alpha, binarized=False):
+        """
+        Renders the curing intensity of pixels as an RGBA image, red wherever any curing occurred.
 
-        region[circle_mask] = np.minimum(region[circle_mask] + cure_per_step, self.MAX_ALPHA)
+        Args:
+            alpha (np.ndarray): The curing intensity of the pixels, indexed [x, y].
+            binarized (bool, optional): Whether every cured pixel is opaque. Defaults to False.
 
-    def draw(self, binarized=False):
-        """
-        Draws the pixels on the canvas.
+        Returns:
+            np.ndarray: The image, shaped (rows, columns, 4), with y increasing upward.
         """
-        size = self.dimensions + 1
+        # Flip y-axis to match original coordinate system (y increases upward)
+        alpha = alpha[:, ::-1].T
 
-        # Build RGBA image from the alpha array
-        rgba = np.zeros((size, size, 4), dtype=np.uint8)
+        rgba = np.zeros(alpha.shape + (4,), dtype=np.uint8)
 
         # Red channel: 255 wherever any curing occurred
-        rgba[:, :, 0] = np.where(self.alpha > 0, 255, 0)
+        rgba[:, :, 0] = np.where(alpha > 0, 255, 0)
 
         # Alpha channel
         if binarized:
-            rgba[:, :, 3] = np.where(self.alpha > 0, 255, 0)
+            rgba[:, :, 3] = np.where(alpha > 0, 255, 0)
         else:
-            rgba[:, :, 3] = np.clip(self.alpha, 0, 255).astype(np.uint8)
+            rgba[:, :, 3] = np.clip(alpha, 0, 255).astype(np.uint8)
+        return rgba
 
-        # Flip y-axis to match original coordinate system (y increases upward)
-        rgba = rgba[:, ::-1, :]
+    def get_image_bands(self, binarized=False, band_height=256):
+        """
+        Renders the canvas as an RGBA image in bands of rows, from the top of the image, so that only one band is
+        rendered at a time.
 
-        new = Image.fromarray(rgba.transpose(1, 0, 2), mode="RGBA")
+        Args:
+            binarized (bool, optional): Whether every cured pixel is opaque. Defaults to False.
+            band_height (int, optional): The number of rows of a band. Defaults to 256.
+
+        Yields:
+            np.ndarray: The bands, shaped (rows, columns, 4).
+        """
+        size = self.dimensions + 1
+        for row in range(0, size, band_height):
+            # The top row of the image is the largest y
+            y_min, y_max = max(size - row - band_height, 0), size - row
+            yield self.get_image(np.asarray(self.alpha[:, y_min:y_max]), binarized)
+
+    def save(self, file_name, binarized=False):
+        """
+        Saves the canvas without showing it. A .png or .tif/.tiff file holds the image draw shows, written in bands of
+        rows. A .npy file holds the curing intensity of each pixel, indexed [x, y], written through a memory map.
+
+        Args:
+            file_name (str): The path of the file.
+            binarized (bool, optional): Whether every cured pixel is opaque in an image. Defaults to False.
+        """
+        extension = os.path.splitext(file_name)[1].lower()
+        size = self.dimensions + 1
+        if extension == ".npy":
+            dose_map = np.lib.format.open_memmap(file_name, mode="w+", dtype=self.alpha.dtype, shape=self.alpha.shape)
+            for x in range(0, size, 256):
+                dose_map[x:x + 256] = self.alpha[x:x + 256, :]
+            dose_map.flush()
+            del dose_map
+        elif extension == ".png":
+            write_png(file_name, self.get_image_bands(binarized), size, size)
+        elif extension in (".tif", ".tiff"):
+            write_tiff(file_name, self.get_image_bands(binarized), size, size)
+        else:
+            raise ValueError(f"Unknown canvas file type '{extension}'. Choose one of ['.png', '.tif', '.tiff', '.npy'].")
+
+    def save_preview(self, file_name, max_size=1000, binarized=False):
+        """
+        Saves a downsampled image of the canvas, averaging blocks of pixels so that neither side exceeds max_size.
+
+        Args:
+            file_name (str): The path of the image, in any format PIL writes.
+            max_size (int, optional): The largest side of the preview in pixels. Defaults to 1000.
+            binarized (bool, optional): Whether every cured pixel is opaque. Defaults to False.
+        """
+        size = self.dimensions + 1
+        factor = -(-size // max_size)
+        preview_size = -(-size // factor)
+        preview = np.zeros((preview_size, preview_size), dtype=np.float64)
+        band_width = factor * max(256 // factor, 1)
+        for x in range(0, size, band_width):
+            band = np.zeros((band_width, preview_size * factor), dtype=np.float64)
+            rows = np.asarray(self.alpha[x:x + band_width, :])
+            band[:rows.shape[0], :size] = rows
+            blocks = band.reshape(band_width // factor, factor, preview_size, factor).mean(axis=(1, 3))
+            preview[x // factor:x // factor + blocks.shape[0]] = blocks[:preview_size - x // factor]
+
+        Image.fromarray(self.get_image(preview, binarized), mode="RGBA").save(file_name)
+
+    def draw(self, binarized=False):
+        """
+        Draws the pixels on the canvas.
+        """
+        new = Image.fromarray(self.get_image(np.asarray(self.alpha), binarized), mode="RGBA")
         new.show()
@@ -0,0 +1,306 @@
+import sys
+import os
+import csv
+import math
+import threading
+from collections import Counter
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from Constants import ACCELERATION, MAXIMUM_VELOCITY, MAXIMUM_CURRENT, MOTOR_MINIMUM_STEP_SIZE
+from Hardware.Manager import Manager
+
+
+class DryRunClock:
+    """
+    The virtual clock the devices of a DryRunManager share, and the trace of the commands they were sent.
+
+    A motion command starts once the previous command of its own device has finished, so the two axes move at the same
+    time as they do on the hardware. Any other command is sent after the threads of the previous move were joined, so
+    it waits for every device.
+
+    Attributes:
+        command_latency_s (float): The time every command takes before the device acts on it, in seconds.
+        time (float): The time in seconds at which the last command that waits for every device finished.
+        busy_until (dict): The time in seconds at which each device finishes its last command.
+        trace (list): A dict for each command with its start and end in milliseconds, device, command and argument.
+    """
+
+    def __init__(self, command_latency_s=0.0):
+        """
+        Initializes a new instance of the DryRunClock class.
+
+        Args:
+            command_latency_s (float, optional): The time every command takes before the device acts on it, in
+                seconds. Defaults to 0.0.
+        """
+        self.command_latency_s = command_latency_s
+        self.time = 0.0
+        self.busy_until = {}
+        self.trace = []
+        self.lock = threading.Lock()
+
+    def record(self, device, command, argument=None, duration=0.0, is_motion=False):
+        """
+        Records a command and advances the clock by the time it takes.
+
+        Args:
+            device (str): The name of the device the command is sent to.
+            command (str): The name of the command.
+            argument (float, optional): The argument of the command. Defaults to None.
+            duration (float, optional): The time the device takes to carry out the command, in seconds. Defaults to 0.0.
+            is_motion (bool, optional): Whether the command only waits for its own device. Defaults to False.
+        """
+        with self.lock:
+            if is_motion:
+                start = max(self.time, self.busy_until.get(device, 0.0))
+            else:
+                start = max([self.time, *self.busy_until.values()])
+            end = start + self.command_latency_s + duration
+            self.busy_until[device] = end
+            if not is_motion:
+                self.time = end
+            self.trace.append({
+                "start_ms": start * 1000,
+                "end_ms": end * 1000,
+                "device": device,
+                "command": command,
+                "argument": argument,
+            })
+
+    def get_elapsed_time(self):
+        """
+        Returns:
+            float: The time in seconds at which every device has finished its commands.
+        """
+        return max([self.time, *self.busy_until.values()])
+
+
+class DryRunMotor:
+    """
+    A motor that only keeps time. It takes the commands of Hardware/Motor.py and records them on a DryRunClock with
+    the time the motor is predicted to take for them.
+
+    Jogging accelerates to the set velocity and stops immediately, as jog_to of the hardware motor does, and is timed
+    as VirtualMotor.get_movement_time times it. move_absolute accelerates to MAXIMUM_VELOCITY and decelerates to the
+    position.
+
+    Attributes:
+        serial_number (str): The name of the motor in the trace.
+        clock (DryRunClock): The clock the motor records its commands on.
+        acceleration (float): The acceleration of the motor.
+        max_velocity (float): The maximum velocity of the motor.
+        velocity (float): The velocity the motor jogs at.
+        position (float): The position the motor is predicted to be at once its commands are carried out.
+    """
+
+    def __init__(self, serial_no, clock, acceleration=None, max_velocity=None):
+        """
+        Initializes a new instance of the DryRunMotor class.
+
+        Args:
+            serial_no (str): The name of the motor in the trace.
+            clock (DryRunClock): The clock the motor records its commands on.
+            acceleration (float, optional): The acceleration value in mm/s^2. Defaults to None.
+            max_velocity (float, optional): The maximum velocity value in mm/s. Defaults to None.
+        """
+        self.serial_number = serial_no
+        self.clock = clock
+        self.acceleration = acceleration if acceleration else ACCELERATION
+        self.max_velocity = max_velocity if max_velocity else MAXIMUM_VELOCITY
+        self.velocity = self.max_velocity
+        self.position = 0.0
+
+    def __del__(self):
+        pass
+
+    def home(self):
+        """
+        Homes the motor. The position of the motor before homing is unknown, so homing takes no time.
+        """
+        self.clock.record(self.serial_number, "home", is_motion=True)
+        self.position = 0.0
+
+    def set_params(self, velocity):
+        """
+        Sets the velocity the motor jogs at.
+
+        Args:
+            velocity (float): The maximum velocity value in mm/s.
+        """
+        self.velocity = velocity
+        self.clock.record(self.serial_number, "set_params", velocity)
+
+    def jog_to(self, absolute_position):
+        """
+        Jogs the motor to an absolute position. Moves no longer than the minimum step size of the motor are skipped,
+        as the hardware motor skips them.
+
+        Args:
+            absolute_position (float): The absolute position to move the motor to in mm.
+        """
+        d = math.fabs(float(absolute_position) - self.position)
+        duration = 0.0
+        if d > MOTOR_MINIMUM_STEP_SIZE:
+            v, a = math.fabs(float(self.velocity)), self.acceleration
+            t1 = math.sqrt((2 * d) / a)
+            duration = t1 if t1 < v / a else v / a + (d - v ** 2 / (2 * a)) / v
+            self.position = float(absolute_position)
+        self.clock.record(self.serial_number, "jog_to", float(absolute_position), duration, is_motion=True)
+
+    def move_absolute(self, absolute_position):
+        """
+        Moves the motor to an absolute position at MAXIMUM_VELOCITY and ACCELERATION.
+
+        Args:
+            absolute_position (float): The absolute position to move the motor to in mm.
+        """
+        d = math.fabs(float(absolute_position) - self.position)
+        v, a = MAXIMUM_VELOCITY, ACCELERATION
+        # Accelerates for the first half of the move and decelerates for the second if it never reaches v
+        t1 = 2 * math.sqrt(d / a)
+        duration = t1 if t1 < 2 * v / a else v / a + d / v
+        self.position = float(absolute_position)
+        self.clock.record(self.serial_number, "move_absolute", float(absolute_position), duration, is_motion=True)
+
+
+class DryRunLamp:
+    """
+    A lamp that only records its commands on a DryRunClock. It checks the current as Hardware/Lamp.py does.
+
+    Attributes:
+        clock (DryRunClock): The clock the lamp records its commands on.
+    """
+
+    def __init__(self, clock):
+        """
+        Initializes a new instance of the DryRunLamp class.
+
+        Args:
+            clock (DryRunClock): The clock the lamp records its commands on.
+        """
+        self.clock = clock
+
+    def __del__(self):
+        pass
+
+    def turn_on(self, led_ampere):
+        """
+        Turns on the lamp with the specified current.
+
+        Args:
+            led_ampere (float): The current in amperes to set for the lamp.
+        """
+        if led_ampere > MAXIMUM_CURRENT:
+            raise ValueError(f"The current cannot be greater than {MAXIMUM_CURRENT} mA")
+        if led_ampere < 0:
+            raise ValueError("The current cannot be negative")
+        self.clock.record("lamp", "turn_on", float(led_ampere))
+
+    def turn_off(self):
+        """
+        Turns off the lamp.
+        """
+        self.clock.record("lamp", "turn_off")
+
+
+class DryRunManager(Manager):
+    """
+    Runs the commands of Manager against motors and a lamp that only keep time, so a job is checked and profiled
+    faster than real time without the hardware and without rendering a canvas. Manager.move sends its commands
+    unchanged, and each is recorded in a trace with the time it is predicted to start and end, in milliseconds.
+
+    Attributes:
+        clock (DryRunClock): The clock of the devices, which holds the trace.
+        lamp (DryRunLamp): The lamp.
+        x (DryRunMotor): The motor of the x-axis.
+        y (DryRunMotor): The motor of the y-axis.
+        moves (list): A dict for each move with its start and end in milliseconds, its length in mm and whether the
+            lamp is on.
+    """
+
+    def __init__(self, acceleration=None, max_velocity=None, command_latency_s=0.0):
+        """
+        Initializes a new instance of the DryRunManager class and homes its motors.
+
+        Args:
+            acceleration (float, optional): The acceleration value for the motors. Defaults to None.
+            max_velocity (float, optional): The maximum velocity value for the motors. Defaults to None.
+            command_latency_s (float, optional): The time every command takes before the device acts on it, in
+                seconds. Defaults to 0.0.
+        """
+        self.clock = DryRunClock(command_latency_s)
+        self.lamp = DryRunLamp(self.clock)
+        self.x = DryRunMotor("x", self.clock, acceleration=acceleration, max_velocity=max_velocity)
+        self.y = DryRunMotor("y", self.clock, acceleration=acceleration, max_velocity=max_velocity)
+        self.moves = []
+        for motor in self.motors():
+            motor.home()
+
+    @property
+    def trace(self):
+        return self.clock.trace
+
+    def move(self, position):
+        """
+        Sends the commands of Manager.move for a position and records the time the move takes and its length.
+
+        Args:
+            position (Position): The position object containing the coordinates and movement parameters.
+        """
+        start = self.clock.get_elapsed_time()
+        x, y = self.x.position, self.y.position
+        super().move(position)
+        self.moves.append({
+            "start_ms": start * 1000,
+            "end_ms": self.clock.get_elapsed_time() * 1000,
+            "length_mm": math.hypot(self.x.position - x, self.y.position - y),
+            "lp": bool(position.lp),
+        })
+
+    def get_summary(self, tiny_move_mm=0.01):
+        """
+        Summarizes the trace.
+
+        Args:
+            tiny_move_mm (float, optional): The length of the moves below which a move counts as tiny. Defaults to 0.01.
+
+        Returns:
+            dict: The predicted time in seconds, the number of each command, the number of moves, the time the lamp is
+                on in seconds, and the number of tiny moves and the time in seconds they take. Many tiny moves take far
+                longer to send than to move.
+        """
+        tiny_moves = [move for move in self.moves if move["length_mm"] < tiny_move_mm]
+        return {
+            "time_s": self.clock.get_elapsed_time(),
+            "commands": dict(Counter(entry["command"] for entry in self.trace)),
+            "moves": len(self.moves),
+            "lamp_on_s": sum(move["end_ms"] - move["start_ms"] for move in self.moves if move["lp"]) / 1000,
+            "tiny_moves": len(tiny_moves),
+            "tiny_move_s": sum(move["end_ms"] - move["start_ms"] for move in tiny_moves) / 1000,
+        }
+
+    def print_summary(self, tiny_move_mm=0.01):
+        """
+        Prints the summary of the trace.
+
+        Args:
+            tiny_move_mm (float, optional): The length of the moves below which a move counts as tiny. Defaults to 0.01.
+        """
+        summary = self.get_summary(tiny_move_mm)
+        time_s = summary["time_s"]
+        print(f"Dry run: {int(time_s // 3600)} hours {int((time_s % 3600) // 60)} minutes {time_s % 60:.1f} seconds for "
+              f"{summary['moves']} moves, with the lamp on for {summary['lamp_on_s']:.1f} seconds")
+        print("  Commands: " + ", ".join(f"{command} {count}" for (command, count) in summary["commands"].items()))
+        if summary["tiny_moves"]:
+            print(f"  {summary['tiny_moves']} moves are shorter than {tiny_move_mm} mm and take {summary['tiny_move_s']:.1f} seconds")
+
+    def save_trace(self, file_name):
+        """
+        Saves the trace as a CSV file.
+
+        Args:
+            file_name (str): The path of the CSV file.
+        """
+        with open(file_name, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=["start_ms", "end_ms", "device", "command", "argument"])
+            writer.writeheader()
+            writer.writerows(self.trace)
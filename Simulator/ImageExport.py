@@ -0,0 +1,113 @@
+import struct
+import zlib
+import numpy as np
+
+# Writers of 8-bit RGBA images that take the image in bands of rows, so an image is written without holding it whole
+# in memory. PIL needs the whole image to write a PNG or TIFF.
+
+CHANNELS = 4
+
+
+def write_png(file_name, bands, width, height):
+    """
+    Writes an 8-bit RGBA PNG from bands of rows, compressing them as they come.
+
+    Args:
+        file_name (str): The path of the PNG.
+        bands (iterable): numpy.ndarray bands of rows from the top of the image, each shaped (rows, width, 4).
+        width (int): The width of the image in pixels.
+        height (int): The height of the image in pixels.
+    """
+    def write_chunk(file, chunk_type, data):
+        file.write(struct.pack(">I", len(data)))
+        file.write(chunk_type + data)
+        file.write(struct.pack(">I", zlib.crc32(chunk_type + data) & 0xFFFFFFFF))
+
+    compressor = zlib.compressobj(6)
+    with open(file_name, "wb") as file:
+        file.write(b"\x89PNG\r\n\x1a\n")
+        # 8 bits per sample, color type 6 (RGBA), deflate compression, adaptive filtering, no interlacing
+        write_chunk(file, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+        rows_written = 0
+        for band in bands:
+            # Every row starts with its filter type, 0 (none)
+            rows = np.zeros((band.shape[0], width * CHANNELS + 1), dtype=np.uint8)
+            rows[:, 1:] = band.reshape(band.shape[0], -1)
+            data = compressor.compress(rows.tobytes())
+            if data:
+                write_chunk(file, b"IDAT", data)
+            rows_written += band.shape[0]
+        if rows_written != height:
+            raise ValueError(f"Expected {height} rows but got {rows_written}.")
+        write_chunk(file, b"IDAT", compressor.flush())
+        write_chunk(file, b"IEND", b"")
+
+
+def write_tiff(file_name, bands, width, height):
+    """
+    Writes an uncompressed 8-bit RGBA TIFF from bands of rows, with one strip for each band. The directory of the
+    image follows the strips, so it is written once their offsets are known.
+
+    Args:
+        file_name (str): The path of the TIFF.
+        bands (iterable): numpy.ndarray bands of rows from the top of the image, each shaped (rows, width, 4). All
+            bands but the last must have the same number of rows.
+        width (int): The width of the image in pixels.
+        height (int): The height of the image in pixels.
+    """
+    with open(file_name, "wb") as file:
+        # Little-endian TIFF, with the offset of the directory filled in at the end
+        file.write(b"II*\x00\x00\x00\x00\x00")
+        strip_offsets, strip_byte_counts = [], []
+        rows_per_strip = None
+        for band in bands:
+            rows_per_strip = rows_per_strip or band.shape[0]
+            strip_offsets.append(file.tell())
+            data = np.ascontiguousarray(band, dtype=np.uint8).tobytes()
+            strip_byte_counts.append(len(data))
+            file.write(data)
+        if sum(strip_byte_counts) != width * height * CHANNELS:
+            raise ValueError(f"Expected {height} rows of {width} pixels but got {sum(strip_byte_counts) // CHANNELS} pixels.")
+
+        def write_array(type_code, values):
+            # Values that fit in 4 bytes are kept in the directory, others are written before it and referred to by
+            # offset, aligned to a word
+            if struct.calcsize(f"<{len(values)}{type_code}") <= 4:
+                return struct.unpack("<I", struct.pack(f"<{len(values)}{type_code}", *values).ljust(4, b"\x00"))[0]
+            if file.tell() % 2:
+                file.write(b"\x00")
+            offset = file.tell()
+            file.write(struct.pack(f"<{len(values)}{type_code}", *values))
+            return offset
+
+        strip_count = len(strip_offsets)
+        bits_per_sample = write_array("H", [8] * CHANNELS)
+        strip_offsets = write_array("I", strip_offsets)
+        strip_byte_counts = write_array("I", strip_byte_counts)
+
+        # Tag, type (3 SHORT, 4 LONG), count, and value or offset, in increasing order of tag
+        entries = [
+            (256, 4, 1, width),
+            (257, 4, 1, height),
+            (258, 3, CHANNELS, bits_per_sample),
+            (259, 3, 1, 1),  # No compression
+            (262, 3, 1, 2),  # RGB
+            (273, 4, strip_count, strip_offsets),
+            (277, 3, 1, CHANNELS),
+            (278, 4, 1, rows_per_strip),
+            (279, 4, strip_count, strip_byte_counts),
+            (284, 3, 1, 1),  # Chunky samples
+            (338, 3, 1, 2),  # Unassociated alpha
+        ]
+        if file.tell() % 2:
+            file.write(b"\x00")
+        directory_offset = file.tell()
+        file.write(struct.pack("<H", len(entries)))
+        for (tag, type_code, count, value) in entries:
+            # A single SHORT is stored in the first 2 of the 4 bytes of the value
+            value_bytes = struct.pack("<HH", value, 0) if type_code == 3 and count == 1 else struct.pack("<I", value)
+            file.write(struct.pack("<HHI", tag, type_code, count) + value_bytes)
+        file.write(struct.pack("<I", 0))
+
+        file.seek(4)
+        file.write(struct.pack("<I", directory_offset))
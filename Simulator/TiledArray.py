@@ -0,0 +1,118 @@
+import numpy as np
+
+
+class TiledArray:
+    """
+    A 2D array stored in square tiles that are allocated when first written, so an array that is only written in a few
+    places takes memory only there. Reading a region returns a copy, with zeros where no tile was allocated.
+
+    Attributes:
+        shape (tuple): The shape of the array.
+        dtype (np.dtype): The number type of the array.
+        tile_size (int): The size of a tile.
+        tiles (dict): The allocated tiles, by the row and column of the tile.
+
+    Methods:
+        __getitem__(self, key): Returns a copy of a region of the array.
+        __setitem__(self, key, value): Writes a region of the array, allocating the tiles it covers.
+        __array__(self, dtype=None, copy=None): Returns the whole array as a numpy array.
+        max(self): Returns the largest value of the array.
+        sum(self): Returns the sum of the array.
+    """
+
+    def __init__(self, shape, dtype=np.float64, tile_size=256):
+        """
+        Initializes a new instance of the TiledArray class.
+
+        Args:
+            shape (tuple): The shape of the array.
+            dtype (np.dtype, optional): The number type of the array. Defaults to np.float64.
+            tile_size (int, optional): The size of a tile. Defaults to 256.
+        """
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.tile_size = tile_size
+        self.tiles = {}
+
+    @property
+    def nbytes(self):
+        """
+        The memory taken by the allocated tiles, in bytes.
+        """
+        return sum(tile.nbytes for tile in self.tiles.values())
+
+    def get_tile_slices(self, key):
+        """
+        Splits a region of the array by the tiles it covers.
+
+        Args:
+            key (tuple): The slices of the region, without steps.
+
+        Yields:
+            tuple: The row and column of the tile, the slices of the region in the tile, and the slices of the tile in
+                the region.
+        """
+        (row_start, row_stop, _), (col_start, col_stop, _) = (s.indices(size) for (s, size) in zip(key, self.shape))
+        if row_stop <= row_start or col_stop <= col_start:
+            return
+        size = self.tile_size
+        for row in range(row_start // size, (row_stop - 1) // size + 1):
+            rows = slice(max(row_start, row * size), min(row_stop, (row + 1) * size))
+            for col in range(col_start // size, (col_stop - 1) // size + 1):
+                cols = slice(max(col_start, col * size), min(col_stop, (col + 1) * size))
+                in_tile = (slice(rows.start - row * size, rows.stop - row * size), slice(cols.start - col * size, cols.stop - col * size))
+                in_region = (slice(rows.start - row_start, rows.stop - row_start), slice(cols.start - col_start, cols.stop - col_start))
+                yield (row, col), in_tile, in_region
+
+    def __getitem__(self, key):
+        """
+        Returns a copy of a region of the array.
+
+        Args:
+            key (tuple): The slices of the region, without steps.
+
+        Returns:
+            np.ndarray: The values of the region.
+        """
+        (row_start, row_stop, _), (col_start, col_stop, _) = (s.indices(size) for (s, size) in zip(key, self.shape))
+        region = np.zeros((max(row_stop - row_start, 0), max(col_stop - col_start, 0)), dtype=self.dtype)
+        for (index, in_tile, in_region) in self.get_tile_slices(key):
+            if index in self.tiles:
+                region[in_region] = self.tiles[index][in_tile]
+        return region
+
+    def __setitem__(self, key, value):
+        """
+        Writes a region of the array, allocating the tiles it covers.
+
+        Args:
+            key (tuple): The slices of the region, without steps.
+            value (np.ndarray): The values of the region.
+        """
+        (row_start, row_stop, _), (col_start, col_stop, _) = (s.indices(size) for (s, size) in zip(key, self.shape))
+        value = np.broadcast_to(value, (max(row_stop - row_start, 0), max(col_stop - col_start, 0)))
+        for (index, in_tile, in_region) in self.get_tile_slices(key):
+            if index not in self.tiles:
+                self.tiles[index] = np.zeros((self.tile_size, self.tile_size), dtype=self.dtype)
+            self.tiles[index][in_tile] = value[in_region]
+
+    def __array__(self, dtype=None, copy=None):
+        """
+        Returns the whole array as a numpy array.
+        """
+        array = self[:, :]
+        return array if dtype is None else array.astype(dtype)
+
+    def max(self):
+        """
+        Returns the largest value of the array, which is 0 or more where no tile was allocated.
+        """
+        is_full = len(self.tiles) == -(-self.shape[0] // self.tile_size) * -(-self.shape[1] // self.tile_size)
+        values = [tile.max() for tile in self.tiles.values()] + ([] if is_full else [0])
+        return max(values)
+
+    def sum(self):
+        """
+        Returns the sum of the array.
+        """
+        return sum(tile.sum() for tile in self.tiles.values())
@@ -13,6 +13,7 @@ class VirtualLamp:
     Methods:
         turn_on(_): Turns on the virtual lamp.
         cure(x, y, beam_diameter, curing_rate): Performs curing on the specified coordinates.
+        cure_many(xs, ys, beam_diameter, curing_rate): Performs curing on many coordinates at once.
         turn_off(): Turns off the virtual lamp.
     """
 
@@ -54,6 +55,20 @@ class VirtualLamp:
         curing_percentage = (curing_rate / MAXIMUM_CURRENT) * 1000 * self.time_step / beam_area
         self.canvas.cure(x, y, beam_diameter, curing_percentage)
 
+    def cure_many(self, xs, ys, beam_diameter, curing_rate):
+        """
+        Performs curing on many coordinates at once, as if cure was called for each of them.
+
+        Args:
+            xs (list): The x-coordinates of the curing locations.
+            ys (list): The y-coordinates of the curing locations.
+            beam_diameter (float): The diameter of the curing beam.
+            curing_rate (float): The rate of curing.
+        """
+        beam_area = math.pi * (beam_diameter / 2) ** 2
+        curing_percentage = (curing_rate / MAXIMUM_CURRENT) * 1000 * self.time_step / beam_area
+        self.canvas.cure_many(xs, ys, beam_diameter, curing_percentage)
+
     def turn_off(self):
         """
         Turns off the virtual lamp.
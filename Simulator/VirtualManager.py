@@ -64,9 +64,11 @@ class VirtualManager:
         self.x.position = position.x
         self.y.position = position.y
         if is_lamp_on:
-            for i in range(max(len(x_mvts), len(y_mvts))):
-                x_i, y_i = min(i, len(x_mvts) - 1), min(i, len(y_mvts) - 1)
-                self.lamp.cure(x_mvts[x_i], y_mvts[y_i], self.beam_diameter, position.a)
+            # The axis that arrives first holds its last position while the other moves
+            steps = max(len(x_mvts), len(y_mvts))
+            x_mvts += x_mvts[-1:] * (steps - len(x_mvts))
+            y_mvts += y_mvts[-1:] * (steps - len(y_mvts))
+            self.lamp.cure_many(x_mvts, y_mvts, self.beam_diameter, position.a)
 
     def __del__(self):
         """
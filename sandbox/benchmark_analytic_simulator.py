@@ -0,0 +1,63 @@
+import sys
+import os
+import time
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from Shapes import *
+from Coordinate import Coordinate
+import NumericBackend
+from Constants import ACCELERATION, MAXIMUM_VELOCITY, BEAM_DIAMETER
+from Simulator.VirtualManager import VirtualManager
+from Simulator.AnalyticVirtualManager import AnalyticVirtualManager
+
+# Simulates the same shapes with the time-stepping VirtualManager and with AnalyticVirtualManager, and compares the
+# cured canvases: total dose, the largest and mean difference per pixel (relative to the largest dose of the stepping
+# canvas), and the overlap of the pixels cured above half of the largest dose. The stepping canvas is a Riemann sum of
+# the analytic one that cures one or two extra time steps at the end of every move, so the two converge as the time
+# step of VirtualManager shrinks (0.1 s at CANVAS_QUALITY = 1, 0.1 / CANVAS_QUALITY^2 in general), while the analytic
+# simulation takes the same time for any time step.
+# Run from anywhere: python sandbox/benchmark_analytic_simulator.py
+
+CANVAS_DIMENSIONS_MM = 25
+TIME_STEPS = (0.1, 0.01)
+CENTER = Coordinate(12.5, 12.5)
+SHAPES = {
+    "line": Line(length_mm=5, stiffness=20000, center=CENTER, rotation_angle_degrees=30, beam_diameter=BEAM_DIAMETER, uses_step_coordinates=False),
+    "square": Square(side_length_mm=3, stiffness=10000, center=CENTER, rotation_angle_degrees=0, beam_diameter=BEAM_DIAMETER, uses_step_coordinates=False, filled=False),
+    "filled rectangle": Rectangle(width_mm=2, height_mm=1.5, stiffness=20000, center=CENTER, rotation_angle_degrees=0, beam_diameter=BEAM_DIAMETER, uses_step_coordinates=False, filled=True),
+    "circle": Circle(diameter_mm=3, stiffness=10000, center=CENTER, beam_diameter=BEAM_DIAMETER, filled=False),
+    "sine wave": SineWave(amplitude_mm=1, cycles=2, cycles_per_mm=0.5, stiffness=10000, cycle_offset=0, center=CENTER, rotation_angle_degrees=0, beam_diameter=BEAM_DIAMETER),
+}
+
+
+def simulate(manager_class, coordinates, time_step):
+    manager = manager_class(canvas_dimensions_mm=CANVAS_DIMENSIONS_MM, acceleration=ACCELERATION, max_velocity=MAXIMUM_VELOCITY, beam_diameter=BEAM_DIAMETER)
+    manager.x.time_step = manager.y.time_step = NumericBackend.number(time_step)
+    manager.lamp.time_step = time_step
+    start = time.perf_counter()
+    for coordinate in coordinates:
+        manager.move(coordinate)
+    return manager.canvas.alpha, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    failures = 0
+    for (name, shape) in SHAPES.items():
+        coordinates = shape.get_coordinates()
+        analytic, analytic_time = simulate(AnalyticVirtualManager, coordinates, TIME_STEPS[0])
+        for time_step in TIME_STEPS:
+            stepping, stepping_time = simulate(VirtualManager, coordinates, time_step)
+
+            peak = stepping.max()
+            difference = np.abs(stepping - analytic) / peak
+            stepping_cured = stepping > peak / 2
+            analytic_cured = analytic > peak / 2
+            overlap = np.sum(stepping_cured & analytic_cured) / np.sum(stepping_cured | analytic_cured)
+            dose_ratio = analytic.sum() / stepping.sum()
+            failures += not (0.9 < dose_ratio < 1.1 and overlap > 0.9)
+            print(f"{name:>16}: {len(coordinates):4d} coordinates | time step {time_step:4} s | stepping {stepping_time:6.2f}s | "
+                  f"analytic {analytic_time:5.3f}s | {stepping_time / analytic_time:5.1f}x | dose ratio {dose_ratio:.3f} | "
+                  f"max difference {difference.max():.3f} | mean difference {difference[stepping_cured].mean():.4f} | "
+                  f"cured overlap {overlap:.3f}")
+
+    sys.exit(1 if failures else 0)
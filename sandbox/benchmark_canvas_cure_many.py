@@ -0,0 +1,106 @@
+import sys
+import os
+import time
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from Shapes import *
+from Coordinate import Coordinate
+import NumericBackend
+from Constants import ACCELERATION, MAXIMUM_VELOCITY, BEAM_DIAMETER, MAXIMUM_CURRENT
+from Simulator.VirtualManager import VirtualManager
+
+# Benchmarks the batched Canvas.cure_many against one Canvas.cure call per time step, which VirtualManager.move
+# previously made, on the same shapes. Each move is cured in one batch by VirtualManager.move, and the whole job is
+# also cured in one batch with a dose per center. The canvases must match the per-step canvas to rounding, and cure
+# exactly the same pixels.
+# Run from anywhere: python sandbox/benchmark_canvas_cure_many.py
+
+CANVAS_DIMENSIONS_MM = 25
+TIME_STEP = 0.01
+CENTER = Coordinate(12.5, 12.5)
+SHAPES = {
+    "line": Line(length_mm=5, stiffness=20000, center=CENTER, rotation_angle_degrees=30, beam_diameter=BEAM_DIAMETER, uses_step_coordinates=False),
+    "filled rectangle": Rectangle(width_mm=2, height_mm=1.5, stiffness=20000, center=CENTER, rotation_angle_degrees=0, beam_diameter=BEAM_DIAMETER, uses_step_coordinates=False, filled=True),
+    "circle": Circle(diameter_mm=3, stiffness=10000, center=CENTER, beam_diameter=BEAM_DIAMETER, filled=False),
+    "gradient": Gradient(min_stiffness=5000, max_stiffness=20000, width_mm=3, height_mm=4, center=CENTER, beam_diameter=BEAM_DIAMETER, rotation_angle_degrees=0, is_reversed=False),
+}
+
+
+def get_manager():
+    manager = VirtualManager(canvas_dimensions_mm=CANVAS_DIMENSIONS_MM, acceleration=ACCELERATION, max_velocity=MAXIMUM_VELOCITY, beam_diameter=BEAM_DIAMETER)
+    manager.x.time_step = manager.y.time_step = NumericBackend.number(TIME_STEP)
+    manager.lamp.time_step = TIME_STEP
+    return manager
+
+
+def previous_move(manager, position):
+    is_lamp_on = position.lp
+    if is_lamp_on:
+        manager.x.set_params(position.v[0])
+        manager.y.set_params(position.v[1])
+    x_mvts = manager.x.get_movements(position.x, not is_lamp_on)
+    y_mvts = manager.y.get_movements(position.y, not is_lamp_on)
+    manager.x.position = position.x
+    manager.y.position = position.y
+    if is_lamp_on:
+        for i in range(max(len(x_mvts), len(y_mvts))):
+            x_i, y_i = min(i, len(x_mvts) - 1), min(i, len(y_mvts) - 1)
+            manager.lamp.cure(x_mvts[x_i], y_mvts[y_i], manager.beam_diameter, position.a)
+
+
+def get_job_stamps(coordinates):
+    # The centers and doses of every time step of the job, as VirtualManager.move cures them
+    manager = get_manager()
+    xs, ys, doses = [], [], []
+    for position in coordinates:
+        is_lamp_on = position.lp
+        if is_lamp_on:
+            manager.x.set_params(position.v[0])
+            manager.y.set_params(position.v[1])
+        x_mvts = manager.x.get_movements(position.x, not is_lamp_on)
+        y_mvts = manager.y.get_movements(position.y, not is_lamp_on)
+        manager.x.position = position.x
+        manager.y.position = position.y
+        if is_lamp_on:
+            steps = max(len(x_mvts), len(y_mvts))
+            xs += x_mvts + x_mvts[-1:] * (steps - len(x_mvts))
+            ys += y_mvts + y_mvts[-1:] * (steps - len(y_mvts))
+            beam_area = np.pi * (BEAM_DIAMETER / 2) ** 2
+            doses += [(position.a / MAXIMUM_CURRENT) * 1000 * TIME_STEP / beam_area] * steps
+    return xs, ys, doses
+
+
+if __name__ == "__main__":
+    failures = 0
+    for (name, shape) in SHAPES.items():
+        coordinates = shape.get_coordinates()
+
+        previous = get_manager()
+        start = time.perf_counter()
+        for coordinate in coordinates:
+            previous_move(previous, coordinate)
+        previous_time = time.perf_counter() - start
+
+        per_move = get_manager()
+        start = time.perf_counter()
+        for coordinate in coordinates:
+            per_move.move(coordinate)
+        per_move_time = time.perf_counter() - start
+
+        xs, ys, doses = get_job_stamps(coordinates)
+        per_job = get_manager()
+        start = time.perf_counter()
+        per_job.canvas.cure_many(xs, ys, BEAM_DIAMETER, doses)
+        per_job_time = time.perf_counter() - start
+
+        peak = previous.canvas.alpha.max()
+        results = []
+        for canvas in (per_move.canvas, per_job.canvas):
+            difference = np.abs(canvas.alpha - previous.canvas.alpha).max() / peak
+            same_pixels = np.array_equal(canvas.alpha > 0, previous.canvas.alpha > 0)
+            failures += not (difference < 1e-9 and same_pixels)
+            results.append(f"difference {difference:.1e}, same pixels: {same_pixels}")
+        print(f"{name:>16}: {len(xs):6d} stamps | per stamp {previous_time:6.2f}s | per move {per_move_time:6.2f}s "
+              f"({results[0]}) | per job {per_job_time:6.3f}s ({results[1]})")
+
+    sys.exit(1 if failures else 0)
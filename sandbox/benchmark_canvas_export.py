@@ -0,0 +1,75 @@
+import sys
+import os
+import time
+import tempfile
+import tracemalloc
+import numpy as np
+from PIL import Image
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from Shapes import *
+from Coordinate import Coordinate
+from Constants import ACCELERATION, MAXIMUM_VELOCITY, BEAM_DIAMETER
+from Simulator.Canvas import Canvas
+from Simulator.AnalyticVirtualManager import AnalyticVirtualManager
+
+# Benchmarks Canvas.save and Canvas.save_preview against the rendering of the previous Canvas.draw saved with PIL, on
+# a 25 mm canvas at 200 px/mm holding a simulated 3 mm circle. Reports the time and the peak of the memory numpy
+# allocates while saving. The PNG and TIFF must hold the same pixels as the previous rendering.
+# Run from anywhere: python sandbox/benchmark_canvas_export.py
+
+CANVAS_DIMENSIONS_MM = 25
+PIXELS_PER_MM = 200
+CENTER = Coordinate(12.5, 12.5)
+
+
+def previous_draw(alpha, file_name):
+    size = alpha.shape[0]
+    alpha = np.asarray(alpha)
+    rgba = np.zeros((size, size, 4), dtype=np.uint8)
+    rgba[:, :, 0] = np.where(alpha > 0, 255, 0)
+    rgba[:, :, 3] = np.clip(alpha, 0, 255).astype(np.uint8)
+    rgba = rgba[:, ::-1, :]
+    Image.fromarray(rgba.transpose(1, 0, 2), mode="RGBA").save(file_name)
+
+
+def measure(function, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    function(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+if __name__ == "__main__":
+    manager = AnalyticVirtualManager(canvas_dimensions_mm=CANVAS_DIMENSIONS_MM, acceleration=ACCELERATION, max_velocity=MAXIMUM_VELOCITY, beam_diameter=BEAM_DIAMETER)
+    manager.canvas = Canvas(dimensions_mm=CANVAS_DIMENSIONS_MM, pixels_per_mm=PIXELS_PER_MM, dtype="float32", storage="tiled")
+    for coordinate in Circle(diameter_mm=3, stiffness=10000, center=CENTER, beam_diameter=BEAM_DIAMETER, filled=False).get_coordinates():
+        manager.move(coordinate)
+    canvas = manager.canvas
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        previous_file = os.path.join(directory, "previous.png")
+        previous_time, previous_peak = measure(previous_draw, canvas.alpha, previous_file)
+        print(f"{'previous draw, saved with PIL':>30}: {previous_time:6.2f}s | peak {previous_peak / 2**20:7.1f} MB")
+        previous = np.asarray(Image.open(previous_file))
+
+        for name in ("canvas.png", "canvas.tif", "canvas.npy", "preview.png"):
+            file_name = os.path.join(directory, name)
+            if name == "preview.png":
+                elapsed, peak = measure(canvas.save_preview, file_name)
+            else:
+                elapsed, peak = measure(canvas.save, file_name)
+            if name.endswith(".npy"):
+                identical = np.array_equal(np.load(file_name), np.asarray(canvas.alpha))
+            elif name == "preview.png":
+                identical = max(Image.open(file_name).size) <= 1000
+            else:
+                identical = np.array_equal(np.asarray(Image.open(file_name)), previous)
+            failures += not identical
+            print(f"{name:>30}: {elapsed:6.2f}s | peak {peak / 2**20:7.1f} MB | {os.path.getsize(file_name) / 2**20:6.1f} MB on disk | "
+                  f"as expected: {identical}")
+
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,70 @@
+import sys
+import os
+import time
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from Shapes import *
+from Coordinate import Coordinate
+from Constants import ACCELERATION, MAXIMUM_VELOCITY, BEAM_DIAMETER
+from Simulator.Canvas import Canvas, BEAM_PROFILES
+from Simulator.AnalyticVirtualManager import AnalyticVirtualManager
+
+# Compares the beam profiles and storages of Canvas.
+# 1. Dose of single stamps at random sub-pixel positions: the total dose against the dose of the ideal disk (its area
+#    times the dose per pixel), and the distance of the center of the dose from the center of the beam.
+# 2. Memory of the canvas of a job (a 3 mm circle simulated with AnalyticVirtualManager on a 25 mm canvas) for each
+#    resolution, number type and storage. Tiled canvases must hold the same dose as dense ones.
+# Run from anywhere: python sandbox/benchmark_canvas_profiles.py
+
+CANVAS_DIMENSIONS_MM = 25
+RESOLUTIONS = (50, 100, 200)
+CENTER = Coordinate(12.5, 12.5)
+STAMPS = 200
+
+
+def measure_stamps(pixels_per_mm, beam_profile):
+    canvas = Canvas(dimensions_mm=2, pixels_per_mm=pixels_per_mm, beam_profile=beam_profile, storage="tiled")
+    rng = np.random.default_rng(0)
+    ideal = np.pi * (BEAM_DIAMETER / 2 * pixels_per_mm) ** 2
+    dose_errors, center_errors = [], []
+    for (x, y) in rng.uniform(0.9, 1.1, size=(STAMPS, 2)):
+        x0, y0, x_offset, y_offset = (int(v) for v in canvas.get_beam_pixels(x, y))
+        kernel = canvas.get_beam_kernel(BEAM_DIAMETER, x_offset, y_offset)
+        half_size = kernel.shape[0] // 2
+        x_grid, y_grid = np.meshgrid(np.arange(-half_size, half_size + 1) + x0, np.arange(-half_size, half_size + 1) + y0, indexing="ij")
+        dose_errors.append(kernel.sum() / ideal - 1)
+        center = np.array([np.sum(kernel * x_grid), np.sum(kernel * y_grid)]) / kernel.sum()
+        center_errors.append(np.hypot(*(center - np.array([x, y]) * pixels_per_mm)) / pixels_per_mm * 1000)
+    return np.abs(dose_errors).max(), np.mean(center_errors)
+
+
+def simulate(coordinates, **canvas_options):
+    manager = AnalyticVirtualManager(canvas_dimensions_mm=CANVAS_DIMENSIONS_MM, acceleration=ACCELERATION, max_velocity=MAXIMUM_VELOCITY, beam_diameter=BEAM_DIAMETER)
+    manager.canvas = Canvas(dimensions_mm=CANVAS_DIMENSIONS_MM, **canvas_options)
+    start = time.perf_counter()
+    for coordinate in coordinates:
+        manager.move(coordinate)
+    return manager.canvas.alpha, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    print("Single stamps:")
+    for pixels_per_mm in RESOLUTIONS:
+        for beam_profile in BEAM_PROFILES:
+            dose_error, center_error = measure_stamps(pixels_per_mm, beam_profile)
+            print(f"  {pixels_per_mm:3d} px/mm {beam_profile:>8}: largest total dose error {dose_error * 100:5.2f}% | "
+                  f"mean center error {center_error:5.2f} µm")
+
+    print("Memory of a simulated 3 mm circle:")
+    failures = 0
+    coordinates = Circle(diameter_mm=3, stiffness=10000, center=CENTER, beam_diameter=BEAM_DIAMETER, filled=False).get_coordinates()
+    for pixels_per_mm in RESOLUTIONS:
+        dense, _ = simulate(coordinates, pixels_per_mm=pixels_per_mm)
+        for (dtype, storage) in (("float64", "dense"), ("float32", "dense"), ("float32", "tiled")):
+            alpha, simulation_time = simulate(coordinates, pixels_per_mm=pixels_per_mm, dtype=dtype, storage=storage)
+            difference = np.abs(np.asarray(alpha, dtype=np.float64) - dense).max() / dense.max()
+            failures += not difference < 1e-5
+            print(f"  {pixels_per_mm:3d} px/mm {dtype} {storage:>5}: {alpha.nbytes / 2**20:7.1f} MB | "
+                  f"{simulation_time:5.2f}s | largest difference from float64 dense {difference:.1e}")
+
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,62 @@
+import sys
+import os
+import time
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from Coordinate import Coordinate, Coordinates, CoordinateArray
+
+# Compares the memory footprint and throughput of the object-based Coordinates container
+# with the columnar CoordinateArray container on a toolpath the size of a filled histology layer.
+# Run from anywhere: python sandbox/benchmark_coordinate_array.py
+
+NUMBER_OF_POINTS = 200000
+
+
+def build(container):
+    for i in range(NUMBER_OF_POINTS):
+        c = Coordinate(i * 0.001, (i % 500) * 0.04)
+        c.v = (0.05, 0.05)
+        c.a = 1.5
+        c.lp = i % 100 != 0
+        container.append(c)
+    return container
+
+
+def measure(name, factory):
+    tracemalloc.start()
+    start = time.perf_counter()
+    container = build(factory())
+    build_time = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    total = 0.0
+    for c in container:
+        total += float(c.x)
+    iterate_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    merged = factory()
+    merged += container
+    merged += container
+    concat_time = time.perf_counter() - start
+
+    print(f"{name:>16}: retained {retained / 1e6:8.1f} MB | peak {peak / 1e6:8.1f} MB | "
+          f"append {NUMBER_OF_POINTS / build_time:10.0f} pts/s | iterate {NUMBER_OF_POINTS / iterate_time:10.0f} pts/s | "
+          f"concatenate x2 {concat_time * 1000:8.2f} ms")
+    return container
+
+
+if __name__ == "__main__":
+    print(f"{NUMBER_OF_POINTS} points")
+    coordinates = measure("Coordinates", Coordinates)
+    array = measure("CoordinateArray", CoordinateArray)
+    print(f"CoordinateArray column storage: {array.nbytes / 1e6:.1f} MB")
+
+    # Generators that already produce columns skip the per-point Coordinate entirely
+    start = time.perf_counter()
+    bulk = CoordinateArray.from_arrays(array.x, array.y, array.vx, array.vy, array.a, array.lp)
+    bulk.translate(1.0, 1.0)
+    print(f"CoordinateArray bulk build + translate: {(time.perf_counter() - start) * 1000:.2f} ms")
@@ -0,0 +1,98 @@
+import sys
+import os
+import glob
+import time
+import cv2
+import numpy as np
+from scipy import ndimage
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from Shapes.HistologicalImageProcessing import downsample, segment_images, blur, dilate_and_erode, canny_edge_detection
+from Shapes.HistologicalImageProcessing.Islands import detect_islands, get_blob_thickness
+
+# Benchmarks Islands.detect_islands against the previous implementation, which ran a distance transform over the whole
+# image for every region in the size range, on the Canny edges of every segmented layer of each image in test_images/
+# and on random speckle masks. Both must return the same islands and thicknesses.
+# Run from anywhere: python sandbox/benchmark_detect_islands.py
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+
+def previous_detect_islands(image):
+    min_thickness = 3
+    min_size = 15
+    max_size = 1000
+    binary_image = (image > 0).astype(np.uint8)
+    filled_binary = ndimage.binary_fill_holes(binary_image)
+    labeled_array, num_features = ndimage.label(filled_binary)
+    sizes = ndimage.sum(filled_binary, labeled_array, range(1, num_features + 1))
+    mask_size = (sizes >= min_size) & (sizes <= max_size)
+    valid_labels = np.arange(1, num_features + 1)[mask_size]
+
+    valid_labels_thickness = []
+    thicknesses = []
+    for label in valid_labels:
+        blob_mask = (labeled_array == label).astype(np.uint8)
+        thickness = get_blob_thickness(blob_mask)
+        area = np.sum(blob_mask)
+        if thickness >= min_thickness and area < 80:
+            valid_labels_thickness.append(label)
+            thicknesses.append(thickness)
+
+    # np.in1d, as the previous implementation used, was removed in numpy 2
+    island_mask = np.isin(labeled_array, valid_labels_thickness).reshape(labeled_array.shape)
+    final_labeled, final_num_features = ndimage.label(island_mask)
+    final_sizes = ndimage.sum(island_mask, final_labeled, range(1, final_num_features + 1))
+    return final_labeled, final_num_features, final_sizes, thicknesses, island_mask
+
+
+def get_edge_images(file_name):
+    img = downsample(cv2.imread(file_name))
+    for image in segment_images(img).values():
+        gray_img = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+        binary_img = (cv2.medianBlur(gray_img, 3) > 0.6).astype(np.float32)
+        binary_img2 = (dilate_and_erode(blur(binary_img, 5)) < 0.05).astype(np.float32)
+        yield canny_edge_detection(binary_img2)
+
+
+def is_identical(previous, new):
+    return all(np.array_equal(np.asarray(a), np.asarray(b)) for (a, b) in zip(previous, new))
+
+
+def compare(image):
+    start = time.perf_counter()
+    previous = previous_detect_islands(image)
+    previous_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new = detect_islands(image)
+    new_time = time.perf_counter() - start
+
+    return is_identical(previous, new), previous_time, new_time
+
+
+if __name__ == "__main__":
+    failures = 0
+    for file_name in sorted(glob.glob(os.path.join(ROOT, "test_images", "*"))):
+        results = [compare(image) for image in get_edge_images(file_name)]
+        identical = all(result[0] for result in results)
+        previous_time = sum(result[1] for result in results)
+        new_time = sum(result[2] for result in results)
+        failures += not identical
+        print(f"{os.path.basename(file_name):>55}: {len(results):2d} layers | previous {previous_time:6.2f}s | "
+              f"new {new_time:6.3f}s | {previous_time / new_time:6.1f}x | identical: {identical}")
+
+    rng = np.random.default_rng(0)
+    specks = ndimage.binary_dilation(rng.random((500, 500)) < 0.002, iterations=3).astype(np.uint8) * 255
+    identical, previous_time, new_time = compare(specks)
+    failures += not identical
+    print(f"{'500x500 speckled layer':>55}: {ndimage.label(specks)[1]:4d} specks | previous {previous_time:6.2f}s | "
+          f"new {new_time:6.3f}s | {previous_time / new_time:6.1f}x | identical: {identical}")
+
+    random_failures = 0
+    for _ in range(200):
+        shape = tuple(rng.integers(5, 200, size=2))
+        specks = ndimage.binary_dilation(rng.random(shape) < rng.uniform(0.001, 0.05), iterations=int(rng.integers(1, 5)))
+        random_failures += not compare(specks.astype(np.uint8) * 255)[0]
+    print(f"random masks: {200 - random_failures}/200 identical")
+
+    sys.exit(1 if failures or random_failures else 0)
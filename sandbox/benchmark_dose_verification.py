@@ -0,0 +1,79 @@
+import sys
+import os
+import time
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from Shapes import *
+from Coordinate import Coordinate
+from Constants import BEAM_DIAMETER, MAXIMUM_CURRENT
+from CuringCalculations import curing_calculations
+from DoseVerification import DoseVerification
+
+# Runs DoseVerification on a job of several shapes and prints its report and timing. The conversion of dose to
+# stiffness is checked on a straight line, whose pixels on the path of the beam center receive exactly the photon
+# exposure CuringCalculations resolves for it, so their simulated stiffness must match the intended stiffness away from
+# the ends of the line. The line, rectangle and circle are correct jobs and must pass the verification. The circle is
+# scored against its outline while its toolpath moves in axis-aligned steps, which leaves a few percent of it outside
+# the tolerance. The same job with 30% less dose, and a job whose line is drawn at half its current, must be reported
+# as under-cured.
+# Run from anywhere: python sandbox/benchmark_dose_verification.py
+
+SHAPES = [
+    Line(length_mm=5, stiffness=10000, center=Coordinate(8, 8), rotation_angle_degrees=0, beam_diameter=BEAM_DIAMETER, uses_step_coordinates=False),
+    Rectangle(width_mm=2, height_mm=1.5, stiffness=10000, center=Coordinate(12.5, 12.5), rotation_angle_degrees=0, beam_diameter=BEAM_DIAMETER, uses_step_coordinates=False, filled=True),
+    Circle(diameter_mm=3, stiffness=5000, center=Coordinate(17, 17), beam_diameter=BEAM_DIAMETER, filled=False),
+    Gradient(min_stiffness=5000, max_stiffness=20000, width_mm=3, height_mm=4, center=Coordinate(17, 7), beam_diameter=BEAM_DIAMETER, rotation_angle_degrees=0, is_reversed=False),
+]
+
+
+if __name__ == "__main__":
+    coordinate_sets = [shape.get_coordinates() for shape in SHAPES]
+
+    start = time.perf_counter()
+    canvas = DoseVerification.simulate(coordinate_sets)
+    simulation_time = time.perf_counter() - start
+
+    verification = DoseVerification(coordinate_sets, SHAPES)
+    start = time.perf_counter()
+    reports = verification.verify(canvas)
+    verification_time = time.perf_counter() - start
+    verification.print_report(reports)
+    print(f"simulation {simulation_time:.2f}s | verification {verification_time:.3f}s")
+
+    # The pixels on the center line of the line, which is vertical, 1 mm from its ends
+    line = coordinate_sets[0]
+    y = np.array([float(c.y) for c in line])
+    x = float(line[-1].x)
+    ratio = canvas.mm_to_pixel_ratio
+    y_pixels = slice(int(round((y.min() + 1) * ratio)), int(round((y.max() - 1) * ratio)))
+    center_line = np.asarray(canvas.alpha[int(round(x * ratio)):int(round(x * ratio)) + 1, y_pixels]).ravel()
+    center_stiffness = center_line * MAXIMUM_CURRENT * curing_calculations.average_ratio
+    error = np.abs(center_stiffness / SHAPES[0].stiffness - 1).max()
+    print(f"center line of the line: simulated stiffness {center_stiffness.min():.0f}-{center_stiffness.max():.0f} Pa "
+          f"for {SHAPES[0].stiffness} Pa, largest error {error:.1%}")
+
+    failures = error >= 0.05
+    for report in reports[:3]:
+        passes = report["under_cured"] < 0.1 and report["over_cured"] < 0.1
+        failures += not passes
+        print(f"{report['name']} passes: {passes}")
+
+    canvas.alpha[:, :] = np.asarray(canvas.alpha[:, :]) * 0.7
+    under_dosed = verification.verify(canvas)
+    detected = all(report["under_cured"] > 0.9 for report in under_dosed)
+    failures += not detected
+    print(f"30% under-dose detected in every shape: {detected}")
+
+    # The toolpath of the line resolved for its stiffness, but sent at half the current
+    corrupted_sets = [SHAPES[0].get_coordinates(), *coordinate_sets[1:]]
+    for coordinate in corrupted_sets[0]:
+        if coordinate.a is not None:
+            coordinate.a /= 2
+    corrupted = DoseVerification(corrupted_sets, SHAPES)
+    corrupted_reports = corrupted.verify(DoseVerification.simulate(corrupted_sets))
+    corrupted.print_report(corrupted_reports)
+    detected = corrupted_reports[0]["under_cured"] > 0.9
+    failures += not detected
+    print(f"line at half its current detected: {detected}")
+
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,85 @@
+import sys
+import os
+import time
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from Shapes import *
+from Coordinate import Coordinate, CoordinateArray
+from Constants import ACCELERATION, MAXIMUM_VELOCITY, BEAM_DIAMETER
+from EstimatedCompletionTime import EstimatedCompletionTime
+from Simulator.DryRunManager import DryRunManager
+
+# Runs jobs through DryRunManager and compares the time it predicts with EstimatedCompletionTime, which adds 0.205 s of
+# downtime to every coordinate, and with the time the dry run itself takes. The last job is a pathological sequence of
+# moves shorter than 0.01 mm, which the summary must flag. Every move must send the commands of Manager.move in order.
+# Run from anywhere: python sandbox/benchmark_dry_run.py
+
+CENTER = Coordinate(12.5, 12.5)
+TINY_MOVES = 2000
+
+
+def get_tiny_moves():
+    coordinates = CoordinateArray()
+    for i in range(TINY_MOVES):
+        coordinate = Coordinate(12.5 + i * 0.005, 12.5)
+        coordinate.v = (0.1, 0)
+        coordinate.a = 1.0
+        coordinates.append(coordinate)
+    return coordinates
+
+
+JOBS = {
+    "line": lambda: Line(length_mm=5, stiffness=10000, center=CENTER, rotation_angle_degrees=0, beam_diameter=BEAM_DIAMETER, uses_step_coordinates=False).get_coordinates(),
+    "filled rectangle": lambda: Rectangle(width_mm=2, height_mm=1.5, stiffness=10000, center=CENTER, rotation_angle_degrees=0, beam_diameter=BEAM_DIAMETER, uses_step_coordinates=False, filled=True).get_coordinates(),
+    "circle": lambda: Circle(diameter_mm=3, stiffness=5000, center=CENTER, beam_diameter=BEAM_DIAMETER, filled=False).get_coordinates(),
+    "gradient": lambda: Gradient(min_stiffness=5000, max_stiffness=20000, width_mm=3, height_mm=4, center=CENTER, beam_diameter=BEAM_DIAMETER, rotation_angle_degrees=0, is_reversed=False).get_coordinates(),
+    f"{TINY_MOVES} moves of 5 µm": get_tiny_moves,
+}
+
+
+def get_expected_commands(coordinate):
+    if not coordinate.lp:
+        return ["set_params", "set_params", "move_absolute", "move_absolute"]
+    commands = ["set_params"] * ((coordinate.v[0] != 0) + (coordinate.v[1] != 0))
+    return commands + ["turn_on", "jog_to", "jog_to", "turn_off"]
+
+
+if __name__ == "__main__":
+    failures = 0
+    for (name, get_coordinates) in JOBS.items():
+        coordinates = get_coordinates()
+        manager = DryRunManager(acceleration=ACCELERATION, max_velocity=MAXIMUM_VELOCITY)
+        homing = len(manager.trace)
+        start = time.perf_counter()
+        for coordinate in coordinates:
+            manager.move(coordinate)
+        run_time = time.perf_counter() - start
+
+        # The x and y motion commands of a move run in threads, so only their order within the move may differ
+        expected, traced = [], []
+        index = homing
+        for coordinate in coordinates:
+            commands = get_expected_commands(coordinate)
+            expected.append(sorted(commands))
+            traced.append(sorted(entry["command"] for entry in manager.trace[index:index + len(commands)]))
+            index += len(commands)
+        is_in_order = expected == traced and index == len(manager.trace)
+        is_monotonic = all(b["start_ms"] >= a["start_ms"] for (a, b) in zip(manager.trace, manager.trace[1:]) if b["command"] != "jog_to" and b["command"] != "move_absolute")
+
+        summary = manager.get_summary()
+        estimate = EstimatedCompletionTime(coordinates).get_completion_time()
+        print(f"{name:>18}: {summary['moves']:5d} moves | predicted {summary['time_s']:7.1f}s, lamp on {summary['lamp_on_s']:6.1f}s | "
+              f"EstimatedCompletionTime {estimate:7.1f}s | dry run {run_time:5.2f}s ({summary['time_s'] / run_time:6.0f}x real time) | "
+              f"tiny moves {summary['tiny_moves']} | commands in order: {is_in_order and is_monotonic}")
+        failures += not (is_in_order and is_monotonic and run_time < summary["time_s"])
+        if name.startswith(str(TINY_MOVES)):
+            manager.print_summary()
+            failures += summary["tiny_moves"] < TINY_MOVES - 1
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "trace.csv")
+            manager.save_trace(file_name)
+            with open(file_name) as file:
+                failures += sum(1 for _ in file) != len(manager.trace) + 1
+
+    sys.exit(1 if failures else 0)
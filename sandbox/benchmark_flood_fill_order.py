@@ -0,0 +1,81 @@
+import sys
+import os
+import glob
+import time
+import cv2
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from Shapes.HistologyImage import HistologyImage
+from Shapes.HistologicalImageProcessing import downsample
+
+# Benchmarks HistologyImage.get_flood_fill_order against the previous pixel-by-pixel flood fill of
+# convert_pixels_to_coordinates, on the tissue pixels of each image in test_images/ (downsampled to 500 px) and on
+# random masks, which also cover fills that start in the last column. Both must visit the pixels in the same order.
+# Run from anywhere: python sandbox/benchmark_flood_fill_order.py
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+
+def previous_flood_fill_order(pixels):
+    visited = np.zeros((len(pixels), len(pixels[0])))
+    width = 0 if len(pixels) == 0 else len(pixels[0])
+    height = len(pixels)
+    order = []
+
+    for row in range(height):
+        for col in range(width):
+            if pixels[row][col] == 255 and visited[row][col] == 0:
+                queue = [(row, col)]
+                while queue:
+                    y, x = queue.pop(0)
+                    if visited[y][x] == 0:
+                        visited[y][x] = 1
+                        order.append((y, x))
+
+                        offsets = [(-1, -1), (-1, 0), (-1, 1),
+                                    (0, -1),           (0, 1),
+                                    (1, -1),  (1, 0),  (1, 1)]
+
+                        neighbors = []
+                        for dx, dy in offsets:
+                            nx, ny = x + dx, y + dy
+                            if 0 <= nx < width - 1 and 0 <= ny < height - 1 and visited[ny][nx] == 0:
+                                neighbors.append((ny, nx))
+
+                        for neighbor in neighbors:
+                            if pixels[neighbor[0]][neighbor[1]] == 255:
+                                queue.append(neighbor)
+    return order
+
+
+def compare(pixels):
+    start = time.perf_counter()
+    previous = previous_flood_fill_order(pixels)
+    previous_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rows, cols = HistologyImage.get_flood_fill_order(pixels == 255)
+    new_time = time.perf_counter() - start
+
+    return list(zip(rows.tolist(), cols.tolist())) == previous, len(previous), previous_time, new_time
+
+
+if __name__ == "__main__":
+    failures = 0
+    for file_name in sorted(glob.glob(os.path.join(ROOT, "test_images", "*"))):
+        img = downsample(cv2.imread(file_name, cv2.IMREAD_GRAYSCALE))
+        pixels = (img < np.mean(img)).astype(np.float32) * 255
+        identical, n, previous_time, new_time = compare(pixels)
+        failures += not identical
+        print(f"{os.path.basename(file_name):>55}: {n:7d} pixels | previous {previous_time:7.2f}s | "
+              f"new {new_time:6.3f}s | {previous_time / new_time:7.1f}x | identical: {identical}")
+
+    rng = np.random.default_rng(0)
+    random_failures = 0
+    for _ in range(500):
+        shape = tuple(rng.integers(1, 40, size=2))
+        pixels = (rng.random(shape) < rng.uniform(0.05, 0.7)).astype(np.float32) * 255
+        random_failures += not compare(pixels)[0]
+    print(f"random masks: {500 - random_failures}/500 identical")
+
+    sys.exit(1 if failures or random_failures else 0)
@@ -0,0 +1,82 @@
+import sys
+import os
+import glob
+import time
+import cv2
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from Coordinate import Coordinate
+from Constants import BEAM_DIAMETER
+from EstimatedCompletionTime import EstimatedCompletionTime
+from Shapes.HistologyImage import HistologyImage, TOOLPATH_MODES
+from Shapes.HistologicalImageProcessing import downsample
+
+# Compares the toolpath modes of HistologyImage ("nearest_neighbor", "scan_lines" and "contours") on the tissue pixels
+# of each image in test_images/ (downsampled to 500 px, 10 mm high, cured with the machine's beam): generation time, waypoints,
+# length travelled with the lamp on and off, and estimated stage time.
+# The scan line path is also checked to cure along its lines only, to move along one axis at a time and to cure
+# exactly the bands that contain tissue.
+# Run from anywhere: python sandbox/benchmark_histology_toolpath_modes.py
+
+HEIGHT_MM = 10
+STIFFNESS = 50
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+
+def get_histology_image(toolpath_mode, width_mm):
+    # The layers come from an interactive selection, so the image is set up without loading a file
+    histology_image = object.__new__(HistologyImage)
+    histology_image.dimensions = (width_mm, HEIGHT_MM)
+    histology_image.beam_diameter = BEAM_DIAMETER
+    histology_image.center = Coordinate(width_mm / 2, HEIGHT_MM / 2)
+    histology_image.rotation = 0
+    histology_image.toolpath_mode = toolpath_mode
+    return histology_image
+
+
+def run(toolpath_mode, pixels):
+    width_mm = HEIGHT_MM / pixels.shape[0] * pixels.shape[1]
+    histology_image = get_histology_image(toolpath_mode, width_mm)
+    start = time.perf_counter()
+    coordinates = histology_image.convert_pixels_to_coordinates([np.flip(row, 0) for row in pixels], STIFFNESS)
+    elapsed = time.perf_counter() - start
+    return coordinates, elapsed, EstimatedCompletionTime(coordinates).get_completion_time()
+
+
+def get_travel(coordinates):
+    x = np.array(coordinates.x, dtype=float)
+    y = np.array(coordinates.y, dtype=float)
+    lamp_states = np.array([c.lp for c in coordinates.coordinates[1:]], dtype=bool)
+    distances = np.hypot(np.diff(x), np.diff(y))
+    return distances[lamp_states].sum(), distances[~lamp_states].sum()
+
+
+def covers_tissue_bands(pixels):
+    mask = pixels == 255
+    height, width = mask.shape
+    points, lamp_states = HistologyImage.get_scan_line_path(mask, HEIGHT_MM / height * width, HEIGHT_MM)
+    pitch = float(HistologyImage.get_scan_line_path.__defaults__[0])
+    bands = np.floor((HEIGHT_MM * (height - np.arange(height) - 0.5)) / height / pitch).astype(int)
+    tissue_bands = set(bands[mask.any(axis=1)].tolist())
+    cured_bands = set(np.floor(points[lamp_states, 1] / pitch).astype(int).tolist())
+    is_horizontal = (points[1:, 1][lamp_states[1:]] == points[:-1, 1][lamp_states[1:]]).all()
+    is_axis_aligned = ((points[1:, 0] == points[:-1, 0]) | (points[1:, 1] == points[:-1, 1])).all()
+    return not lamp_states[0] and is_horizontal and is_axis_aligned and tissue_bands == cured_bands
+
+if __name__ == "__main__":
+    failures = 0
+    for file_name in sorted(glob.glob(os.path.join(ROOT, "test_images", "*"))):
+        img = downsample(cv2.imread(file_name, cv2.IMREAD_GRAYSCALE))
+        pixels = (img < np.mean(img)).astype(np.float32) * 255
+
+        for toolpath_mode in TOOLPATH_MODES:
+            coordinates, elapsed, stage_time = run(toolpath_mode, pixels)
+            lamp_on, lamp_off = get_travel(coordinates)
+            print(f"{os.path.basename(file_name):>55} {toolpath_mode:>16}: {len(coordinates):5d} points, generated in "
+                  f"{elapsed:5.2f}s, lamp on {lamp_on:6.1f} mm, lamp off {lamp_off:6.1f} mm, stage {stage_time:7.0f}s")
+
+        is_covered = covers_tissue_bands(pixels)
+        failures += not is_covered
+        print(f"{'':>55} {'':>16}  scan lines cover every tissue band: {is_covered}")
+
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,49 @@
+import sys
+import os
+import glob
+import time
+import tempfile
+import numpy as np
+import matplotlib.pyplot as plt
+from PIL import Image
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from Shapes.HistologicalImageProcessing import load_image, convert_jpg_to_png
+
+# Benchmarks load_image against the previous way HistologyImage read images, which converted a JPG to a temporary PNG
+# and read it back with plt.imread, on each image in test_images/. Both must return the same float32 pixels. Every
+# image is also saved as a TIFF, which must read back the same as the PNG path.
+# Run from anywhere: python sandbox/benchmark_load_image.py
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+
+def previous_load_image(file_name):
+    if file_name.lower().endswith('.jpg'):
+        file_name = convert_jpg_to_png(file_name)
+    return plt.imread(file_name)
+
+
+def measure(load, file_name):
+    start = time.perf_counter()
+    img = load(file_name)
+    return img, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        for file_name in sorted(glob.glob(os.path.join(ROOT, "test_images", "*"))):
+            previous, previous_time = measure(previous_load_image, file_name)
+            new, new_time = measure(load_image, file_name)
+            identical = previous.dtype == new.dtype and np.array_equal(previous, new)
+
+            tiff_file = os.path.join(directory, os.path.splitext(os.path.basename(file_name))[0] + ".tiff")
+            with Image.open(file_name) as img:
+                img.save(tiff_file)
+            is_tiff_identical = np.array_equal(load_image(tiff_file), previous)
+
+            failures += not (identical and is_tiff_identical)
+            print(f"{os.path.basename(file_name):>55}: {'x'.join(map(str, new.shape)):>12} | previous {previous_time:6.3f}s | "
+                  f"new {new_time:6.3f}s | {previous_time / new_time:5.1f}x | identical: {identical} | TIFF identical: {is_tiff_identical}")
+
+    sys.exit(1 if failures else 0)
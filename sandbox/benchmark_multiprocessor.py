@@ -0,0 +1,114 @@
+import sys
+import os
+import time
+import uuid
+import multiprocessing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+import CommonPatterns
+from Coordinate import Coordinate
+from Multiprocessor import Multiprocessor, MAXIMUM_PARALLEL_PROCESSES, BACKENDS
+
+# Compares shape generation through the previous Multiprocessor (one Process per shape, results in a Manager dict,
+# liveness polled every 0.5 s) with the pooled Multiprocessor on each backend, using the CommonPatterns workloads.
+# The pooled engine is reused for every workload, as it would be across batches. Every backend must produce the same
+# positions, velocities and accelerations as the previous implementation, in particular the threads backend, whose
+# workers don't inherit the Decimal precision of the main thread.
+# Run from anywhere: python sandbox/benchmark_multiprocessor.py
+
+
+class LegacyMultiprocessor:
+    """
+    The previous implementation of Multiprocessor, kept for comparison.
+    """
+
+    def get_coordinate_sets(self, shapes):
+        coordinate_sets = multiprocessing.Manager().dict()
+        processes = []
+        shape_ids = []
+        for shape in shapes:
+            shape_id = uuid.uuid4()
+            shape_ids.append(shape_id)
+            processes.append(multiprocessing.Process(target=self.append_coordinates, args=(shape, shape_id, coordinate_sets)))
+
+        self.handle_processes(processes)
+
+        coordinate_sets_in_order = []
+        for shape_id in shape_ids:
+            if shape_id in coordinate_sets:
+                coordinate_sets_in_order.append(coordinate_sets[shape_id])
+
+        return coordinate_sets_in_order
+
+    @staticmethod
+    def append_coordinates(shape, shape_id, coordinates):
+        coordinates[shape_id] = shape.get_coordinates()
+
+    def handle_processes(self, processes):
+        current_processes = []
+        for i in range(MAXIMUM_PARALLEL_PROCESSES):
+            if processes:
+                current_processes.append(processes.pop(0))
+                current_processes[-1].start()
+
+        while current_processes:
+            for thread in current_processes:
+                if not thread.is_alive():
+                    current_processes.remove(thread)
+                    thread.join()
+                    if processes:
+                        new_thread = processes.pop(0)
+                        current_processes.append(new_thread)
+                        new_thread.start()
+                    break
+            time.sleep(0.5)
+
+
+def get_workloads():
+    center = Coordinate(12.5, 12.5)
+    return {
+        "atom": lambda: CommonPatterns.atom(width_mm=10, height_mm=4, center=center, stiffness=50000),
+        "rounded_square": lambda: CommonPatterns.rounded_square(length_mm=5, center=center, stiffness=50000),
+        "square_star": lambda: CommonPatterns.square_star(size_mm=5, center=center, stiffness=10000),
+        "star_of_david": lambda: CommonPatterns.star_of_david(size_mm=5, center=center, stiffness=10000),
+        "ovals": lambda: CommonPatterns.ovals(center=center, stiffness=10000),
+    }
+
+
+def get_toolpath(coordinates):
+    return [(c.x, c.y, c.v, c.a, c.lp) for c in coordinates]
+
+
+def run(engine, workloads):
+    durations = {}
+    toolpaths = {}
+    for name, make_shapes in workloads.items():
+        start = time.perf_counter()
+        coordinate_sets = engine.get_coordinate_sets(make_shapes())
+        durations[name] = time.perf_counter() - start
+        toolpaths[name] = [get_toolpath(c) for c in coordinate_sets]
+    return durations, toolpaths
+
+
+if __name__ == "__main__":
+    # tqdm progress bars from the workers would drown the table
+    sys.stderr = open(os.devnull, "w")
+
+    workloads = get_workloads()
+    legacy_durations, legacy_toolpaths = run(LegacyMultiprocessor(), workloads)
+    results = {}
+    for backend in BACKENDS:
+        with Multiprocessor(backend=backend) as engine:
+            results[backend] = run(engine, workloads)
+
+    failures = 0
+    print(f"{MAXIMUM_PARALLEL_PROCESSES} workers")
+    print(f"{'workload':>16} | {'legacy':>9} | " + " | ".join(f"{backend:>9}" for backend in BACKENDS) + " | same output")
+    for name in workloads:
+        row = " | ".join(f"{results[backend][0][name] * 1000:7.0f}ms" for backend in BACKENDS)
+        same = all(results[backend][1][name] == legacy_toolpaths[name] for backend in BACKENDS)
+        failures += not same
+        print(f"{name:>16} | {legacy_durations[name] * 1000:7.0f}ms | {row} | {same}")
+    total = " | ".join(f"{sum(results[backend][0].values()) * 1000:7.0f}ms" for backend in BACKENDS)
+    print(f"{'total':>16} | {sum(legacy_durations.values()) * 1000:7.0f}ms | {total} |")
+
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,89 @@
+import sys
+import os
+import glob
+import time
+import cv2
+import numpy as np
+from scipy.spatial import cKDTree
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from Coordinate import Coordinate, Coordinates
+from Constants import MINIMUM_DISTANCE_BETWEEN_TWO_LIGHT_BEAMS, BEAM_DIAMETER
+from Shapes.HistologyImage import HistologyImage
+from Shapes.HistologicalImageProcessing import downsample
+
+# Benchmarks HistologyImage.ordered_by_nearest_neighbor against the previous implementation, which queried every
+# point at every step, on the tissue pixels of each image in test_images/ (downsampled to 500 px, 3 mm high).
+# The previous implementation took equidistant points in whatever order cKDTree's heap returned them, which changes
+# with k, so the new path is checked against the same algorithm with ties taken in coordinate order.
+# Run from anywhere: python sandbox/benchmark_nearest_neighbor_ordering.py
+
+HEIGHT_MM = 3
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+
+def previous_ordered_by_nearest_neighbor(coordinates, beam_diameter, ties_in_coordinate_order=False):
+    min_distance = float(MINIMUM_DISTANCE_BETWEEN_TWO_LIGHT_BEAMS)
+    points = [(coord.x, coord.y) for coord in coordinates]
+    path = Coordinates()
+    path.append(coordinates[0])
+    blacklist = set()
+    blacklist.add(0)
+    tree = cKDTree(points)
+
+    while True:
+        current_coord = path[-1]
+        current_point = (current_coord.x, current_coord.y)
+
+        distances, indices = tree.query(current_point, k=len(points), distance_upper_bound=np.inf)
+        if ties_in_coordinate_order:
+            order = np.lexsort((indices, distances))
+            distances, indices = distances[order], indices[order]
+        next_point_found = False
+        for dist, idx in zip(distances, indices):
+            if idx != tree.n and dist >= min_distance and idx not in blacklist:
+                if dist > beam_diameter:
+                    coordinates[idx].lp = False
+                path.append(coordinates[idx])
+                nearby_indices = tree.query_ball_point(points[idx], min_distance)
+                blacklist.update(nearby_indices)
+                next_point_found = True
+                break
+
+        if not next_point_found:
+            break
+
+    return path
+
+
+def get_tissue_coordinates(file_name):
+    img = downsample(cv2.imread(file_name, cv2.IMREAD_GRAYSCALE))
+    tissue = img < np.mean(img)
+    height, width = tissue.shape
+    width_mm = HEIGHT_MM / height * width
+    coordinates = Coordinates()
+    for (y, x) in np.argwhere(tissue):
+        coordinates.append(Coordinate(width_mm * x / width, HEIGHT_MM * (height - y) / height))
+    return coordinates
+
+
+def run(order, file_name, *args):
+    coordinates = get_tissue_coordinates(file_name)
+    start = time.perf_counter()
+    path = order(coordinates, BEAM_DIAMETER, *args)
+    return [(float(c.x), float(c.y), c.lp) for c in path], time.perf_counter() - start, len(coordinates)
+
+
+if __name__ == "__main__":
+    failures = 0
+    for file_name in sorted(glob.glob(os.path.join(ROOT, "test_images", "*"))):
+        new_path, new_time, n = run(HistologyImage.ordered_by_nearest_neighbor, file_name)
+        reference_path, _, _ = run(previous_ordered_by_nearest_neighbor, file_name, True)
+        previous_path, previous_time, _ = run(previous_ordered_by_nearest_neighbor, file_name)
+
+        identical = new_path == reference_path
+        failures += not identical
+        print(f"{os.path.basename(file_name):>55}: {n:7d} points, {len(new_path):5d} path points | "
+              f"previous {previous_time:7.2f}s ({len(previous_path):5d} path points) | new {new_time:6.3f}s | "
+              f"{previous_time / new_time:6.1f}x | identical with coordinate-order ties: {identical}")
+
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,70 @@
+import sys
+import os
+import glob
+import time
+import tracemalloc
+import cv2
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from Shapes.HistologicalImageProcessing import downsample, segment_images, detect_bins_from_histogram
+
+# Benchmarks SmartColorBinning.segment_images against the previous implementation, which built a mask and a full copy
+# of the image for every bin, on the downsampled images in test_images/ (as HistologyImage reads them, and full size).
+# Both must return the same layers in the same order.
+# Run from anywhere: python sandbox/benchmark_segment_images.py
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+
+def previous_segment_images(img):
+    images = {}
+    max_val = np.max(img)
+    scale = 255 / max_val
+    if len(img.shape) == 3:
+        gray_img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        pixels = ((gray_img.flatten() * scale) * 100).astype(int) / 100
+    else:
+        pixels = ((img.flatten() * scale) * 100).astype(int) / 100
+    bin_ranges = detect_bins_from_histogram(pixels)
+
+    pixel_colors = []
+    for i in range(len(bin_ranges) - 1):
+        average_pixel = int((bin_ranges[i] + bin_ranges[i + 1]) / 2)
+        mask = (pixels >= bin_ranges[i]) & (pixels < bin_ranges[i + 1] + 1)
+        pixel_colors.append((average_pixel, mask))
+
+    sorted_pixel_colors = sorted(pixel_colors, key=lambda x: np.sum(x[1]), reverse=True)
+    for color, mask in sorted_pixel_colors:
+        images[color] = np.zeros_like(img)
+        images[color][mask.reshape(img.shape[:2])] = color
+    return images
+
+
+def measure(segment, img):
+    tracemalloc.start()
+    start = time.perf_counter()
+    images = segment(img)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return images, elapsed, peak / 2 ** 20
+
+
+def compare(img):
+    previous, previous_time, previous_peak = measure(previous_segment_images, img)
+    new, new_time, new_peak = measure(segment_images, img)
+    identical = list(previous.keys()) == list(new.keys()) and all(np.array_equal(previous[c], new[c]) for c in previous)
+    return identical, len(previous), previous_time, previous_peak, new_time, new_peak
+
+
+if __name__ == "__main__":
+    failures = 0
+    for file_name in sorted(glob.glob(os.path.join(ROOT, "test_images", "*"))):
+        original = cv2.imread(file_name)
+        for (size, img) in (("500 px", downsample(original)), ("full", original)):
+            identical, n, previous_time, previous_peak, new_time, new_peak = compare(img)
+            failures += not identical
+            print(f"{os.path.basename(file_name):>55} {size:>6}: {n:2d} layers | previous {previous_time:6.3f}s "
+                  f"{previous_peak:6.1f} MB | new {new_time:6.3f}s {new_peak:6.1f} MB | identical: {identical}")
+
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,59 @@
+import sys
+import os
+import math
+import random
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from Coordinate import Coordinate, Coordinates
+from Constants import ACCELERATION, MAXIMUM_VELOCITY
+from ShapeOrderOptimizer import ShapeOrderOptimizer
+
+# Orders 1000 random two-point sets with and without the 2-opt / Or-opt pass. The lamp-off travel of each tour is
+# timed as Manager.move drives it: both axes run move_absolute at MAXIMUM_VELOCITY and ACCELERATION at once, so the
+# longer axis sets the time. The tour must not be slower than the given order, and saved_seconds must match.
+# Run from anywhere: python sandbox/benchmark_shape_order.py
+
+SETS = 1000
+
+
+def get_axis_time(d):
+    t1 = 2 * math.sqrt(d / ACCELERATION)
+    return t1 if t1 < 2 * MAXIMUM_VELOCITY / ACCELERATION else MAXIMUM_VELOCITY / ACCELERATION + d / MAXIMUM_VELOCITY
+
+
+def get_travel_time(coordinate_sets):
+    x, y = 0.0, 0.0
+    seconds = 0
+    for coordinates in coordinate_sets:
+        seconds += max(get_axis_time(abs(float(coordinates[0].x) - x)), get_axis_time(abs(float(coordinates[0].y) - y)))
+        x, y = float(coordinates[-1].x), float(coordinates[-1].y)
+    return seconds
+
+
+def get_random_sets():
+    random.seed(1)
+    coordinate_sets = []
+    for _ in range(SETS):
+        coordinates = Coordinates()
+        for _ in range(2):
+            coordinates.append(Coordinate(random.uniform(0, 25), random.uniform(0, 25)))
+        coordinate_sets.append(coordinates)
+    return coordinate_sets
+
+
+if __name__ == "__main__":
+    failures = 0
+    coordinate_sets = get_random_sets()
+    before = get_travel_time(coordinate_sets)
+    for budget in (0, 1.0):
+        optimizer = ShapeOrderOptimizer(improvement_time_budget_s=budget)
+        start = time.perf_counter()
+        ordered = optimizer.optimize(coordinate_sets)
+        duration = time.perf_counter() - start
+        after = get_travel_time(ordered)
+        is_consistent = math.isclose(optimizer.saved_seconds, before - after, rel_tol=1e-9)
+        failures += not (after <= before and is_consistent)
+        print(f"budget {budget:.1f}s: ordered in {duration:5.2f}s | lamp-off travel {before:7.0f}s -> {after:5.0f}s | "
+              f"saved_seconds {optimizer.saved_seconds:7.1f}s | matches the motion model: {is_consistent}")
+
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,106 @@
+import sys
+import os
+import json
+import time
+import resource
+import tracemalloc
+import subprocess
+import tempfile
+import cv2
+import numpy as np
+from shapely.geometry import Polygon
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from Shapes.HistologyImage import HistologyImage
+from Shapes.HistologicalImageProcessing import read_grayscale, segment_tiles, get_tiled_layer_mask
+
+# Benchmarks the tiled mode of HistologyImage on a slide upscaled 3x from a test image (about 53 megapixels). The tiles
+# must stitch into the same layer mask as one tile covering the whole slide. Vectorizing the mask tile by tile must
+# give the same scan lines and contours of the same area as vectorizing it whole, and its peak NumPy memory must not
+# grow with the slide. Each run then patterns the slide in a
+# fresh process, once downsampled to 500 px and once at full resolution in tiles, and reports its peak memory. The
+# default toolpath mode is "nearest_neighbor" downsampled and "scan_lines" in tiles, and "nearest_neighbor" must be
+# rejected in tiles.
+# Run from anywhere: python sandbox/benchmark_tiled_histology.py
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+SOURCE_IMAGE = os.path.join(ROOT, "test_images", "examplehistology_fetalcerebellumappx30weeks_100x.jpg")
+UPSCALE = 3
+TILE_SIZE = 2048
+LAYER_SELECTION = {"gray_levels": {"130": 10000}}
+
+
+def run(img_file, toolpath_mode, tile_size):
+    start = time.perf_counter()
+    toolpath_mode = None if toolpath_mode == "default" else toolpath_mode
+    histology_image = HistologyImage(img_file, height_mm=3, beam_diameter=0.45, toolpath_mode=toolpath_mode, layer_selection=LAYER_SELECTION, uses_layer_cache=False, tile_size=tile_size)
+    coordinates = histology_image.get_coordinates()
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {"points": len(coordinates), "elapsed": elapsed, "peak": peak}
+
+
+def get_area(polygons):
+    return sum(Polygon([(c.x, c.y) for c in outline], [[(c.x, c.y) for c in hole] for hole in holes]).buffer(0).area for (outline, holes) in polygons)
+
+
+def measure(vectorize):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = vectorize()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def check_tiles(img_file):
+    image = read_grayscale(img_file)
+    value_labels, segmented_images = segment_tiles(image, TILE_SIZE)
+    label_range = segmented_images.label_ranges[1, 0]
+    tiled = get_tiled_layer_mask(image, value_labels, label_range, TILE_SIZE, 31)
+    whole = get_tiled_layer_mask(image, value_labels, label_range, max(image.shape), 31)
+    stitched = np.array_equal(tiled, whole)
+    print(f"{image.shape[1]}x{image.shape[0]} slide, tiles of {TILE_SIZE} px stitch into the whole-slide mask: {stitched}")
+
+    width_mm = 3 / image.shape[0] * image.shape[1]
+    del whole
+    whole_path, whole_time, whole_peak = measure(lambda: HistologyImage.get_scan_line_path(np.asarray(tiled) == 255, width_mm, 3))
+    tiled_path, tiled_time, tiled_peak = measure(lambda: HistologyImage.get_scan_line_path(tiled, width_mm, 3, tile_size=TILE_SIZE))
+    same_path = all(np.array_equal(a, b) for (a, b) in zip(whole_path, tiled_path))
+    print(f" scan lines: whole {whole_time:5.2f}s, peak {whole_peak:6.1f} MB | tiled {tiled_time:5.2f}s, peak {tiled_peak:6.1f} MB | same path: {same_path}")
+
+    whole_polygons, whole_time, whole_peak = measure(lambda: HistologyImage.get_contour_polygons(np.asarray(tiled) == 255, width_mm, 3))
+    tiled_polygons, tiled_time, tiled_peak = measure(lambda: HistologyImage.get_tiled_contour_polygons(tiled, width_mm, 3, TILE_SIZE))
+    area_error = abs(get_area(tiled_polygons) / get_area(whole_polygons) - 1)
+    print(f"   contours: whole {whole_time:5.2f}s, peak {whole_peak:6.1f} MB | tiled {tiled_time:5.2f}s, peak {tiled_peak:6.1f} MB | "
+          f"{len(whole_polygons)} and {len(tiled_polygons)} regions, area differs by {area_error:.3%}")
+    return stitched and same_path and area_error < 0.001
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4:
+        print(json.dumps(run(sys.argv[1], sys.argv[2], None if sys.argv[3] == "none" else int(sys.argv[3]))))
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        img_file = os.path.join(directory, "slide.png")
+        img = cv2.imread(SOURCE_IMAGE)
+        cv2.imwrite(img_file, cv2.resize(img, (0, 0), fx=UPSCALE, fy=UPSCALE, interpolation=cv2.INTER_CUBIC))
+
+        is_tiled = check_tiles(img_file)
+
+        try:
+            HistologyImage(img_file, height_mm=3, toolpath_mode="nearest_neighbor", layer_selection=LAYER_SELECTION, tile_size=TILE_SIZE)
+            rejected = False
+        except ValueError:
+            rejected = True
+        print(f"nearest_neighbor is rejected in tiles: {rejected}")
+
+        for toolpath_mode in ("default", "scan_lines", "contours"):
+            for tile_size in ("none", str(TILE_SIZE)):
+                output = subprocess.run([sys.executable, os.path.realpath(__file__), img_file, toolpath_mode, tile_size], capture_output=True, text=True, check=True).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print(f"{toolpath_mode:>11} {'500 px' if tile_size == 'none' else 'tiled':>7}: {result['points']:6d} points | "
+                      f"{result['elapsed']:6.2f}s | peak {result['peak']:6.0f} MB")
+
+    sys.exit(0 if is_tiled and rejected else 1)
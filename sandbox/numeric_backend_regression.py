@@ -0,0 +1,94 @@
+import sys
+import os
+import time
+import numpy as np
+from scipy.spatial import cKDTree
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+import NumericBackend
+from Constants import MOTOR_MINIMUM_STEP_SIZE, BEAM_DIAMETER
+from Coordinate import Coordinate
+from Shapes import *
+
+# Regression check for the numeric backends: every shape is generated with the Decimal backend as the reference
+# and with each alternative backend. When both toolpaths have the same points, lamp states must match and every
+# position must agree within the KDC101 step size. Snapping positions to the motor grid can shift a segment's
+# velocity enough to change its pass count, so toolpaths with a different number of points are compared
+# geometrically instead: every position must lie within one step of the other toolpath (Hausdorff distance).
+# Exits with a non-zero status if any shape disagrees.
+# Run from anywhere: python sandbox/numeric_backend_regression.py
+
+REFERENCE_BACKEND = "decimal"
+CANDIDATE_BACKENDS = ["float", "micrometre"]
+
+
+def get_shapes():
+    center = Coordinate(12.5, 12.5)
+    return {
+        "Rectangle (filled, step)": Rectangle(width_mm=3, height_mm=2, stiffness=20000, center=center, rotation_angle_degrees=30, beam_diameter=BEAM_DIAMETER, uses_step_coordinates=True, filled=True),
+        "Square": Square(side_length_mm=2, stiffness=300000, center=center, beam_diameter=BEAM_DIAMETER),
+        "Triangle (filled)": Triangle(width_mm=2, height_mm=2.6, stiffness=10000, center=center, beam_diameter=BEAM_DIAMETER, filled=True),
+        "Equilateral Triangle (step)": EquilateralTriangle(side_length_mm=2, stiffness=10000, center=center, rotation_angle_degrees=180, beam_diameter=BEAM_DIAMETER, uses_step_coordinates=True),
+        "Line (step)": Line(length_mm=5, stiffness=20000, center=center, rotation_angle_degrees=45, beam_diameter=BEAM_DIAMETER, uses_step_coordinates=True),
+        "Oval": Oval(width_mm=10, height_mm=4, stiffness=50000, center=center, rotation_angle_degrees=60),
+        "Circle (filled)": Circle(diameter_mm=2, stiffness=20000, center=center, beam_diameter=BEAM_DIAMETER, filled=True),
+        "Sine Wave": SineWave(amplitude_mm=1, cycles=2, cycles_per_mm=0.5, stiffness=10000, center=center, beam_diameter=BEAM_DIAMETER),
+        "Gradient": Gradient(min_stiffness=5000, max_stiffness=20000, width_mm=3, height_mm=8, center=center, beam_diameter=BEAM_DIAMETER, rotation_angle_degrees=15),
+        "Gradient Line": GradientLine(length_mm=8, min_stiffness=500, max_stiffness=20000, center=center, beam_diameter=BEAM_DIAMETER, num_steps=20),
+    }
+
+
+def generate(backend_name):
+    NumericBackend.set_backend(backend_name)
+    toolpaths = {}
+    durations = {}
+    for name, shape in get_shapes().items():
+        start = time.perf_counter()
+        coordinates = shape.get_coordinates()
+        durations[name] = time.perf_counter() - start
+        toolpaths[name] = [(float(c.x), float(c.y), c.v, c.a, c.lp) for c in coordinates]
+    return toolpaths, durations
+
+
+def hausdorff_distance(reference, candidate):
+    a = np.array([(p[0], p[1]) for p in reference])
+    b = np.array([(p[0], p[1]) for p in candidate])
+    return max(cKDTree(b).query(a)[0].max(), cKDTree(a).query(b)[0].max())
+
+
+def compare(reference, candidate):
+    if len(reference) != len(candidate):
+        distance = hausdorff_distance(reference, candidate)
+        summary = f"{len(candidate)} vs {len(reference)} points (pass counts differ), Hausdorff distance {distance:.2e} mm"
+        return distance <= MOTOR_MINIMUM_STEP_SIZE, summary
+
+    max_position_error = 0.0
+    max_velocity_error = 0.0
+    max_current_error = 0.0
+    for r, c in zip(reference, candidate):
+        if r[4] != c[4]:
+            return False, "lamp states differ"
+        max_position_error = max(max_position_error, abs(r[0] - c[0]), abs(r[1] - c[1]))
+        if (r[2] is None) != (c[2] is None) or (r[3] is None) != (c[3] is None):
+            return False, "velocity or current missing"
+        if r[2] is not None:
+            max_velocity_error = max(max_velocity_error, abs(r[2][0] - c[2][0]), abs(r[2][1] - c[2][1]))
+        if r[3] is not None:
+            max_current_error = max(max_current_error, abs(r[3] - c[3]))
+
+    summary = f"max position error {max_position_error:.2e} mm, velocity {max_velocity_error:.2e} mm/s, current {max_current_error:.2e} A"
+    return max_position_error <= MOTOR_MINIMUM_STEP_SIZE, summary
+
+
+if __name__ == "__main__":
+    reference, reference_durations = generate(REFERENCE_BACKEND)
+    failures = 0
+    for backend_name in CANDIDATE_BACKENDS:
+        candidate, durations = generate(backend_name)
+        print(f"\n{backend_name} vs {REFERENCE_BACKEND}")
+        for name in reference:
+            passed, summary = compare(reference[name], candidate[name])
+            failures += not passed
+            speedup = reference_durations[name] / durations[name]
+            print(f"  {'PASS' if passed else 'FAIL'} {name:<28} {summary} | {speedup:4.1f}x faster")
+
+    sys.exit(1 if failures else 0)